@@ -0,0 +1,96 @@
+from collections import Counter
+
+TIMED_KEYS = ["id", "start", "end"]
+
+
+def validate_attacks(attacks):
+    """Validates the timed attacks of an attack file in O(A log A)
+
+    Attacks are sorted once by their start, and a single scan over the sorted
+    attacks finds overlaps with the attack ending last so far.
+
+    Args:
+        attacks: list of attacks
+
+    Returns:
+        report dict with the lists
+            missing_keys: {index, id, keys} of attacks without a required key
+            unsorted: {index, id, other_index, other_id, relation} of attacks
+                whose position differs from the chronological order, i.e., the
+                attack at that position in order (relation 'after' or 'before')
+            overlaps: {id, start, other_id, end} of attacks starting before the
+                end of a preceding attack
+            duplicate_ids: ids shared by several attacks
+    """
+
+    report = {"missing_keys": [], "unsorted": [], "overlaps": [], "duplicate_ids": []}
+
+    for i, attack in enumerate(attacks):
+        missing = [key for key in TIMED_KEYS if key not in attack]
+        if len(missing) > 0:
+            report["missing_keys"].append(
+                {"index": i, "id": attack.get("id"), "keys": missing}
+            )
+    if len(report["missing_keys"]) > 0:
+        return report  # attacks cannot be ordered
+
+    counts = Counter(attack["id"] for attack in attacks)
+    report["duplicate_ids"] = [id for id, count in counts.items() if count > 1]
+
+    order = sorted(range(len(attacks)), key=lambda i: attacks[i]["start"])
+    for i, j in enumerate(order):
+        attack, other = attacks[i], attacks[j]
+        if attack != other:
+            report["unsorted"].append(
+                {
+                    "index": i,
+                    "id": attack["id"],
+                    "other_index": j,
+                    "other_id": other["id"],
+                    "relation": "after"
+                    if other["start"] < attack["start"]
+                    else "before",
+                }
+            )
+
+    last = None  # preceding attack ending last
+    for j in order:
+        attack = attacks[j]
+        if last is not None and attack["start"] <= last["end"]:
+            report["overlaps"].append(
+                {
+                    "id": attack["id"],
+                    "start": attack["start"],
+                    "other_id": last["id"],
+                    "end": last["end"],
+                }
+            )
+        if last is None or attack["end"] > last["end"]:
+            last = attack
+
+    return report
+
+
+def fix_attacks(attacks):
+    """Sorts attacks chronologically, drops duplicates, and merges overlapping
+    attacks of the same id. Overlapping attacks of different ids are kept.
+
+    Args:
+        attacks: list of timed attacks
+
+    Returns:
+        the fixed list of attacks
+    """
+
+    fixed = []
+    active = {}  # id -> merged attack ending last
+    for attack in sorted(attacks, key=lambda a: (a["start"], a["end"])):
+        previous = active.get(attack["id"])
+        if previous is not None and attack["start"] <= previous["end"]:
+            previous["end"] = max(previous["end"], attack["end"])
+            continue
+
+        active[attack["id"]] = dict(attack)
+        fixed.append(active[attack["id"]])
+
+    return fixed
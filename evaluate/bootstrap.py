@@ -0,0 +1,373 @@
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import evaluate.settings as settings
+from evaluate.dataset import Dataset
+from evaluate.utils import quiet_metrics
+from metrics.basic_metrics import Confusion
+from metrics.confusion import CONFUSION
+from metrics.intervals import Runs
+from metrics.utils import confusion_metrics, resolve_metrics
+
+# Number of replicates a worker process evaluates at once
+CHUNKSIZE = 8
+
+# Inputs of a worker process, attached once by _init_worker
+_worker = {}
+
+
+class Blocks:
+    """Blocks resampled by the bootstrap, i.e., the runs of messages of an attack
+    scenario and the benign segments in between. A replicate keeps the sequence of
+    attack and benign blocks and draws each block with replacement among the
+    blocks of its kind, such that the number of scenarios remains the same.
+
+    Attributes:
+        first: row of the first message of each block
+        last: row of the last message of each block
+        attack: whether a block is an attack scenario
+        start: timestamp each block starts at (None for untimed datasets)
+        duration: time until the next block starts, the last block lasts until
+            its last message plus the time between the last two messages
+        attacks: indices of the attacks starting within each block
+    """
+
+    def __init__(self, dataset, attacks=None):
+        runs = Runs.of(dataset, "malicious")
+        self.first, self.last = runs.first, runs.last
+        self.attack = runs.value != 0
+        self.attacks = [[] for _ in range(len(self.first))]
+        self.start = self.duration = None
+
+        timestamp = dataset.timestamp
+        if timestamp is None or len(timestamp) == 0:
+            return
+
+        step = timestamp[-1] - timestamp[-2] if len(timestamp) > 1 else 0
+        end = timestamp[-1] + (step if step > 0 else 1)
+        self.start = timestamp[self.first]
+        self.duration = np.append(timestamp[self.first[1:]], end) - self.start
+
+        # Attacks move along with the block their start falls into
+        for i, attack in enumerate(attacks or []):
+            row = np.searchsorted(timestamp, attack["start"], side="left")
+            row = min(row, len(timestamp) - 1)
+            self.attacks[np.searchsorted(self.first, row, side="right") - 1].append(i)
+
+    def __len__(self):
+        return len(self.first)
+
+    def weights(self, replicates, rng):
+        """Number of times each block is drawn per replicate, multinomial among the
+        blocks of the same kind
+
+        Args:
+            replicates: number of replicates
+            rng: numpy Generator
+
+        Returns:
+            (replicates, blocks) int64 array
+        """
+
+        weights = np.zeros((replicates, len(self)), dtype=np.int64)
+        for kind in [False, True]:
+            members = np.flatnonzero(self.attack == kind)
+            if len(members) > 0:
+                weights[:, members] = rng.multinomial(
+                    len(members), np.full(len(members), 1 / len(members)), replicates
+                )
+        return weights
+
+    def order(self, weights, rng):
+        """Random sequence of the drawn blocks of a replicate
+
+        Args:
+            weights: number of times each block is drawn
+            rng: numpy Generator
+
+        Returns:
+            array of the block at each position of the replicate
+        """
+
+        order = np.empty(len(self), dtype=np.int64)
+        for kind in [False, True]:
+            members = np.flatnonzero(self.attack == kind)
+            order[members] = rng.permutation(np.repeat(members, weights[members]))
+        return order
+
+    def counts(self, truth, predicted):
+        """Confusion matrix of each block
+
+        Args:
+            truth: label array of the ground truth
+            predicted: label array of the IDS classification
+
+        Returns:
+            (blocks, 4) int64 array, one [tn, fp, fn, tp] row per block
+        """
+
+        block = np.repeat(np.arange(len(self)), self.last - self.first + 1)
+        category = 2 * (np.asarray(truth) != 0) + (np.asarray(predicted) != 0)
+        counts = np.bincount(4 * block + category, minlength=4 * len(self))
+        return counts.reshape(len(self), 4).astype(np.int64)
+
+    def resample(self, dataset, attacks, order):
+        """Materializes a replicate. Blocks are laid out one after another in time.
+        Repeated attack scenarios are told apart by suffixing their label and the
+        ids of their attacks with '#2', '#3', ... for the second, third, ... copy.
+
+        Args:
+            dataset: the Dataset
+            attacks: the attacks or None
+            order: block at each position of the replicate (see order)
+
+        Returns:
+            (dataset, attacks) of the replicate
+        """
+
+        length = (self.last - self.first + 1)[order]
+        offset = np.cumsum(length) - length
+        rows = np.repeat(self.first[order] - offset, length) + np.arange(length.sum())
+
+        # Occurrence of each block up to its position
+        by_block = np.argsort(order, kind="stable")
+        occurrence = np.empty(len(order), dtype=np.int64)
+        group = np.searchsorted(order[by_block], order[by_block], side="left")
+        occurrence[by_block] = np.arange(len(order)) - group
+
+        scenarios = list(dataset.scenarios)
+        codes = dataset.malicious[self.first[order]].copy()
+        relabeled = {}
+        for p in np.flatnonzero((occurrence > 0) & (codes != 0)).tolist():
+            key = (codes[p], occurrence[p])
+            if key not in relabeled:
+                relabeled[key] = len(scenarios)
+                scenarios.append("{}#{}".format(scenarios[key[0]], key[1] + 1))
+            codes[p] = relabeled[key]
+
+        timestamp = None
+        if self.start is not None:
+            duration = self.duration[order]
+            shift = dataset.timestamp[0] + np.cumsum(duration) - duration
+            shift -= self.start[order]
+            timestamp = dataset.timestamp[rows] + np.repeat(shift, length)
+
+            resampled = []
+            for p, (block, shift) in enumerate(zip(order.tolist(), shift.tolist())):
+                for i in self.attacks[block]:
+                    attack = dict(attacks[i])
+                    attack["start"] += shift
+                    attack["end"] += shift
+                    if occurrence[p] > 0:
+                        attack["id"] = "{}#{}".format(attack["id"], occurrence[p] + 1)
+                        attack.pop("ipalid", None)
+                    resampled.append(attack)
+            attacks = resampled if attacks is not None else None
+
+        replicate = Dataset(
+            timestamp=timestamp,
+            ids=dataset.ids[rows],
+            malicious=np.repeat(codes, length).astype(dataset.malicious.dtype),
+            scenarios=scenarios,
+            id=dataset.id[rows] if dataset.id is not None else None,
+        )
+        return replicate, attacks
+
+
+def _scalars(ergs):
+    # Numeric outputs (e.g., not the list of detected scenarios)
+    return {
+        name: value
+        for name, value in ergs.items()
+        if isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+    }
+
+
+def _point_replicates(confusion):
+    # Metrics derived from the confusion matrix of each replicate
+    derived = confusion_metrics()
+    replicates = []
+
+    with quiet_metrics():
+        for counts in confusion.tolist():
+            ergs = dict(zip(CONFUSION, counts))
+            for metric in derived:
+                try:
+                    ergs.update(metric.calculate(ergs=ergs))
+                except Exception:
+                    settings.logger.debug(traceback.format_exc())
+                    ergs.update({name: None for name in metric.defines()})
+            replicates.append(ergs)
+
+    return replicates
+
+
+def _init_worker(config, spec, scenarios, attacks, metrics):
+    from evaluate.parallel import SharedArrays
+
+    for key, value in config.items():
+        setattr(settings, key, value)
+
+    arrays, blocks = SharedArrays.attach(spec)
+    dataset = Dataset(
+        timestamp=arrays["timestamp"],
+        ids=arrays["ids"],
+        malicious=arrays["malicious"],
+        scenarios=scenarios,
+        id=arrays["id"],
+    )
+    _worker.update(
+        dataset=dataset,
+        blocks=Blocks(dataset, attacks),
+        attacks=attacks,
+        metrics=metrics,
+        shared=blocks,
+    )
+
+
+def _evaluate_replicates(replicates, weights, points):
+    # Evaluates the metrics not derived from the confusion matrix on materialized
+    # replicates, given the results derived from their confusion matrices
+    from evaluate.utils import parse_ipal_input
+
+    blocks, dataset, attacks = _worker["blocks"], _worker["dataset"], _worker["attacks"]
+    results = []
+
+    with quiet_metrics():
+        for replicate, weight, ergs in zip(replicates, weights, points):
+            rng = np.random.default_rng([settings.bootstrap_seed, replicate])
+            view, view_attacks = blocks.resample(
+                dataset, attacks, blocks.order(weight, rng)
+            )
+            truth, predicted = parse_ipal_input(view)
+
+            ergs = dict(ergs)
+            for metric in _worker["metrics"]:
+                if not metric.check_requirements(
+                    ergs, view_attacks, settings.timed_dataset
+                ):
+                    ergs.update({name: None for name in metric.defines()})
+                    continue
+
+                try:
+                    ergs.update(
+                        metric.calculate(truth, predicted, view, view_attacks, ergs)
+                    )
+                except Exception:
+                    settings.logger.debug(traceback.format_exc())
+                    ergs.update({name: None for name in metric.defines()})
+            results.append(_scalars(ergs))
+
+    return results
+
+
+def _intervals(estimates, replicates, confidence):
+    # Percentile intervals of all numeric estimates, None if no replicate has a value
+    alpha = 100 * (1 - confidence) / 2
+    intervals = {}
+
+    for name in estimates:
+        values = np.array(
+            [np.nan if r.get(name) is None else r[name] for r in replicates],
+            dtype=np.float64,
+        )
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            intervals[name] = None
+        else:
+            intervals[name] = np.percentile(values, [alpha, 100 - alpha]).tolist()
+
+    return intervals
+
+
+def bootstrap(dataset, truth, predicted, attacks, ergs, replicates, jobs=1):
+    """Confidence intervals of all metrics by a stratified block bootstrap over
+    the attack scenarios and the benign segments of the dataset
+
+    The confusion matrix of a replicate is the sum of the confusion matrices of
+    its blocks weighted by how often they are drawn, such that the point-based
+    metrics of all replicates derive from a single matrix product. The remaining
+    metrics are evaluated on materialized replicates, in parallel if jobs > 1.
+
+    Args:
+        dataset: the Dataset
+        truth: label array of the ground truth
+        predicted: label array of the IDS classification
+        attacks: the attacks or None
+        ergs: the evaluation of the dataset, intervals are estimated for all of
+            its numeric outputs
+        replicates: number of bootstrap replicates
+        jobs: number of processes evaluating replicates in parallel
+
+    Returns:
+        dict of the number of replicates, the confidence level, and the [low,
+        high] interval of each output (None if no replicate yields a value)
+    """
+
+    blocks = Blocks(dataset, attacks)
+    rng = np.random.default_rng(settings.bootstrap_seed)
+    weights = blocks.weights(replicates, rng)
+    points = _point_replicates(weights @ blocks.counts(truth, predicted))
+
+    # Metrics requiring the materialized replicates
+    point_metrics = set([Confusion] + confusion_metrics())
+    metrics = [
+        m for m in resolve_metrics(settings.metrics)[0] if m not in point_metrics
+    ]
+
+    if len(metrics) == 0 or len(blocks) == 0:
+        results = [_scalars(point) for point in points]
+    elif jobs > 1:
+        from evaluate.parallel import SharedArrays, _forwarded_settings
+
+        shared = SharedArrays(
+            {
+                "timestamp": dataset.timestamp,
+                "ids": dataset.ids,
+                "malicious": dataset.malicious,
+                "id": dataset.id,
+            }
+        )
+        chunks = [
+            range(i, min(i + CHUNKSIZE, replicates))
+            for i in range(0, replicates, CHUNKSIZE)
+        ]
+        try:
+            with ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_worker,
+                initargs=(
+                    _forwarded_settings(),
+                    shared.spec,
+                    dataset.scenarios,
+                    attacks,
+                    metrics,
+                ),
+            ) as pool:
+                futures = [
+                    pool.submit(
+                        _evaluate_replicates,
+                        list(chunk),
+                        weights[chunk.start : chunk.stop],
+                        points[chunk.start : chunk.stop],
+                    )
+                    for chunk in chunks
+                ]
+                results = [r for future in futures for r in future.result()]
+        finally:
+            shared.close()
+    else:
+        _worker.update(dataset=dataset, blocks=blocks, attacks=attacks, metrics=metrics)
+        try:
+            results = _evaluate_replicates(range(replicates), weights, points)
+        finally:
+            _worker.clear()
+
+    confidence = settings.bootstrap_confidence
+    return {
+        "replicates": replicates,
+        "confidence": confidence,
+        "intervals": _intervals(_scalars(ergs), results, confidence),
+    }
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import evaluate.settings as settings
+from evaluate.dataset import Dataset
+from evaluate.ingest import load_file
+
+# Increase whenever the layout of the cache or the parsed columns change
+CACHE_VERSION = 1
+
+# Columns of the Dataset stored as .npy files
+COLUMNS = ["timestamp", "ids", "malicious", "id"]
+
+
+def cache_path(filename):
+    # Directory caching the columns of an input, placed next to it
+    return filename + ".cache"
+
+
+def content_hash(filename, blocksize=1 << 20):
+    """SHA-256 of a file's (compressed) content
+
+    Args:
+        filename: path of the file
+        blocksize: number of bytes hashed at once
+
+    Returns:
+        hex digest
+    """
+
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(blocksize), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fingerprint(filename):
+    stat = os.stat(filename)
+    return {
+        "path": os.path.abspath(filename),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+    }
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(directory, meta):
+    # Atomically, since a complete meta.json marks a valid cache
+    path = os.path.join(directory, "meta.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+
+def _is_valid(filename, meta, alerts, scores):
+    if meta is None or meta.get("version") != CACHE_VERSION:
+        return False
+    if (alerts and meta["alerts"] is None) or (scores and meta["scores"] is None):
+        return False  # cached without the required per-IDS columns
+
+    fingerprint = _fingerprint(filename)
+    if all(meta[key] == value for key, value in fingerprint.items()):
+        return True
+
+    # Touched, copied, or moved, yet possibly unchanged
+    if meta["size"] != fingerprint["size"] or meta["hash"] != content_hash(filename):
+        return False
+
+    meta.update(fingerprint)
+    try:
+        _write_meta(cache_path(filename), meta)
+    except OSError:
+        pass
+    return True
+
+
+def read_cache(filename, alerts=False, scores=False):
+    """Loads the cached columns of an input memory-mapped
+
+    The cache is valid if the input's path, size, and modification time are
+    unchanged. Otherwise, the content hash decides.
+
+    Args:
+        filename: path of the input file
+        alerts: whether the 'alerts' of individual IDSs are required
+        scores: whether the 'scores' of individual IDSs are required
+
+    Returns:
+        the Dataset or None if there is no valid cache
+    """
+
+    directory = cache_path(filename)
+    meta = _read_meta(directory)
+    if not _is_valid(filename, meta, alerts, scores):
+        return None
+
+    def column(name):
+        return np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+
+    dataset = Dataset(
+        timestamp=column("timestamp") if "timestamp" in meta["columns"] else None,
+        ids=column("ids"),
+        malicious=column("malicious"),
+        scenarios=meta["scenarios"],
+        id=column("id") if "id" in meta["columns"] else None,
+    )
+    if alerts:
+        dataset.alerts = {
+            name: column(f"alerts-{i}") for i, name in enumerate(meta["alerts"])
+        }
+    if scores:
+        dataset.scores = {
+            name: column(f"scores-{i}") for i, name in enumerate(meta["scores"])
+        }
+    dataset.configs = meta["configs"]
+    return dataset
+
+
+def write_cache(filename, dataset, alerts=False, scores=False):
+    """Stores the columns of a parsed input next to it
+
+    Args:
+        filename: path of the input file
+        dataset: the Dataset parsed from the input
+        alerts: whether the dataset was loaded with the 'alerts' of individual IDSs
+        scores: whether the dataset was loaded with the 'scores' of individual IDSs
+
+    Returns:
+        True if the cache was written
+    """
+
+    arrays = {key: getattr(dataset, key) for key in COLUMNS}
+    arrays = {key: value for key, value in arrays.items() if value is not None}
+    for per_ids, enabled, values in [
+        ("alerts", alerts, dataset.alerts),
+        ("scores", scores, dataset.scores),
+    ]:
+        if enabled:
+            arrays.update(
+                {f"{per_ids}-{i}": value for i, value in enumerate(values.values())}
+            )
+
+    # Labels and configs are stored as JSON and have to survive the round trip
+    try:
+        meta = json.loads(
+            json.dumps({"scenarios": dataset.scenarios, "configs": dataset.configs})
+        )
+    except (TypeError, ValueError):
+        meta = None
+    if (
+        meta is None
+        or [(type(s), s) for s in meta["scenarios"]]
+        != [(type(s), s) for s in dataset.scenarios]
+        or any(value.dtype.hasobject for value in arrays.values())
+    ):
+        settings.logger.info("Input {} cannot be cached".format(filename))
+        return False
+
+    meta.update(
+        version=CACHE_VERSION,
+        columns=[key for key in COLUMNS if key in arrays],
+        alerts=list(dataset.alerts) if alerts else None,
+        scores=list(dataset.scores) if scores else None,
+        hash=content_hash(filename),
+        **_fingerprint(filename),
+    )
+
+    # Only replace caches, never other files or directories of the same name
+    directory = cache_path(filename)
+    if os.path.lexists(directory):
+        existing = _read_meta(directory)
+        if existing is None or existing.get("version") != CACHE_VERSION:
+            settings.logger.warning(
+                "Not caching {}, {} is no cache".format(filename, directory)
+            )
+            return False
+
+    # Written next to the cache and moved into place, such that readers (e.g., a
+    # concurrent run) never see a partial cache
+    tmp = stale = None
+    try:
+        tmp = tempfile.mkdtemp(
+            prefix=".{}-".format(os.path.basename(directory)),
+            dir=os.path.dirname(os.path.abspath(directory)),
+        )
+        for name, value in arrays.items():
+            np.save(os.path.join(tmp, name + ".npy"), value)
+        _write_meta(tmp, meta)
+
+        if os.path.lexists(directory):
+            try:
+                os.rename(directory, tmp + "-stale")
+                stale = tmp + "-stale"
+            except FileNotFoundError:  # replaced by a concurrent run
+                pass
+        os.replace(tmp, directory)
+    except OSError as e:
+        settings.logger.warning("Failed writing cache {}: {}".format(directory, e))
+        return False
+    finally:
+        for path in [tmp, stale]:
+            if path is not None:
+                shutil.rmtree(path, ignore_errors=True)
+
+    return True
+
+
+def load_cached(filename, alerts=False, scores=False, backend="auto", jobs=1):
+    """Loads an input from its cache, or parses and caches it
+
+    Args:
+        filename: path of the input file
+        alerts: whether to keep the 'alerts' of individual IDSs
+        scores: whether to keep the 'scores' of individual IDSs
+        backend: JSON backend parsing the input (see evaluate.decoder)
+        jobs: number of worker processes parsing the input
+
+    Returns:
+        the Dataset
+    """
+
+    dataset = read_cache(filename, alerts, scores)
+    if dataset is not None:
+        settings.logger.info("Loaded cached columns of {}".format(filename))
+        return dataset
+
+    # Keep per-IDS columns that are cached already for later runs
+    meta = _read_meta(cache_path(filename)) or {}
+    alerts = alerts or meta.get("alerts") is not None
+    scores = scores or meta.get("scores") is not None
+
+    dataset = load_file(filename, alerts, scores, backend, jobs)
+    if write_cache(filename, dataset, alerts, scores):
+        settings.logger.info("Cached columns of {}".format(filename))
+    return dataset
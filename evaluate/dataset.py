@@ -0,0 +1,465 @@
+import time
+from itertools import islice
+
+import numpy as np
+
+import evaluate.settings as settings
+from evaluate.decoder import get_decoder, get_projection
+
+# Keys of an IPAL message required for the evaluation
+REQUIRED_KEYS = ["id", "timestamp", "malicious", "ids"]
+
+# Number of lines parsed at once when streaming a file into columns
+CHUNKSIZE = 100000
+
+
+class Dataset:
+    """Column store of the IPAL messages required for the evaluation
+
+    Instead of keeping a dict per IPAL message, the relevant fields are stored as
+    compact NumPy columns:
+
+        timestamp: int64/float64 timestamps (None if not every message is timed)
+        ids: boolean classification of the IDS
+        malicious: int32 label codes, 0 is benign and any other code indexes
+            the scenario lookup table
+        scenarios: lookup table from label codes to the original malicious label
+        id: IPAL ids of the messages (None if not provided)
+        alerts: boolean classification of each individual IDS of a combined
+            ipal-iids output by IDS name (empty unless loaded with alerts=True)
+        scores: float64 scores of each individual IDS by IDS name, NaN if not
+            reported (empty unless loaded with scores=True)
+    """
+
+    def __init__(
+        self, timestamp=None, ids=None, malicious=None, scenarios=None, id=None
+    ):
+        self.timestamp = timestamp
+        self.ids = ids if ids is not None else np.zeros(0, dtype=np.bool_)
+        self.malicious = (
+            malicious if malicious is not None else np.zeros(len(self.ids), np.int32)
+        )
+        self.scenarios = scenarios if scenarios is not None else [False]
+        self.id = id
+        self.alerts = {}
+        self.scores = {}
+        self.configs = {}
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def is_malicious(self):
+        # Boolean ground truth of each message
+        return self.malicious != 0
+
+    def with_ids(self, ids):
+        """Creates a view of the dataset with another IDS classification, e.g., of
+        an individual IDS, that shares all other columns
+
+        Args:
+            ids: boolean classification of the IDS
+
+        Returns:
+            the Dataset
+        """
+
+        return Dataset(
+            timestamp=self.timestamp,
+            ids=ids,
+            malicious=self.malicious,
+            scenarios=self.scenarios,
+            id=self.id,
+        )
+
+    def segment(self, first, stop):
+        """Creates a view of the consecutive rows first to stop - 1
+
+        Args:
+            first: first row of the segment
+            stop: row after the last row of the segment
+
+        Returns:
+            the Dataset
+        """
+
+        return Dataset(
+            timestamp=(
+                self.timestamp[first:stop] if self.timestamp is not None else None
+            ),
+            ids=self.ids[first:stop],
+            malicious=self.malicious[first:stop],
+            scenarios=self.scenarios,
+            id=self.id[first:stop] if self.id is not None else None,
+        )
+
+    def share_columns(self, other):
+        """Deduplicates columns with another dataset of the same recording. If the
+        timestamps and ground truth are identical, the columns of the other dataset
+        are used instead, e.g., when evaluating many IDSs on the same dataset.
+
+        Args:
+            other: another Dataset
+
+        Returns:
+            True if the columns are shared now
+        """
+
+        def same(a, b):
+            if a is None or b is None:
+                return a is b
+            return a is b or np.array_equal(a, b)
+
+        if (
+            len(self) != len(other)
+            or [(type(s), s) for s in self.scenarios]
+            != [(type(s), s) for s in other.scenarios]
+            or not same(self.malicious, other.malicious)
+            or not same(self.timestamp, other.timestamp)
+        ):
+            return False
+
+        self.timestamp = other.timestamp
+        self.malicious = other.malicious
+        self.scenarios = other.scenarios
+        return True
+
+    def cached(self, key, compute):
+        """Derived views of the dataset (e.g., alarm intervals) are computed once
+        and shared by all metrics
+
+        Args:
+            key: name of the view
+            compute: function computing the view from the dataset
+
+        Returns:
+            the (cached) view
+        """
+
+        if key not in self._cache:
+            self._cache[key] = compute(self)
+        return self._cache[key]
+
+    def first_unordered(self):
+        """Index of the first message with a timestamp before the timestamp of its
+        preceding message
+
+        Returns:
+            the index or None if the dataset is ordered by timestamp (or untimed)
+        """
+
+        if self.timestamp is None or len(self.timestamp) < 2:
+            return None
+
+        unordered = self.timestamp[1:] < self.timestamp[:-1]
+        index = int(np.argmax(unordered))
+        return index + 1 if unordered[index] else None
+
+    def sort(self):
+        """Stably sorts the messages by timestamp in place. All columns, including
+        the ones of individual IDSs, are permuted alike and derived views dropped.
+
+        Returns:
+            the permutation applied to the messages
+        """
+
+        order = np.argsort(self.timestamp, kind="stable")
+
+        for key in ["timestamp", "ids", "malicious", "id"]:
+            column = getattr(self, key)
+            if column is not None:
+                setattr(self, key, column[order])
+        for field in [self.alerts, self.scores]:
+            for name, column in field.items():
+                field[name] = column[order]
+
+        self._cache = {}
+        return order
+
+    @classmethod
+    def from_messages(cls, messages, alerts=False, scores=False):
+        """Builds the column store from a list of IPAL messages
+
+        Args:
+            messages: iterable of IPAL messages (dicts)
+            alerts: whether to keep the 'alerts' of individual IDSs
+            scores: whether to keep the 'scores' of individual IDSs
+
+        Returns:
+            the Dataset
+        """
+
+        builder = _ColumnBuilder(alerts, scores)
+        for js in messages:
+            builder.append(js)
+        return builder.build()
+
+    @classmethod
+    def from_lines(cls, lines, alerts=False, scores=False, backend="auto"):
+        """Builds the column store from JSON encoded IPAL messages, e.g., a chunk
+        of a file parsed by a worker process
+
+        Args:
+            lines: iterable of JSON encoded IPAL messages (str or bytes)
+            alerts: whether to keep the 'alerts' of individual IDSs
+            scores: whether to keep the 'scores' of individual IDSs
+            backend: JSON backend (see evaluate.decoder)
+
+        Returns:
+            the Dataset
+        """
+
+        if not alerts and not scores:
+            _, decode = get_projection(REQUIRED_KEYS, backend)
+        else:
+            _, decode = get_decoder(backend)
+
+        builder = _ColumnBuilder(alerts, scores)
+        for line in lines:
+            builder.append(decode(line))
+        return builder.build()
+
+    @classmethod
+    def load(cls, fd, chunksize=CHUNKSIZE, alerts=False, scores=False, backend="auto"):
+        """Streams a file of IPAL messages into the column store
+
+        The file is parsed in chunks of lines such that only the compact columns,
+        but never all messages, are kept in memory. Keys of the first message
+        starting with an underscore (e.g., transcriber or ipal-iids configs) are
+        forwarded in the `configs` attribute. Unless alerts or scores are kept,
+        only the required keys are decoded if the JSON backend supports it.
+
+        Args:
+            fd: file-like object with one JSON encoded IPAL message per line
+            chunksize: number of lines parsed at once
+            alerts: whether to keep the 'alerts' of individual IDSs
+            scores: whether to keep the 'scores' of individual IDSs
+            backend: JSON backend (see evaluate.decoder)
+
+        Returns:
+            the Dataset
+        """
+
+        name, decode = get_decoder(backend)
+        if not alerts and not scores:
+            name, project = get_projection(REQUIRED_KEYS, backend)
+        else:
+            project = decode
+
+        builder = _ColumnBuilder(alerts, scores)
+        configs = None
+        count = 0
+        start = time.perf_counter()
+
+        while True:
+            lines = list(islice(fd, chunksize))
+            if len(lines) == 0:
+                break
+
+            if configs is None:  # Forward transcriber/ipal_iids parameters
+                js = decode(lines[0])
+                configs = {k: v for k, v in js.items() if k.startswith("_")}
+
+            for line in lines:
+                builder.append(project(line))
+            builder.flush()
+            count += len(lines)
+
+        elapsed = time.perf_counter() - start
+        settings.logger.info(
+            "Parsed {} lines in {:.2f}s ({:.0f} lines/s, {} backend)".format(
+                count, elapsed, count / elapsed if elapsed > 0 else 0, name
+            )
+        )
+
+        dataset = builder.build()
+        dataset.configs = configs or {}
+        return dataset
+
+    @classmethod
+    def concatenate(cls, parts):
+        """Concatenates the datasets of consecutive parts of a file, e.g., parsed
+        in parallel, into the dataset of the whole file
+
+        Label codes are remapped such that scenarios are numbered in the order of
+        their first appearance, and individual IDSs missing in some parts are
+        filled as not reported, i.e., the result equals loading the whole file.
+
+        Args:
+            parts: list of Datasets in the order of the file
+
+        Returns:
+            the Dataset (configs of the first part)
+        """
+
+        if len(parts) == 0:
+            return _ColumnBuilder().build()
+
+        codes = {}  # (type, label) -> label code
+        scenarios = [False]
+        malicious = []
+        for part in parts:
+            mapping = np.zeros(len(part.scenarios), dtype=np.int32)
+            for i, label in enumerate(part.scenarios[1:], start=1):
+                key = (type(label), label)
+                if key not in codes:
+                    codes[key] = len(scenarios)
+                    scenarios.append(label)
+                mapping[i] = codes[key]
+            malicious.append(mapping[part.malicious])
+
+        def column(key):
+            values = [getattr(part, key) for part in parts]
+            return None if any(v is None for v in values) else np.concatenate(values)
+
+        dataset = Dataset(
+            timestamp=column("timestamp"),
+            ids=column("ids"),
+            malicious=np.concatenate(malicious),
+            scenarios=scenarios,
+            id=column("id"),
+        )
+
+        for field, dtype, fill in [
+            ("alerts", np.bool_, False),
+            ("scores", np.float64, np.nan),
+        ]:
+            columns = [getattr(part, field) for part in parts]
+            names = {}  # keeps the order of first appearance
+            for part_columns in columns:
+                names.update(dict.fromkeys(part_columns))
+
+            merged = {}
+            for name in names:
+                merged[name] = np.concatenate(
+                    [
+                        c[name] if name in c else np.full(len(part), fill, dtype)
+                        for part, c in zip(parts, columns)
+                    ]
+                )
+            setattr(dataset, field, merged)
+
+        dataset.configs = parts[0].configs
+        return dataset
+
+
+class _PerIdsColumns:
+    # Collects a field of individual IDS results (e.g., 'alerts') into columns
+
+    def __init__(self, field, dtype, fill):
+        self.field = field
+        self.dtype = dtype
+        self.fill = fill  # value of IDSs that did not report
+        self.chunks = {}  # IDS name -> list of arrays
+        self.rows = 0  # number of flushed rows
+        self.values = {}  # IDS name -> values of the current chunk
+
+    def append(self, js, row):
+        # row is the index of the message within the current chunk
+        values = js.get(self.field) or {}
+
+        for name in values:
+            if name not in self.chunks:  # IDS not seen before
+                self.chunks[name] = [np.full(self.rows, self.fill, dtype=self.dtype)]
+                self.values[name] = [self.fill] * row
+
+        for name, column in self.values.items():
+            value = values.get(name)
+            column.append(self.fill if value is None else value)
+
+    def flush(self, rows):
+        self.rows += rows
+        for name, column in self.values.items():
+            self.chunks[name].append(np.array(column, dtype=self.dtype))
+            self.values[name] = []
+
+    def build(self):
+        return {name: np.concatenate(chunks) for name, chunks in self.chunks.items()}
+
+
+class _ColumnBuilder:
+    # Collects IPAL messages into chunks of NumPy columns
+
+    def __init__(self, alerts=False, scores=False):
+        self.codes = {}  # (type, label) -> label code
+        self.scenarios = [False]
+        self.chunks = {key: [] for key in REQUIRED_KEYS}
+        self.has_key = {"timestamp": True, "id": True}
+        self.alerts = _PerIdsColumns("alerts", np.bool_, False) if alerts else None
+        self.scores = _PerIdsColumns("scores", np.float64, np.nan) if scores else None
+        self._reset()
+
+    def _reset(self):
+        self.timestamp = []
+        self.ids = []
+        self.malicious = []
+        self.id = []
+
+    def _encode(self, label):
+        if not label:
+            return 0
+
+        # Distinguish labels by type, e.g., True and 1 are separate scenarios
+        key = (type(label), label)
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.scenarios)
+            self.scenarios.append(label)
+        return code
+
+    def append(self, js):
+        for per_ids in [self.alerts, self.scores]:
+            if per_ids is not None:
+                per_ids.append(js, len(self.ids))
+
+        self.ids.append(bool(js["ids"]))
+        self.malicious.append(self._encode(js["malicious"]))
+
+        if self.has_key["timestamp"]:
+            if "timestamp" in js:
+                self.timestamp.append(js["timestamp"])
+            else:
+                self.has_key["timestamp"] = False
+
+        if self.has_key["id"]:
+            if "id" in js:
+                self.id.append(js["id"])
+            else:
+                self.has_key["id"] = False
+
+    def flush(self):
+        for per_ids in [self.alerts, self.scores]:
+            if per_ids is not None:
+                per_ids.flush(len(self.ids))
+        self.chunks["ids"].append(np.array(self.ids, dtype=np.bool_))
+        self.chunks["malicious"].append(np.array(self.malicious, dtype=np.int32))
+        if self.has_key["timestamp"]:
+            self.chunks["timestamp"].append(np.array(self.timestamp))
+        if self.has_key["id"]:
+            self.chunks["id"].append(np.array(self.id))
+        self._reset()
+
+    def _column(self, key, dtype=None):
+        if key in self.has_key and not self.has_key[key]:
+            return None
+        if len(self.chunks[key]) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.concatenate(self.chunks[key])
+
+    def build(self):
+        if len(self.ids) > 0:
+            self.flush()
+
+        dataset = Dataset(
+            timestamp=self._column("timestamp", np.int64),
+            ids=self._column("ids", np.bool_),
+            malicious=self._column("malicious", np.int32),
+            scenarios=self.scenarios,
+            id=self._column("id", np.int64),
+        )
+        if self.alerts is not None:
+            dataset.alerts = self.alerts.build()
+        if self.scores is not None:
+            dataset.scores = self.scores.build()
+        self.chunks = {key: [] for key in REQUIRED_KEYS}
+        return dataset
@@ -0,0 +1,102 @@
+import json
+
+# Optional faster JSON libraries, the standard library is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+# Backends in order of preference for decoding complete messages
+BACKENDS = ["orjson", "simdjson", "json"]
+
+
+def available_backends():
+    # Installed backends in order of preference
+    installed = {"orjson": orjson, "simdjson": simdjson, "json": json}
+    return [name for name in BACKENDS if installed[name] is not None]
+
+
+def _resolve(backend):
+    if backend == "auto":
+        return available_backends()[0]
+    if backend not in BACKENDS:
+        raise ValueError(
+            "JSON backend '{}' not found, use any of {} instead".format(
+                backend, ", ".join(["'auto'"] + [f"'{b}'" for b in BACKENDS])
+            )
+        )
+    if backend not in available_backends():
+        raise ValueError("JSON backend '{}' is not installed".format(backend))
+    return backend
+
+
+def get_decoder(backend="auto"):
+    """Function decoding a JSON encoded line (str or bytes) into Python objects
+
+    Args:
+        backend: 'json', 'orjson', 'simdjson', or 'auto' for the fastest
+            installed backend
+
+    Returns:
+        (name of the backend, decoding function)
+    """
+
+    backend = _resolve(backend)
+
+    if backend == "orjson":
+        return backend, orjson.loads
+
+    if backend == "simdjson":
+        parser = simdjson.Parser()
+
+        def decode(line):
+            return parser.parse(line, True)  # recursive, i.e., plain Python objects
+
+        return backend, decode
+
+    return backend, json.loads
+
+
+def get_projection(keys, backend="auto"):
+    """Function decoding only some top-level keys of a JSON encoded line
+
+    simdjson parses lazily such that nested objects of other keys (e.g., 'state'
+    or 'scores') are never materialized. Other backends decode the complete line.
+
+    Args:
+        keys: top-level keys to extract
+        backend: 'json', 'orjson', 'simdjson', or 'auto' for the fastest
+            installed backend for projections
+
+    Returns:
+        (name of the backend, decoding function), the function returns a dict
+        containing at least the keys present in the line
+    """
+
+    if backend == "auto" and simdjson is not None:
+        backend = "simdjson"
+    backend = _resolve(backend)
+
+    if backend != "simdjson":
+        return get_decoder(backend)
+
+    parser = simdjson.Parser()
+
+    def project(line):
+        document = parser.parse(line)
+        values = {key: document[key] for key in keys if key in document}
+
+        # Nested values must not outlive the parsed document
+        if any(
+            isinstance(v, (simdjson.Object, simdjson.Array)) for v in values.values()
+        ):
+            del values, document
+            return parser.parse(line, True)
+        return values
+
+    return backend, project
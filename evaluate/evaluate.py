@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
 import argparse
+import csv
+import glob
 import gzip
 import json
 import logging
+import os
 import sys
 import traceback
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import evaluate.settings as settings
-from evaluate.utils import parse_ipal_input
-from metrics.utils import get_all_metrics
+from evaluate.attacks import fix_attacks, validate_attacks
+from evaluate.decoder import BACKENDS, get_decoder
 
-REQUIRED_KEYS = ["id", "timestamp", "malicious", "ids"]
+# NumPy, the metrics, and the evaluation modes are imported by the functions using
+# them, such that, e.g., '--version' or invalid options return instantly
 
 
 # Wrapper for hiding .gz files
@@ -49,8 +53,8 @@ def prepare_arg_parser(parser):
     parser.add_argument(
         "input",
         metavar="FILE",
-        nargs=1,
-        help="input file of IPAL messages to evaluate ('-' stdin, '*.gz' compressed) (Default: '-')",
+        nargs="+",
+        help="input file of IPAL messages to evaluate ('-' stdin, '*.gz' compressed). Multiple files or glob patterns are evaluated in batch against the same attacks (Default: '-')",
         default="-",
     )
 
@@ -62,6 +66,37 @@ def prepare_arg_parser(parser):
         default="-",
         required=False,
     )
+    parser.add_argument(
+        "--output-dir",
+        dest="output_dir",
+        metavar="DIR",
+        help="batch mode: write one evaluation file per input to this directory instead of a combined output (Default: None)",
+        required=False,
+    )
+    parser.add_argument(
+        "--table",
+        dest="table",
+        action="store_true",
+        help="batch mode: write the combined output as CSV table with one row per input instead of JSON (Default: False)",
+        required=False,
+    )
+    parser.add_argument(
+        "--cache",
+        dest="cache",
+        action="store_true",
+        help="cache the parsed columns of each input file next to it ('<input>.cache') and load them memory-mapped on later runs. The cache is invalidated when the input changes (Default: False)",
+        required=False,
+    )
+    parser.add_argument(
+        "--json-backend",
+        dest="json_backend",
+        metavar="STR",
+        default="auto",
+        help="library decoding the IPAL messages ({}), 'auto' uses the fastest installed one (Default: auto)".format(
+            ", ".join(["auto"] + BACKENDS)
+        ),
+        required=False,
+    )
     parser.add_argument(
         "--attacks",
         dest="attacks",
@@ -69,6 +104,13 @@ def prepare_arg_parser(parser):
         help="JSON file containing the attacks from the used dataset ('*.gz' compress) (Default: None)",
         required=False,
     )
+    parser.add_argument(
+        "--fix-attacks",
+        dest="fix_attacks",
+        metavar="FILE",
+        help="sort the attacks chronologically, drop duplicates, merge overlapping attacks of the same id, write them to FILE, and evaluate with them (Default: None)",
+        required=False,
+    )
     parser.add_argument(
         "--timed-dataset",
         dest="timed",
@@ -77,6 +119,98 @@ def prepare_arg_parser(parser):
         default="True",
         required=False,
     )
+    parser.add_argument(
+        "--sort",
+        dest="sort",
+        action="store_true",
+        help="stably sort a timed dataset by timestamp instead of rejecting unordered messages (Default: False)",
+        required=False,
+    )
+    parser.add_argument(
+        "--metrics",
+        dest="metrics",
+        metavar="STR",
+        help="comma-separated list of metrics to evaluate, e.g., 'F1,NAB-score-default'. Metrics these require are evaluated as well (Default: all)",
+        required=False,
+    )
+    parser.add_argument(
+        "--alerts",
+        dest="alerts",
+        action="store_true",
+        help="additionally evaluate the 'alerts' of each individual IDS of a combined ipal-iids output (Default: False)",
+        required=False,
+    )
+    parser.add_argument(
+        "--sweep",
+        dest="sweep",
+        metavar="IDS",
+        help="evaluate all thresholds of the 'scores' of this IDS ('default' for a single IDS) and output metric curves instead (Default: None)",
+        required=False,
+    )
+    parser.add_argument(
+        "--thresholds",
+        dest="thresholds",
+        metavar="INT",
+        help="maximum number of thresholds evaluated by --sweep, evenly picked among the distinct scores (Default: all)",
+        required=False,
+    )
+    parser.add_argument(
+        "--stream",
+        dest="stream",
+        action="store_true",
+        help="evaluate the input message by message (e.g., live ipal-iids output) and write snapshots of the metrics supporting streams as JSON lines (Default: False)",
+        required=False,
+    )
+    parser.add_argument(
+        "--snapshot-every",
+        dest="snapshot_every",
+        metavar="INT",
+        help="--stream: write a snapshot every INT messages (Default: None)",
+        required=False,
+    )
+    parser.add_argument(
+        "--snapshot-interval",
+        dest="snapshot_interval",
+        metavar="FLOAT",
+        help="--stream: write a snapshot at most every FLOAT seconds (Default: None)",
+        required=False,
+    )
+    parser.add_argument(
+        "--window",
+        dest="window",
+        metavar="FLOAT",
+        help="evaluate point-based metrics and alarms per time window of this length (in the unit of the timestamps) and output a time series (Default: None)",
+        required=False,
+    )
+    parser.add_argument(
+        "--stride",
+        dest="stride",
+        metavar="FLOAT",
+        help="--window: time between the starts of consecutive (sliding) windows (Default: window length)",
+        required=False,
+    )
+    parser.add_argument(
+        "--bootstrap",
+        dest="bootstrap",
+        metavar="INT",
+        help="estimate confidence intervals of all metrics from INT bootstrap replicates, which resample the attack scenarios and the benign segments between them (Default: None)",
+        required=False,
+    )
+    parser.add_argument(
+        "--jobs",
+        dest="jobs",
+        metavar="INT",
+        default=1,
+        help="number of processes parsing the input and evaluating independent metrics in parallel (Default: 1)",
+        required=False,
+    )
+    parser.add_argument(
+        "--segments",
+        dest="segments",
+        metavar="INT",
+        help="split the dataset into up to INT segments at benign gaps between attacks, which are evaluated separately (on --jobs processes) and merged (Default: 1)",
+        required=False,
+    )
 
     # Logging
     parser.add_argument(
@@ -111,6 +245,148 @@ def prepare_arg_parser(parser):
     )
 
 
+def load_input_settings(args):
+    # Parse and open input file(s)
+    if args.input:
+        settings.inputs = []
+        for pattern in args.input:
+            matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else []
+            settings.inputs += matches if len(matches) > 0 else [pattern]
+        settings.input = settings.inputs[0]
+
+    if len(settings.inputs) > 1:
+        if "-" in settings.inputs or "stdout" in settings.inputs:
+            settings.logger.error("Cannot read from stdin in batch mode")
+            exit(1)
+        settings.inputfd = None  # opened one after another
+    elif settings.input != "stdout" and settings.input != "-":
+        settings.inputfd = None  # opened once read (see open_input)
+    else:
+        settings.inputfd = sys.stdin
+
+    settings.cache = args.cache
+
+    try:  # Check the JSON backend is available
+        settings.json_backend = args.json_backend
+        get_decoder(settings.json_backend)
+    except ValueError as e:
+        settings.logger.error(str(e))
+        exit(1)
+
+    # Batch output
+    settings.output_dir = args.output_dir
+    settings.table = args.table
+    if settings.output_dir:
+        os.makedirs(settings.output_dir, exist_ok=True)
+
+
+def _number(value):
+    # int if possible, such that integer timestamps yield integer window bounds
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def load_stream_settings(args):
+    # Parse streaming options
+    settings.stream = args.stream
+    if settings.stream and len(settings.inputs) > 1:
+        settings.logger.error("Option '--stream' accepts a single input only")
+        exit(1)
+    if settings.stream and settings.sort:
+        settings.logger.error("Option '--sort' cannot be combined with '--stream'")
+        exit(1)
+    if settings.bootstrap and (settings.stream or settings.sweep or args.window):
+        settings.logger.error(
+            "Option '--bootstrap' cannot be combined with '--stream', '--sweep', or '--window'"
+        )
+        exit(1)
+
+    try:
+        if args.snapshot_every:
+            settings.snapshot_every = int(args.snapshot_every)
+        if args.snapshot_interval:
+            settings.snapshot_interval = float(args.snapshot_interval)
+    except ValueError:
+        settings.logger.error("Invalid '--snapshot-every' or '--snapshot-interval'")
+        exit(1)
+
+    # Parse time windows
+    try:
+        if args.window:
+            settings.window = _number(args.window)
+        if args.stride:
+            settings.stride = _number(args.stride)
+    except ValueError:
+        settings.logger.error("Options '--window' and '--stride' must be numbers")
+        exit(1)
+
+    if (settings.window is not None and settings.window <= 0) or (
+        settings.stride is not None and settings.stride <= 0
+    ):
+        settings.logger.error("Options '--window' and '--stride' must be positive")
+        exit(1)
+
+
+def load_evaluation_settings(args):
+    # Options selecting what and how to evaluate
+    settings.alerts = args.alerts
+    settings.sweep = args.sweep
+    settings.sort = args.sort
+
+    if args.thresholds:
+        try:
+            settings.thresholds = int(args.thresholds)
+        except ValueError:
+            settings.logger.error("Option '--thresholds' must be a positive integer")
+            exit(1)
+
+        if settings.thresholds < 1:
+            settings.logger.error("Option '--thresholds' must be a positive integer")
+            exit(1)
+
+    if args.bootstrap:
+        try:
+            settings.bootstrap = int(args.bootstrap)
+        except ValueError:
+            settings.logger.error("Option '--bootstrap' must be a positive integer")
+            exit(1)
+
+        if settings.bootstrap < 1:
+            settings.logger.error("Option '--bootstrap' must be a positive integer")
+            exit(1)
+
+    # Parse number of parallel jobs
+    if args.jobs:
+        try:
+            settings.jobs = int(args.jobs)
+        except ValueError:
+            settings.logger.error("Option '--jobs' must be a positive integer")
+            exit(1)
+
+        if settings.jobs < 1:
+            settings.logger.error("Option '--jobs' must be a positive integer")
+            exit(1)
+
+    if args.segments:
+        try:
+            settings.segments = int(args.segments)
+        except ValueError:
+            settings.logger.error("Option '--segments' must be a positive integer")
+            exit(1)
+
+        if settings.segments < 1:
+            settings.logger.error("Option '--segments' must be a positive integer")
+            exit(1)
+
+    # Parse metric selection
+    if args.metrics:
+        settings.metrics = [m.strip() for m in args.metrics.split(",") if m.strip()]
+
+    load_stream_settings(args)
+
+
 def load_settings(args):
     # Gzip compress level
     if args.compresslevel:
@@ -128,14 +404,7 @@ def load_settings(args):
             )
             exit(1)
 
-    # Parse and open input file
-    if args.input:
-        settings.input = args.input[0]
-
-    if settings.input != "stdout" and settings.input != "-":
-        settings.inputfd = open_file(settings.input, "r")
-    else:
-        settings.inputfd = sys.stdin
+    load_input_settings(args)
 
     # Parse and open output file
     if args.output:
@@ -151,6 +420,10 @@ def load_settings(args):
     # Parse attacks
     if args.attacks:
         settings.attacks = args.attacks
+    settings.fix_attacks = args.fix_attacks
+    if settings.fix_attacks and not args.attacks:
+        settings.logger.error("Option '--fix-attacks' requires '--attacks'")
+        sys.exit(1)
 
     # Parse timed
     if args.timed:
@@ -164,38 +437,44 @@ def load_settings(args):
     else:
         settings.timed_dataset = True
 
+    if settings.fix_attacks and not settings.timed_dataset:
+        settings.logger.error(
+            "Option '--fix-attacks' cannot be combined with '--timed-dataset false'"
+        )
+        sys.exit(1)
 
-def check_timed_attacks_keys(attacks: List[Dict[str, Any]]) -> bool:
-    error = False
-    for attack in attacks:
-        for key in ["id", "start", "end"]:
-            if key not in attack.keys():
-                settings.logger.error(
-                    f"Invalid attack format {str(attack)}: missing key '{key}'"
-                )
-                error = True
-    return error
+    load_evaluation_settings(args)
 
 
-def check_timed_attacks_order(attacks: List[Dict[str, Any]]) -> bool:
-    error = False
+def check_timed_attacks_keys(
+    attacks: List[Dict[str, Any]], report: Optional[Dict[str, List]] = None
+) -> bool:
+    if report is None:
+        report = validate_attacks(attacks)
 
-    sorted_attacks = sorted(attacks, key=lambda x: x["start"])
-    warning = []
-    for i, attack in enumerate(attacks):
-        if attack != sorted_attacks[i]:
-            other_index = 0
-            for j, other_attack in enumerate(attacks):
-                if sorted_attacks[i] == other_attack:
-                    other_index = j
-                    break
-            warning.append(f", attack {i} with id '{attack['id']}' starts ")
-            warning.append(
-                f"{'after' if sorted_attacks[i]['start'] < attack['start'] else 'before'} "
+    for missing in report["missing_keys"]:
+        for key in missing["keys"]:
+            settings.logger.error(
+                f"Invalid attack format {str(attacks[missing['index']])}: missing key '{key}'"
             )
-            warning.append(f"attack {other_index} with id '{sorted_attacks[i]['id']}'")
-            error = True
+    return len(report["missing_keys"]) > 0
 
+
+def check_timed_attacks_order(
+    attacks: List[Dict[str, Any]], report: Optional[Dict[str, List]] = None
+) -> bool:
+    if report is None:
+        report = validate_attacks(attacks)
+
+    warning = []
+    for unsorted in report["unsorted"]:
+        warning.append(
+            f", attack {unsorted['index']} with id '{unsorted['id']}' starts "
+        )
+        warning.append(f"{unsorted['relation']} ")
+        warning.append(
+            f"attack {unsorted['other_index']} with id '{unsorted['other_id']}'"
+        )
     if len(warning) > 0:
         settings.logger.error(
             "".join(
@@ -206,13 +485,13 @@ def check_timed_attacks_order(attacks: List[Dict[str, Any]]) -> bool:
                 ]
             )
         )
+
     warning = []
-    for i in range(1, len(sorted_attacks)):
-        if sorted_attacks[i]["start"] <= sorted_attacks[i - 1]["end"]:
-            warning.append(f", attack with id '{sorted_attacks[i]['id']}' starts at ")
-            warning.append(f"timestamp {sorted_attacks[i]['start']} before ")
-            warning.append(f"attack with id '{sorted_attacks[i-1]['id']}' ends at ")
-            warning.append(f"timestamp {sorted_attacks[i-1]['end']}")
+    for overlap in report["overlaps"]:
+        warning.append(f", attack with id '{overlap['id']}' starts at ")
+        warning.append(f"timestamp {overlap['start']} before ")
+        warning.append(f"attack with id '{overlap['other_id']}' ends at ")
+        warning.append(f"timestamp {overlap['end']}")
     if len(warning) > 0:
         settings.logger.warning(
             "".join(
@@ -221,20 +500,49 @@ def check_timed_attacks_order(attacks: List[Dict[str, Any]]) -> bool:
                 + [". Some metrics might not be computed correctly"]
             )
         )
-    return error
+
+    if len(report["duplicate_ids"]) > 0:
+        settings.logger.info(
+            "Attack ids shared by several attacks: {}".format(
+                ", ".join([f"'{id}'" for id in report["duplicate_ids"]])
+            )
+        )
+
+    return len(report["unsorted"]) > 0
 
 
 def evaluate(attacks, truth, predicted, dataset):
+    from metrics.utils import resolve_metrics
+
     ergs = {}
 
-    # Evaluate point based metrics
-    for name, metric in get_all_metrics().items():
+    metrics, pruned = resolve_metrics(settings.metrics)
+    if len(pruned) > 0:
+        settings.logger.info("Pruned metrics '{}'".format(",".join(pruned)))
+
+    if settings.segments > 1:
+        from evaluate.segments import evaluate_segments, segment_bounds
+
+        bounds = segment_bounds(dataset, attacks, settings.segments)
+        if len(bounds) > 2:
+            return evaluate_segments(
+                metrics, attacks, truth, predicted, dataset, bounds, settings.jobs
+            )
+        settings.logger.info("No benign gap to split the dataset at")
+
+    if settings.jobs > 1:
+        from evaluate.parallel import evaluate_parallel
+
+        return evaluate_parallel(
+            metrics, attacks, truth, predicted, dataset, settings.jobs
+        )
+
+    # Evaluate metrics in the order of their requirements
+    for metric in metrics:
+        name = metric._name
         if metric.check_requirements(ergs, attacks, settings.timed_dataset):
             try:
-                ergs = {
-                    **ergs,
-                    **metric.calculate(truth, predicted, dataset, attacks, ergs),
-                }
+                ergs.update(metric.calculate(truth, predicted, dataset, attacks, ergs))
                 settings.logger.info("Calculated '{}'".format(name))
 
             except Exception as e:
@@ -248,85 +556,292 @@ def evaluate(attacks, truth, predicted, dataset):
                     ergs[real_name] = None
 
         else:
-            dummy = {real_name: None for real_name in metric.defines()}
-            ergs = {**ergs, **dummy}
+            ergs.update({real_name: None for real_name in metric.defines()})
 
     return ergs
 
 
-def main():
-    # Argument parser and settings
-    parser = argparse.ArgumentParser()
-    prepare_arg_parser(parser)
-    args = parser.parse_args()
-    initialize_logger(args)
-    load_settings(args)
-
-    # 1) Load attacks
-    if args.attacks:
-        settings.logger.info("Loading attacks from {}".format(settings.attacks))
-        with open_file(settings.attacks, "r") as f:
-            attacks = json.load(f)
+def open_input():
+    # Opens the current input once it is read, i.e., not if loaded from the cache or
+    # parsed in chunks
+    if settings.inputfd is None:
+        settings.inputfd = open_file(settings.input, "r")
+    return settings.inputfd
 
-    else:
-        settings.logger.warning("No attack file provided! Some metrics may be skipped")
-        attacks = None
 
-    # 1.5) If dataset is timed, check attack order and overlap
-    if settings.timed_dataset and attacks is not None:
-        if check_timed_attacks_keys(attacks) or check_timed_attacks_order(attacks):
-            sys.exit(1)
+def evaluate_input(attacks, reference=None):
+    """Loads, validates, and evaluates the current input file (settings.input)
 
-    # 2) Load IDS classification results
-    settings.logger.info("Loading dataset from {}".format(settings.input))
+    Args:
+        attacks: the attacks or None
+        reference: (dataset, truth) of a previous input. Timestamps and ground
+            truth are shared with it if identical.
 
-    dataset = []
-    _first = True
+    Returns:
+        (ergs, dataset, truth), the evaluation including the forwarded configs
+    """
 
-    for line in settings.inputfd.readlines():
-        js = json.loads(line)
+    from evaluate.dataset import Dataset
+    from evaluate.utils import labels_from_booleans, parse_ipal_input
 
-        if _first:  # Forward transcriber/ipal_iids parameters
-            configs = {k: v for k, v in js.items() if k.startswith("_")}
-            _first = False
+    # 2) Load IDS classification results into a column store
+    settings.logger.info("Loading dataset from {}".format(settings.input))
 
-        # Avoid loading the entire dataset into memory
-        for rm in [key for key in js if key not in REQUIRED_KEYS]:
-            del js[rm]
+    if settings.cache and settings.input not in ["-", "stdout"]:
+        from evaluate.cache import load_cached
 
-        dataset.append(js)
+        dataset = load_cached(
+            settings.input,
+            alerts=settings.alerts,
+            scores=settings.sweep is not None,
+            backend=settings.json_backend,
+            jobs=settings.jobs,
+        )
+    elif settings.jobs > 1:
+        from evaluate.ingest import load_file
+
+        dataset = load_file(
+            settings.input,
+            alerts=settings.alerts,
+            scores=settings.sweep is not None,
+            backend=settings.json_backend,
+            jobs=settings.jobs,
+        )
+    else:
+        dataset = Dataset.load(
+            open_input(),
+            alerts=settings.alerts,
+            scores=settings.sweep is not None,
+            backend=settings.json_backend,
+        )
+    configs = dataset.configs
 
     # 3) Test if dataset is sorted by timestamp
     settings.logger.info("Validating dataset")
 
-    if settings.timed_dataset and not all("timestamp" in d for d in dataset):
+    if settings.timed_dataset and dataset.timestamp is None:
         settings.logger.error(
             "'timestamp' is not in dataset, but timed-dataset was set"
         )
         exit(1)
 
-    if settings.timed_dataset and not all(
-        dataset[i]["timestamp"] <= dataset[i + 1]["timestamp"]
-        for i in range(len(dataset) - 1)
-    ):
-        settings.logger.error("Dataset is not strictly ordered by timestamp")
+    index = dataset.first_unordered() if settings.timed_dataset else None
+    if index is not None and settings.sort:
+        settings.logger.warning(
+            "Dataset is not ordered by timestamp from message {}, sorting it".format(
+                index
+            )
+        )
+        dataset.sort()
+    elif index is not None:
+        settings.logger.error(
+            "Dataset is not strictly ordered by timestamp, message {} at {} "
+            "is earlier than message {} at {}".format(
+                index,
+                dataset.timestamp[index],
+                index - 1,
+                dataset.timestamp[index - 1],
+            )
+        )
         exit(1)
 
     # 4) Evaluate
     settings.logger.info("Evaluation started")
 
-    truth, predicted = parse_ipal_input(dataset)
+    if settings.sweep is not None:
+        return evaluate_sweep(dataset, attacks), dataset, None
+
+    if settings.window is not None:
+        truth, predicted = parse_ipal_input(dataset)
+        return evaluate_time_windows(dataset, truth, predicted, attacks), dataset, None
+
+    # Reuse the ground truth labels of a previous input with the same columns
+    if reference is not None and dataset.share_columns(reference[0]):
+        settings.logger.info("Sharing timestamps and ground truth with previous input")
+        truth, predicted = reference[1], labels_from_booleans(dataset.ids)
+    else:
+        truth, predicted = parse_ipal_input(dataset)
+
     ergs = evaluate(attacks, truth, predicted, dataset)
+
+    # 4.3) Confidence intervals
+    if settings.bootstrap is not None:
+        from evaluate.bootstrap import bootstrap
+
+        settings.logger.info("Bootstrapping {} replicates".format(settings.bootstrap))
+        ergs["_bootstrap"] = bootstrap(
+            dataset, truth, predicted, attacks, ergs, settings.bootstrap, settings.jobs
+        )
+
+    # 4.5) Evaluate individual IDSs sharing truth, timestamps, and attack index
+    if settings.alerts:
+        ergs["_alerts"] = {}
+        for name, alerts in dataset.alerts.items():
+            settings.logger.info("Evaluating alerts of '{}'".format(name))
+            ergs["_alerts"][name] = evaluate(
+                attacks, truth, labels_from_booleans(alerts), dataset.with_ids(alerts)
+            )
+
     ergs["_evaluation-config"] = settings.evaluation_settings_to_dict()
 
-    # 5) json export
+    return {**ergs, **configs}, dataset, truth
+
+
+def evaluate_sweep(dataset, attacks):
+    # Metric curves over the thresholds of a score column
+    from evaluate.sweep import select_score, select_thresholds, sweep
+    from evaluate.utils import parse_ipal_input
+
+    try:
+        score = select_score(dataset, settings.sweep)
+    except ValueError as e:
+        settings.logger.error(str(e))
+        exit(1)
+
+    thresholds = select_thresholds(score, settings.thresholds)
+    settings.logger.info("Sweeping {} thresholds".format(len(thresholds)))
+
+    truth, _ = parse_ipal_input(dataset)
+    curves = {"score": settings.sweep}
+    curves.update(sweep(dataset, truth, score, attacks, thresholds))
+    curves["_evaluation-config"] = settings.evaluation_settings_to_dict()
+
+    return {**curves, **dataset.configs}
+
+
+def evaluate_time_windows(dataset, truth, predicted, attacks):
+    # Time series of metrics per window
+    from evaluate.window import evaluate_windows
+
+    if dataset.timestamp is None:
+        settings.logger.error("Option '--window' requires a timed dataset")
+        exit(1)
+
+    stride = settings.stride or settings.window
+    windows = evaluate_windows(
+        dataset, truth, predicted, attacks, settings.window, stride
+    )
+    settings.logger.info("Evaluated {} windows".format(len(windows)))
+
+    ergs = {"window": settings.window, "stride": stride, "windows": windows}
+    ergs["_evaluation-config"] = settings.evaluation_settings_to_dict()
+    return {**ergs, **dataset.configs}
+
+
+def evaluate_batch(attacks):
+    # Evaluate many inputs against the same attacks (validated and indexed once)
+    results = {}
+    reference = None
+
+    for filename in settings.inputs:
+        settings.input, settings.inputfd = filename, None
+        try:
+            ergs, dataset, truth = evaluate_input(attacks, reference)
+        finally:
+            if settings.inputfd is not None:
+                settings.inputfd.close()
+                settings.inputfd = None
+        if reference is None:
+            reference = (dataset, truth)
+
+        if settings.output_dir:
+            output = os.path.join(
+                settings.output_dir, "{}.json".format(os.path.basename(filename))
+            )
+            settings.logger.info("Writing evaluation files to {}".format(output))
+            with open_file(output, "wt") as f:
+                f.write(json.dumps(ergs, indent=4) + "\n")
+        else:
+            results[filename] = ergs
+
+    if settings.output_dir:
+        return
+
     settings.logger.info("Writing evaluation files to {}".format(settings.output))
-    settings.outputfd.write(json.dumps({**ergs, **configs}, indent=4) + "\n")
+    if settings.table:
+        # One row per input and one column per metric, configs are omitted
+        columns = []
+        for ergs in results.values():
+            columns += [
+                key for key in ergs if not key.startswith("_") and key not in columns
+            ]
+
+        writer = csv.writer(settings.outputfd)
+        writer.writerow(["input"] + columns)
+        for filename, ergs in results.items():
+            writer.writerow([filename] + [ergs.get(key) for key in columns])
+    else:
+        settings.outputfd.write(json.dumps(results, indent=4) + "\n")
+
+
+def main():
+    # Argument parser and settings
+    parser = argparse.ArgumentParser()
+    prepare_arg_parser(parser)
+    args = parser.parse_args()
+    initialize_logger(args)
+    load_settings(args)
+
+    from evaluate.stream import evaluate_stream
+    from metrics.utils import resolve_metrics
+
+    try:  # Fail early on an invalid metric selection
+        resolve_metrics(settings.metrics)
+    except ValueError as e:
+        settings.logger.error(str(e))
+        exit(1)
+
+    # 1) Load attacks
+    if args.attacks:
+        settings.logger.info("Loading attacks from {}".format(settings.attacks))
+        with open_file(settings.attacks, "r") as f:
+            attacks = json.load(f)
+
+    else:
+        settings.logger.warning("No attack file provided! Some metrics may be skipped")
+        attacks = None
+
+    # 1.5) If dataset is timed, check attack order and overlap
+    if settings.timed_dataset and attacks is not None:
+        report = validate_attacks(attacks)
+        if check_timed_attacks_keys(attacks, report):
+            sys.exit(1)
+
+        if settings.fix_attacks:
+            attacks = fix_attacks(attacks)
+            settings.logger.info(
+                "Writing fixed attacks to {}".format(settings.fix_attacks)
+            )
+            with open_file(settings.fix_attacks, "wt") as f:
+                f.write(json.dumps(attacks, indent=4) + "\n")
+            report = validate_attacks(attacks)  # overlaps of different ids remain
+
+        if check_timed_attacks_order(attacks, report):
+            sys.exit(1)
+
+    # 2-4) Load, validate, and evaluate the input(s)
+    if settings.stream:
+        settings.logger.info("Streaming evaluation of {}".format(settings.input))
+        evaluate_stream(
+            open_input(),
+            settings.outputfd,
+            attacks,
+            settings.snapshot_every,
+            settings.snapshot_interval,
+        )
+    elif len(settings.inputs) > 1:
+        evaluate_batch(attacks)
+    else:
+        ergs, _, _ = evaluate_input(attacks)
+
+        # 5) json export
+        settings.logger.info("Writing evaluation files to {}".format(settings.output))
+        settings.outputfd.write(json.dumps(ergs, indent=4) + "\n")
 
     # Finalize and close
     if settings.output and settings.outputfd != sys.stdout:
         settings.outputfd.close()
-    if settings.input:
+    if settings.input and settings.inputfd is not None:
         settings.inputfd.close()
 
 
@@ -0,0 +1,143 @@
+import gzip
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import evaluate.settings as settings
+from evaluate.dataset import Dataset
+from evaluate.decoder import get_decoder
+
+# Number of decompressed bytes parsed at once by a worker process
+CHUNKBYTES = 1 << 22
+
+
+def open_binary(filename):
+    # Like open_file, '-' reads from stdin and '*.gz' files are decompressed
+    if filename in ["-", "stdout"]:
+        return nullcontext(sys.stdin.buffer)
+    if filename.endswith(".gz"):
+        return gzip.open(filename, mode="rb")
+    return open(filename, mode="rb")
+
+
+def read_chunks(fd, chunkbytes=CHUNKBYTES):
+    """Splits a binary file into chunks of complete lines
+
+    Args:
+        fd: binary file-like object
+        chunkbytes: approximate number of bytes per chunk
+
+    Yields:
+        bytes ending with a line break (except for a last line without one)
+    """
+
+    rest = b""
+    while True:
+        block = fd.read(chunkbytes)
+        if not block:
+            break
+
+        block = rest + block
+        cut = block.rfind(b"\n") + 1
+        rest = block[cut:]
+        if cut > 0:
+            yield block[:cut]
+
+    if rest:
+        yield rest
+
+
+def prefetch(iterable, depth=2):
+    """Iterates in a dedicated thread, e.g., to decompress the next chunks while
+    the current ones are being parsed. zlib releases the GIL while decompressing.
+
+    Args:
+        iterable: the iterable to consume
+        depth: maximum number of items read ahead
+
+    Yields:
+        the items of the iterable
+    """
+
+    items = queue.Queue(maxsize=depth)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put((item, None))
+            items.put((done, None))
+        except Exception as e:  # raised in the consuming thread
+            items.put((done, e))
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    while True:
+        item, error = items.get()
+        if error is not None:
+            raise error
+        if item is done:
+            return
+        yield item
+
+
+def _parse_chunk(data, alerts, scores, backend):
+    # Runs in a worker process
+    return Dataset.from_lines(data.splitlines(), alerts, scores, backend)
+
+
+def load_file(filename, alerts=False, scores=False, backend="auto", jobs=1):
+    """Loads a file of IPAL messages into the column store
+
+    With more than one job, a dedicated thread reads and decompresses the file
+    into chunks of complete lines, which a pool of worker processes parses into
+    columns. The columns of all chunks are merged in the order of the file, i.e.,
+    the result equals Dataset.load.
+
+    Args:
+        filename: path of the input file ('-' stdin, '*.gz' compressed)
+        alerts: whether to keep the 'alerts' of individual IDSs
+        scores: whether to keep the 'scores' of individual IDSs
+        backend: JSON backend (see evaluate.decoder)
+        jobs: number of worker processes parsing the file
+
+    Returns:
+        the Dataset
+    """
+
+    if jobs <= 1:
+        with open_binary(filename) as fd:
+            return Dataset.load(fd, alerts=alerts, scores=scores, backend=backend)
+
+    start = time.perf_counter()
+    parts = []
+    configs = None
+
+    with open_binary(filename) as fd, ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()  # keeps the order of the chunks
+
+        for data in prefetch(read_chunks(fd, CHUNKBYTES), depth=jobs):
+            if configs is None:  # Forward transcriber/ipal_iids parameters
+                js = get_decoder(backend)[1](data.split(b"\n", 1)[0])
+                configs = {k: v for k, v in js.items() if k.startswith("_")}
+
+            pending.append(pool.submit(_parse_chunk, data, alerts, scores, backend))
+            while len(pending) > 2 * jobs:  # bound the memory of queued chunks
+                parts.append(pending.popleft().result())
+
+        parts += [future.result() for future in pending]
+
+    dataset = Dataset.concatenate(parts)
+    dataset.configs = configs or {}
+
+    count, elapsed = len(dataset), time.perf_counter() - start
+    settings.logger.info(
+        "Parsed {} lines in {:.2f}s ({:.0f} lines/s, {} jobs)".format(
+            count, elapsed, count / elapsed if elapsed > 0 else 0, jobs
+        )
+    )
+    return dataset
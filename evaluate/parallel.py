@@ -0,0 +1,224 @@
+import logging
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+import evaluate.settings as settings
+from evaluate.dataset import Dataset
+
+# Inputs of a worker process, attached once by _init_worker
+_worker = {}
+
+
+class SharedArrays:
+    """Places NumPy arrays in shared memory such that worker processes can attach
+    to them instead of receiving a pickled copy. Arrays of Python objects cannot be
+    shared and are pickled instead.
+
+    Attributes:
+        spec: picklable description of the arrays to attach to
+    """
+
+    def __init__(self, arrays):
+        self._blocks = []
+        self.spec = {}
+
+        for name, array in arrays.items():
+            if array is None or array.dtype.hasobject:
+                self.spec[name] = ("pickled", array)
+                continue
+
+            shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+            self._blocks.append(shm)
+            self.spec[name] = ("shared", shm.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    @staticmethod
+    def attach(spec):
+        """Attaches to shared arrays
+
+        Args:
+            spec: the spec of a SharedArrays instance
+
+        Returns:
+            (arrays, blocks), the read-only arrays by name and the shared memory
+            blocks, which have to be kept open as long as the arrays are in use
+        """
+
+        arrays, blocks = {}, []
+        for name, entry in spec.items():
+            if entry[0] == "pickled":
+                arrays[name] = entry[1]
+                continue
+
+            _, shm_name, shape, dtype = entry
+            shm = SharedMemory(name=shm_name)
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+            array.flags.writeable = False
+            blocks.append(shm)
+            arrays[name] = array
+
+        return arrays, blocks
+
+
+def _forwarded_settings():
+    # Plain settings (no file descriptors or loggers) the workers need to share
+    return {
+        key: value
+        for key, value in vars(settings).items()
+        if not key.startswith("_")
+        and isinstance(value, (bool, int, float, str, list, dict, type(None)))
+    }
+
+
+def _init_worker(config, spec, scenarios, attacks):
+    for key, value in config.items():
+        setattr(settings, key, value)
+
+    if settings.logfile and settings.logfile != "-":
+        logging.basicConfig(
+            filename=settings.logfile, level=settings.log, format=settings.logformat
+        )
+    else:
+        logging.basicConfig(level=settings.log, format=settings.logformat)
+    settings.logger = logging.getLogger("ipal-evaluate")
+
+    arrays, blocks = SharedArrays.attach(spec)
+    dataset = Dataset(
+        timestamp=arrays["timestamp"],
+        ids=arrays["ids"],
+        malicious=arrays["malicious"],
+        scenarios=scenarios,
+        id=arrays["id"],
+    )
+
+    _worker.update(
+        truth=arrays["truth"],
+        predicted=arrays["predicted"],
+        dataset=dataset,
+        attacks=attacks,
+        blocks=blocks,
+    )
+
+
+def _calculate(metric, ergs):
+    # Runs in a worker, returns (result, traceback, error message)
+    try:
+        result = metric.calculate(
+            _worker["truth"],
+            _worker["predicted"],
+            _worker["dataset"],
+            _worker["attacks"],
+            ergs,
+        )
+        return result, None, None
+    except Exception as e:
+        return None, traceback.format_exc(), str(e)
+
+
+def evaluate_parallel(metrics, attacks, truth, predicted, dataset, jobs):
+    """Evaluates metrics on a pool of worker processes
+
+    Each metric is submitted as soon as all metrics it requires are finished,
+    such that independent branches of the dependency graph run in parallel. The
+    label arrays and dataset columns are passed to the workers in shared memory.
+
+    Args:
+        metrics: metrics in dependency order (see metrics.utils.resolve_metrics)
+        attacks: the attacks or None
+        truth: label array of the ground truth
+        predicted: label array of the IDS classification
+        dataset: the Dataset
+        jobs: number of worker processes
+
+    Returns:
+        dict of all metric results in the order of the metrics
+    """
+
+    producers = {}
+    for metric in metrics:
+        for name in [metric._name] + metric.defines():
+            producers.setdefault(name, metric)
+    dependencies = {
+        metric: {producers[r] for r in metric._requires if r in producers} - {metric}
+        for metric in metrics
+    }
+
+    shared = SharedArrays(
+        {
+            "truth": np.asarray(truth),
+            "predicted": np.asarray(predicted),
+            "timestamp": dataset.timestamp,
+            "ids": dataset.ids,
+            "malicious": dataset.malicious,
+            "id": dataset.id,
+        }
+    )
+
+    results = {}  # metric -> its results
+    ergs = {}  # results of all finished metrics
+    running = {}  # future -> metric
+
+    def submit_ready(pool):
+        # Submit every metric whose required metrics are finished. Metrics failing
+        # their requirements finish immediately, which may unblock further metrics.
+        progress = True
+        while progress:
+            progress = False
+            for metric in metrics:
+                if metric in results or metric in running.values():
+                    continue
+                if any(dep not in results for dep in dependencies[metric]):
+                    continue
+
+                if metric.check_requirements(ergs, attacks, settings.timed_dataset):
+                    running[pool.submit(_calculate, metric, dict(ergs))] = metric
+                else:
+                    results[metric] = {name: None for name in metric.defines()}
+                    ergs.update(results[metric])
+                    progress = True
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(_forwarded_settings(), shared.spec, dataset.scenarios, attacks),
+        ) as pool:
+            submit_ready(pool)
+
+            while len(running) > 0:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    metric = running.pop(future)
+                    result, trace, error = future.result()
+
+                    if trace is None:
+                        settings.logger.info("Calculated '{}'".format(metric._name))
+                    else:
+                        settings.logger.error(
+                            "Failed calculating the '{}' metric!".format(metric._name)
+                        )
+                        settings.logger.debug(trace)
+                        settings.logger.error(error)
+                        result = {name: None for name in metric.defines()}
+
+                    results[metric] = result
+                    ergs.update(result)
+
+                submit_ready(pool)
+    finally:
+        shared.close()
+
+    # Same order as a serial evaluation
+    output = {}
+    for metric in metrics:
+        output.update(results[metric])
+    return output
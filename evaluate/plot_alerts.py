@@ -11,6 +11,7 @@ import matplotlib
 import matplotlib.pyplot as plt
 
 import evaluate.settings as settings
+from evaluate.decoder import get_decoder
 
 IDSs = []
 ATTACKFILE = None
@@ -102,6 +103,7 @@ def plot(  # noqa: C901
 
     count = 1
     ipalidtotimestamp = {}
+    _, decode = get_decoder()
 
     # PLOT IDS ALARMS
     for IDS, label in IDSs:
@@ -126,7 +128,7 @@ def plot(  # noqa: C901
                 line = f.readline()
 
                 while line:
-                    js = json.loads(line)
+                    js = decode(line)
                     t = datetime.datetime.fromtimestamp(js["timestamp"])
 
                     # Collect ipalIDs
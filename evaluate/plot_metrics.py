@@ -15,7 +15,7 @@ from matplotlib.spines import Spine
 from matplotlib.transforms import Affine2D
 
 import evaluate.settings as settings
-import metrics.utils as utils
+from metrics.registry import REGISTRY, all_outputs
 
 # NOTE this script assumes that metrics are normalized to [0,1] with 0 bad and 1 good
 # A collection of default metrics used for this plot
@@ -31,10 +31,10 @@ METRICS = [
     "eTaR",
     "eTaP",
 ]
-ALL = [m for metric in utils.get_all_metrics().values() for m in metric.defines()]
+ALL = all_outputs()
 
 # Indicate whether a metric needs to be inverted such tat 0 is bad and 1 is good
-INVERT = [m._name for m in utils.get_all_metrics().values() if not m._higher_is_better]
+INVERT = [entry["name"] for entry in REGISTRY if not entry["higher_is_better"]]
 
 # Collection of colors for the IDSs
 COLORS = [
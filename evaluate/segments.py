@@ -0,0 +1,193 @@
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import evaluate.settings as settings
+from metrics.intervals import AttackIndex
+
+
+def segment_bounds(dataset, attacks, count):
+    """Splits the dataset into segments of similar length at benign gaps, i.e.,
+    between two messages where the first one is neither malicious nor an alarm,
+    time advances, and no attack (extended by the alarm gracetime) lies in
+    between. Attacks, alarms, and runs of malicious messages thus never continue
+    across segments. The last segment keeps at least two messages, since the last
+    message lasts as long as the one before (cf. metrics.affiliation).
+
+    Args:
+        dataset: the Dataset
+        attacks: the attacks or None
+        count: maximum number of segments
+
+    Returns:
+        array of the first row of each segment followed by the number of messages,
+        fewer segments are returned if there are not enough benign gaps
+    """
+
+    length = len(dataset)
+    if length < 2 or count < 2:
+        return np.array([0, length], dtype=np.int64)
+
+    gap = (dataset.malicious[:-1] == 0) & ~dataset.ids[:-1]
+    gap[-1] = False
+    timestamp = dataset.timestamp
+    if timestamp is not None:
+        gap &= timestamp[1:] > timestamp[:-1]
+        if attacks:
+            gap &= ~AttackIndex.of(attacks).overlaps(
+                timestamp[:-1], timestamp[1:], settings.alarm_gracetime
+            )
+
+    # First benign gap at or after each evenly spaced row
+    candidates = np.flatnonzero(gap) + 1
+    targets = np.arange(1, count, dtype=np.int64) * length // count
+    k = np.searchsorted(candidates, targets, side="left")
+    cuts = candidates[k[k < len(candidates)]]
+    return np.unique(np.concatenate(([0], cuts, [length]))).astype(np.int64)
+
+
+def _partials(metrics, truth, predicted, dataset, attacks, first, stop):
+    # Partial states of the segment first to stop - 1 as (state, traceback, error
+    # message) for each metric
+    segment = dataset.segment(first, stop)
+    truth, predicted = truth[first:stop], predicted[first:stop]
+
+    states = {}
+    for metric in metrics:
+        try:
+            states[metric] = (
+                metric.partial(truth, predicted, segment, attacks),
+                None,
+                None,
+            )
+        except Exception as e:
+            states[metric] = (None, traceback.format_exc(), str(e))
+    return states
+
+
+def _evaluate_segment(metrics, first, stop):
+    # Runs in a worker of evaluate.parallel
+    from evaluate.parallel import _worker
+
+    return _partials(
+        metrics,
+        _worker["truth"],
+        _worker["predicted"],
+        _worker["dataset"],
+        _worker["attacks"],
+        first,
+        stop,
+    )
+
+
+def evaluate_segments(metrics, attacks, truth, predicted, dataset, bounds, jobs=1):
+    """Evaluates metrics on segments of the dataset (see segment_bounds)
+
+    Mergeable metrics compute a partial state of each segment, in parallel if
+    jobs > 1. The states are merged in chronological order and finalized into the
+    same results as evaluating the whole dataset, up to the order in which sums
+    of floating point numbers are added up. Other metrics, and metrics whose
+    partial state fails, are evaluated on the whole dataset instead.
+
+    Args:
+        metrics: metrics in dependency order (see metrics.utils.resolve_metrics)
+        attacks: the attacks or None
+        truth: label array of the ground truth
+        predicted: label array of the IDS classification
+        dataset: the Dataset
+        bounds: first row of each segment followed by the number of messages
+        jobs: number of worker processes
+
+    Returns:
+        dict of all metric results in the order of the metrics
+    """
+
+    truth, predicted = np.asarray(truth), np.asarray(predicted)
+    timed = settings.timed_dataset
+    mergeable = [
+        m
+        for m in metrics
+        if m._mergeable
+        and (timed or not m._requires_timed_dataset)
+        and (attacks or not m._requires_attacks)
+    ]
+    segments = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+    settings.logger.info("Evaluating {} segments".format(len(segments)))
+
+    if jobs > 1:
+        from evaluate.parallel import SharedArrays, _forwarded_settings, _init_worker
+
+        shared = SharedArrays(
+            {
+                "truth": truth,
+                "predicted": predicted,
+                "timestamp": dataset.timestamp,
+                "ids": dataset.ids,
+                "malicious": dataset.malicious,
+                "id": dataset.id,
+            }
+        )
+        try:
+            with ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_worker,
+                initargs=(
+                    _forwarded_settings(),
+                    shared.spec,
+                    dataset.scenarios,
+                    attacks,
+                ),
+            ) as pool:
+                futures = [
+                    pool.submit(_evaluate_segment, mergeable, first, stop)
+                    for first, stop in segments
+                ]
+                partials = [future.result() for future in futures]
+        finally:
+            shared.close()
+    else:
+        partials = [
+            _partials(mergeable, truth, predicted, dataset, attacks, first, stop)
+            for first, stop in segments
+        ]
+
+    # Merge the states of all segments in chronological order
+    states = {}
+    for metric in mergeable:
+        failed = [p[metric] for p in partials if p[metric][1] is not None]
+        if len(failed) > 0:
+            _, trace, error = failed[0]
+            settings.logger.info(
+                "Evaluating '{}' on the whole dataset: {}".format(metric._name, error)
+            )
+            settings.logger.debug(trace)
+            continue
+
+        state = partials[0][metric][0]
+        for p in partials[1:]:
+            state = metric.merge(state, p[metric][0], attacks)
+        states[metric] = state
+
+    # Evaluate metrics in the order of their requirements
+    ergs = {}
+    for metric in metrics:
+        name = metric._name
+        if not metric.check_requirements(ergs, attacks, timed):
+            ergs.update({real_name: None for real_name in metric.defines()})
+            continue
+
+        try:
+            if metric in states:
+                ergs.update(metric.finalize(states[metric], attacks, ergs))
+            else:
+                ergs.update(metric.calculate(truth, predicted, dataset, attacks, ergs))
+            settings.logger.info("Calculated '{}'".format(name))
+
+        except Exception as e:
+            settings.logger.error("Failed calculating the '{}' metric!".format(name))
+            settings.logger.debug(traceback.format_exc())
+            settings.logger.error(str(e))
+            ergs.update({real_name: None for real_name in metric.defines()})
+
+    return ergs
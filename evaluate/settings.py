@@ -1,5 +1,6 @@
 import logging
 from io import TextIOWrapper
+from typing import Optional
 
 version = "v1.2.7"
 
@@ -8,11 +9,32 @@ compresslevel = 9  # 0 no compress, 1 large/fast, 9 small/slow
 
 # In and output
 input = None
-inputfd: TextIOWrapper
+inputs = ["-"]  # all input files, more than one evaluates in batch mode
+inputfd: Optional[TextIOWrapper] = None  # opened once read, see evaluate.open_input
 output = None
 outputfd: TextIOWrapper
+output_dir = None  # batch mode: one output file per input
+table = False  # batch mode: write a CSV table instead of JSON
+cache = False  # cache the parsed columns of inputs next to them
+json_backend = "auto"  # library decoding IPAL messages, see evaluate.decoder
 attacks = None
+fix_attacks = None  # file the sorted and merged attacks are written to
 timed_dataset = True
+sort = False  # sort unordered timed datasets instead of rejecting them
+alerts = False  # evaluate the alerts of individual IDSs as well
+sweep = None  # IDS whose score thresholds are swept
+thresholds = None  # maximum number of swept thresholds, None for all
+stream = False  # evaluate message by message
+window = None  # length of time windows, None evaluates the whole dataset
+stride = None  # time between sliding windows, None for non-overlapping windows
+snapshot_every = None  # messages between stream snapshots
+snapshot_interval = None  # seconds between stream snapshots
+metrics = None  # selected metric outputs, None evaluates all metrics
+bootstrap = None  # number of bootstrap replicates, None for no confidence intervals
+bootstrap_confidence = 0.95  # confidence level of the bootstrap intervals
+bootstrap_seed = 0  # seed of the bootstrap resampling
+jobs = 1  # number of processes evaluating metrics in parallel
+segments = 1  # number of segments evaluated separately and merged
 
 # Logging settings
 logger = logging.getLogger("Evaluate")
@@ -31,6 +53,9 @@ eTaPR_theta_p = 0.5
 eTaPR_theta_r = 0.01
 eTaPR_delta = 0.0
 
+# Affiliation settings
+affiliation_timestamps = False  # time events by timestamps instead of message indices
+
 # BATADAL settings
 batadal_gamma = 0.5
 
@@ -81,6 +106,7 @@ def evaluation_settings_to_dict():
         "eTaPR_theta_p": eTaPR_theta_p,
         "eTaPR_theta_r": eTaPR_theta_r,
         "eTaPR_delta": eTaPR_delta,
+        "affiliation_timestamps": affiliation_timestamps,
         "batadal_gamma": batadal_gamma,
         "nab_profiles": nab_profiles,
         # Logging settings
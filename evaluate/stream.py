@@ -0,0 +1,120 @@
+import json
+import time
+import traceback
+
+import evaluate.settings as settings
+from evaluate.decoder import get_decoder
+from metrics.utils import resolve_metrics
+
+
+def streaming_metrics(attacks):
+    """Selects the metrics that can be evaluated on a stream
+
+    Args:
+        attacks: the attacks or None
+
+    Returns:
+        list of metrics in dependency order
+    """
+
+    selected = []
+    provided = {}  # outputs of the selected metrics
+
+    for metric in resolve_metrics(settings.metrics)[0]:
+        if not metric._streaming:
+            settings.logger.info(
+                "'{}' does not support streaming (skipped)".format(metric._name)
+            )
+            continue
+
+        if metric.check_requirements(provided, attacks, settings.timed_dataset):
+            selected.append(metric)
+            provided.update({name: None for name in metric.defines()})
+
+    return selected
+
+
+def snapshot(metrics, states, attacks):
+    # Results of all metrics for the messages seen so far
+    ergs = {}
+
+    for metric in metrics:
+        try:
+            ergs.update(metric.finalize(states[metric], attacks, ergs))
+        except Exception:  # e.g., undefined before the first message
+            settings.logger.debug(traceback.format_exc())
+            ergs.update({name: None for name in metric.defines()})
+
+    return ergs
+
+
+def evaluate_stream(inputfd, outputfd, attacks, every=None, interval=None):
+    """Evaluates a stream of IPAL messages (e.g., live ipal-iids output) message by
+    message. Metrics supporting streams keep a state updated with each message.
+    A snapshot of the current results is written as a single JSON line every
+    `every` messages, or when a message arrives at least `interval` seconds after
+    the last snapshot, and once the stream ends.
+
+    Args:
+        inputfd: file of IPAL messages, read line by line
+        outputfd: file the snapshots are written to
+        attacks: the attacks or None
+        every: number of messages between snapshots (None to disable)
+        interval: seconds between snapshots (None to disable)
+    """
+
+    metrics = streaming_metrics(attacks)
+    states = {metric: metric.init_state(attacks) for metric in metrics}
+    updated = [(metric, state) for metric, state in states.items() if state is not None]
+
+    def emit(extra=None):
+        ergs = {"_messages": count, **snapshot(metrics, states, attacks)}
+        outputfd.write(json.dumps({**ergs, **(extra or {})}) + "\n")
+        outputfd.flush()
+
+    _, decode = get_decoder(settings.json_backend)
+    count = 0
+    configs = None
+    previous = None  # timestamp of the previous message
+    last_snapshot = time.monotonic()
+
+    for line in inputfd:
+        js = decode(line)
+
+        if configs is None:  # Forward transcriber/ipal_iids parameters
+            configs = {k: v for k, v in js.items() if k.startswith("_")}
+
+        if settings.timed_dataset:
+            if "timestamp" not in js:
+                settings.logger.error(
+                    "'timestamp' is not in message {}, but timed-dataset was set".format(
+                        count
+                    )
+                )
+                exit(1)
+            if previous is not None and js["timestamp"] < previous:
+                settings.logger.error(
+                    "Dataset is not strictly ordered by timestamp, message {} at {} "
+                    "is earlier than message {} at {}".format(
+                        count, js["timestamp"], count - 1, previous
+                    )
+                )
+                exit(1)
+            previous = js["timestamp"]
+
+        for metric, state in updated:
+            metric.update(state, js, attacks)
+        count += 1
+
+        if (every and count % every == 0) or (
+            interval and time.monotonic() - last_snapshot >= interval
+        ):
+            emit()
+            last_snapshot = time.monotonic()
+
+    emit(
+        {
+            "_evaluation-config": settings.evaluation_settings_to_dict(),
+            **(configs or {}),
+        }
+    )
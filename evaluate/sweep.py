@@ -0,0 +1,289 @@
+import numpy as np
+
+import evaluate.settings as settings
+from evaluate.utils import quiet_metrics
+from metrics.batadal import Batadal, BatadalTTD
+from metrics.confusion import CONFUSION, count_at_least, threshold_confusion
+from metrics.intervals import AttackIndex, Runs
+from metrics.metric import sequential_sum
+from metrics.scenarios import DetectionDelay
+from metrics.utils import confusion_metrics
+
+
+def select_score(dataset, name):
+    """Selects the score column of an individual IDS
+
+    Args:
+        dataset: Dataset loaded with scores=True
+        name: name of the IDS, 'default' if only a single IDS is present
+
+    Returns:
+        float64 array of scores (NaN if the IDS did not report a score)
+    """
+
+    if name == "default":
+        if len(dataset.scores) != 1:
+            raise ValueError(
+                "Score 'default' requires a single IIDS, use any of {} instead".format(
+                    ", ".join([f"'{ids}'" for ids in dataset.scores])
+                )
+            )
+        return next(iter(dataset.scores.values()))
+
+    if name not in dataset.scores:
+        raise ValueError(
+            "Score '{}' not found, use any of {} instead".format(
+                name, ", ".join([f"'{ids}'" for ids in dataset.scores])
+            )
+        )
+    return dataset.scores[name]
+
+
+def select_thresholds(score, count=None):
+    """Thresholds to sweep, i.e., distinct scores from the highest to the lowest
+
+    Args:
+        score: array of scores
+        count: maximum number of thresholds evenly picked among the distinct
+            scores (None for all)
+
+    Returns:
+        descending array of thresholds
+    """
+
+    thresholds = np.unique(score[np.isfinite(score)])[::-1]
+    if count is not None and count < len(thresholds):
+        pick = np.linspace(0, len(thresholds) - 1, count).round().astype(np.int64)
+        thresholds = thresholds[np.unique(pick)]
+    return thresholds
+
+
+def _alarm_counts(timestamp, score, index, thresholds):
+    """Counts the true and false positive alarms for all thresholds
+
+    Messages with a score >= threshold alarm. Each message (row) and each pair of
+    consecutive messages is an element that is active if all its scores are above
+    the threshold. An alarm is a maximal chain of active elements, and it overlaps
+    with an attack iff any of its elements does ('dirty' elements). Then
+
+        alarms = active rows - active pairs
+        TPA = active dirty elements - linked consecutive dirty elements
+
+    where two consecutive dirty elements are linked iff all elements in between
+    are active, i.e., the minimal score in between is above the threshold. False
+    positive alarms identical to the previous one count once (see
+    _duplicate_alarms).
+    """
+
+    gracetime = settings.alarm_gracetime
+
+    # Interleave rows (even positions) and pairs of rows (odd positions)
+    activation = np.empty(max(2 * len(score) - 1, 0), dtype=np.float64)
+    activation[0::2] = score
+    activation[1::2] = np.minimum(score[:-1], score[1:])
+
+    dirty = np.zeros(len(activation), dtype=np.bool_)
+    dirty[0::2] = index.covered(timestamp, gracetime)
+    dirty[1::2] = index.overlaps(timestamp[:-1], timestamp[1:], gracetime)
+
+    alarms = count_at_least(activation[0::2], thresholds) - count_at_least(
+        activation[1::2], thresholds
+    )
+
+    fpa = alarms - _duplicate_alarms(timestamp, score, index, thresholds)
+
+    positions = np.flatnonzero(dirty)
+    if len(positions) == 0:
+        return np.zeros(len(thresholds), dtype=np.int64), fpa
+
+    segments = np.minimum.reduceat(activation, positions)
+    links = np.minimum(segments[:-1], activation[positions[1:]])
+    tpa = count_at_least(activation[positions], thresholds) - count_at_least(
+        links, thresholds
+    )
+    return tpa, fpa - tpa
+
+
+def _duplicate_alarms(timestamp, score, index, thresholds):
+    """Counts the false positive alarms identical to the previous one, which count
+    once (cf. metrics.alarms.false_positive_alarms), for all thresholds
+
+    As timestamps are ordered, identical alarms start and end at the same timestamp
+    and lie within a block of messages sharing that timestamp. The alarms inside a
+    block are its runs of active rows (active rows - active pairs), except for runs
+    continuing into the message before (left) or after (right) the block:
+
+        inside = rows - pairs - left - right + (left and right and all active)
+
+    and all but the first of them are duplicates if the block is no attack.
+    """
+
+    gracetime = settings.alarm_gracetime
+    n = len(timestamp)
+
+    # Blocks of at least three messages (alarm, no alarm, alarm) sharing a timestamp
+    bounds = np.flatnonzero(np.diff(timestamp) != 0) + 1
+    first = np.concatenate(([0], bounds))
+    stop = np.concatenate((bounds, [n]))
+    block = stop - first >= 3
+    first, stop = first[block], stop[block]
+    benign = ~index.overlaps(timestamp[first], timestamp[first], gracetime)
+
+    duplicates = np.zeros(len(thresholds), dtype=np.int64)
+    for i, j in zip(first[benign].tolist(), stop[benign].tolist()):
+        rows = score[i:j]
+        inside = count_at_least(rows, thresholds) - count_at_least(
+            np.minimum(rows[:-1], rows[1:]), thresholds
+        )
+        if i > 0:
+            inside -= count_at_least([min(score[i - 1], score[i])], thresholds)
+        if j < n:
+            inside -= count_at_least([min(score[j - 1], score[j])], thresholds)
+        if i > 0 and j < n:
+            inside += count_at_least([score[i - 1 : j + 1].min()], thresholds)
+        duplicates += np.maximum(inside - 1, 0)
+
+    return duplicates
+
+
+def _first_alarms(score, first, stop, thresholds):
+    """First alarm within each window of rows for all thresholds
+
+    The first alarm of a window is its first row whose score is at least the
+    threshold, i.e., the first row where the running maximum of the window's scores
+    reaches the threshold.
+
+    Args:
+        score: float64 array of scores
+        first: array of the first row of each window
+        stop: array of the row after each window
+        thresholds: descending array of thresholds
+
+    Returns:
+        array of rows (windows x thresholds), len(score) if there is no alarm
+    """
+
+    alarms = np.full((len(first), len(thresholds)), len(score), dtype=np.int64)
+    for k, (i, j) in enumerate(zip(first.tolist(), stop.tolist())):
+        if j > i:
+            position = np.searchsorted(np.maximum.accumulate(score[i:j]), thresholds)
+            alarms[k] = np.where(position < j - i, i + position, len(score))
+    return alarms
+
+
+def _time_aware_curves(dataset, score, attacks, index, detected, thresholds):
+    # Detection-Delay and BATADAL-TTD for all thresholds from the first alarm within
+    # each attack, detected holds the scenarios detected at each threshold
+    first, stop = index.rows(dataset.timestamp)
+    attack_alarms = _first_alarms(score, first, stop, thresholds)
+
+    malicious = Runs.of(dataset, "malicious")
+    first, last = malicious.select(malicious.value != 0)
+    run_alarms = _first_alarms(score, first, last + 1, thresholds)
+
+    curves = {"Detection-Delay": [], "BATADAL-TTD": []}
+    for k in range(len(thresholds)):
+        _, delay, _ = DetectionDelay._delays(
+            dataset, attacks, detected[k], attack_alarms[:, k]
+        )
+        curves["Detection-Delay"].append(sequential_sum(delay))
+
+        try:
+            ttd = BatadalTTD._ttd(dataset, run_alarms[:, k])
+            value = BatadalTTD.finalize({"ttd": ttd})[BatadalTTD._name]
+        except ZeroDivisionError:  # e.g., no attack, None like in evaluate
+            value = None
+        curves["BATADAL-TTD"].append(value)
+    return curves
+
+
+def _scenario_thresholds(dataset, score, index):
+    # Highest score within each detectable scenario, keyed like DetectedScenarios
+    detection = {}
+
+    if len(index) > 0 and dataset.timestamp is not None:
+        first, stop = index.rows(dataset.timestamp, settings.alarm_gracetime)
+        padded = np.append(score, -np.inf)  # empty windows are never detected
+        for att, i, j in zip(index.attacks, first.tolist(), stop.tolist()):
+            value = padded[i:j].max() if j > i else -np.inf
+            key = (att["id"], att["start"], att["end"])
+            detection[key] = max(detection.get(key, -np.inf), value)
+
+    return detection
+
+
+def sweep(dataset, truth, score, attacks, thresholds):
+    """Evaluates the IDS for many score thresholds at once
+
+    Messages with a score >= threshold are classified as alarms. The point-based
+    metrics derive from cumulative confusion matrices. If attacks are available,
+    the true/false positive alarms, the number of detected scenarios (instead of
+    their list), and the time-aware Detection-Delay and BATADAL(-TTD) are evaluated
+    for each threshold as well.
+
+    Args:
+        dataset: the Dataset
+        truth: label array of the ground truth
+        score: float64 array of scores
+        attacks: the attacks or None
+        thresholds: descending array of thresholds
+
+    Returns:
+        dict of lists, the thresholds and the value of each metric per threshold
+    """
+
+    score = np.where(np.isnan(score), -np.inf, score)  # missing scores never alarm
+    counts = threshold_confusion(truth, score, thresholds)
+    confusion = dict(zip(CONFUSION, counts.T))
+    derived = confusion_metrics()
+
+    curves = {"thresholds": thresholds.tolist()}
+    curves.update({key: value.tolist() for key, value in confusion.items()})
+    for metric in derived:
+        curves.update({name: [] for name in metric.defines()})
+
+    with quiet_metrics():
+        for i in range(len(thresholds)):
+            ergs = {key: int(value[i]) for key, value in confusion.items()}
+            for metric in derived:
+                ergs.update(metric.calculate(ergs=ergs))
+            for metric in derived:
+                for name in metric.defines():
+                    curves[name].append(ergs[name])
+
+    if attacks is None or len(attacks) == 0:
+        return curves
+    index = AttackIndex.of(attacks)
+
+    detection = _scenario_thresholds(dataset, score, index)
+    curves["Detected-Scenarios-Count"] = count_at_least(
+        np.array(list(detection.values()), dtype=np.float64), thresholds
+    ).tolist()
+
+    per_id = {}
+    for key, value in detection.items():
+        per_id[key[0]] = max(per_id.get(key[0], -np.inf), value)
+    uniqueattacks = set([a["id"] for a in attacks])
+    detected = count_at_least(np.array(list(per_id.values()), np.float64), thresholds)
+    curves["Detected-Scenarios-Percent"] = (detected / len(uniqueattacks)).tolist()
+
+    if settings.timed_dataset:
+        tpa, fpa = _alarm_counts(dataset.timestamp, score, index, thresholds)
+        curves["TPA"] = tpa.tolist()
+        curves["FPA"] = fpa.tolist()
+
+        scenarios = [
+            {att_id for att_id, value in per_id.items() if value >= threshold}
+            for threshold in thresholds.tolist()
+        ]
+        curves.update(
+            _time_aware_curves(dataset, score, attacks, index, scenarios, thresholds)
+        )
+        curves["BATADAL"] = [
+            Batadal.calculate(ergs={"BATADAL-TTD": ttd, "BATADAL-CLF": clf})["BATADAL"]
+            if ttd is not None and clf is not None
+            else None
+            for ttd, clf in zip(curves["BATADAL-TTD"], curves["BATADAL-CLF"])
+        ]
+
+    return curves
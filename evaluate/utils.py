@@ -1,7 +1,14 @@
+import logging
+from contextlib import contextmanager
 from enum import IntEnum, unique
 
 import numpy as np
 
+import evaluate.settings as settings
+
+# Compact dtype of truth and classification label arrays
+LABEL_DTYPE = np.int8
+
 
 @unique
 class ADLabels(IntEnum):
@@ -22,21 +29,44 @@ class ADLabels(IntEnum):
         return [ADLabels.NON_ANOMALOUS.value, ADLabels.ANOMALY.value]
 
 
+def labels_from_booleans(values):
+    """Converts boolean classifications (e.g., a pre-extracted list of `ids` or
+    `malicious` values) into a compact array of ADLabels values
+
+    Args:
+        values: sequence or array of booleans
+
+    Returns:
+        np.int8 array of ADLabels values
+    """
+
+    # ADLabels.ANOMALY == True == 1 and ADLabels.NON_ANOMALOUS == False == 0
+    return np.asarray(values, dtype=np.bool_).astype(LABEL_DTYPE)
+
+
 def parse_ipal_input(dataset):
     """Extracts truth labels (from the dataset), and the IDS' classification result
 
     Args:
-        dataset: a list of IPAL messages
+        dataset: the Dataset column store of the IPAL messages
 
     Returns:
         (truth, ids-classification)
     """
 
-    truth = np.empty(len(dataset), dtype=int)
-    predicted = np.empty(len(dataset), dtype=int)
-
-    for i, ipal in enumerate(dataset):
-        truth[i] = ADLabels.from_is_malicious(ipal["malicious"]).value
-        predicted[i] = ADLabels.from_is_malicious(ipal["ids"]).value
+    truth = labels_from_booleans(dataset.is_malicious())
+    predicted = labels_from_booleans(dataset.ids)
 
     return truth, predicted
+
+
+@contextmanager
+def quiet_metrics(level=logging.ERROR):
+    # Suppress repeated metric warnings (e.g., undefined MCC) when evaluating many
+    # windows or thresholds
+    previous = settings.logger.level
+    settings.logger.setLevel(max(level, previous))
+    try:
+        yield
+    finally:
+        settings.logger.setLevel(previous)
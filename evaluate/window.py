@@ -0,0 +1,109 @@
+import traceback
+
+import numpy as np
+
+import evaluate.settings as settings
+from evaluate.utils import quiet_metrics
+from metrics.alarms import false_positive_alarms, overlapping_alarms
+from metrics.metric import get_alarms
+from metrics.utils import confusion_metrics
+
+
+def _prefix_sum(mask):
+    # prefix[i] is the number of True values before index i
+    return np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+
+
+def window_bounds(timestamp, window, stride):
+    """Time windows [start, start + window) every `stride` seconds, starting with
+    the first message
+
+    Args:
+        timestamp: sorted array of timestamps
+        window: length of each window
+        stride: time between the starts of consecutive windows
+
+    Returns:
+        (start, end) arrays of the window bounds
+    """
+
+    if len(timestamp) == 0:
+        return np.zeros(0), np.zeros(0)
+
+    count = int((timestamp[-1] - timestamp[0]) // stride) + 1
+    start = timestamp[0] + stride * np.arange(count)
+    return start, start + window
+
+
+def evaluate_windows(dataset, truth, predicted, attacks, window, stride=None):
+    """Evaluates the point-based metrics and alarms per time window
+
+    Prefix sums over the label columns yield the confusion matrix of each window
+    in O(1). Metrics derived from the confusion matrix (precision, F-scores, MCC,
+    ...) are evaluated per window by the metric classes. Alarms (TPA/FPA) count
+    for the window they start in.
+
+    Args:
+        dataset: the Dataset (timed and sorted)
+        truth: label array of the ground truth
+        predicted: label array of the IDS classification
+        attacks: the attacks or None
+        window: length of each window
+        stride: time between consecutive windows (Default: window, i.e.,
+            non-overlapping windows)
+
+    Returns:
+        list of metric dicts, one per window
+    """
+
+    stride = stride or window
+    timestamp = dataset.timestamp
+    truth, predicted = np.asarray(truth) != 0, np.asarray(predicted) != 0
+
+    prefix = {
+        "tn": _prefix_sum(~truth & ~predicted),
+        "fp": _prefix_sum(~truth & predicted),
+        "fn": _prefix_sum(truth & ~predicted),
+        "tp": _prefix_sum(truth & predicted),
+    }
+
+    start, end = window_bounds(timestamp, window, stride)
+    first = np.searchsorted(timestamp, start, side="left")
+    stop = np.searchsorted(timestamp, end, side="left")
+    counts = {
+        key: (value[stop] - value[first]).tolist() for key, value in prefix.items()
+    }
+
+    # Alarms are assigned to the window they start in
+    alarm_counts = {}
+    if attacks is not None and len(attacks) > 0:
+        alarms = get_alarms(dataset)
+        alarm_first = np.searchsorted(alarms.start, start, side="left")
+        alarm_stop = np.searchsorted(alarms.start, end, side="left")
+        for name, mask in [
+            ("TPA", overlapping_alarms(alarms, attacks)),
+            ("FPA", false_positive_alarms(alarms, attacks)),
+        ]:
+            alarm_prefix = _prefix_sum(mask)
+            alarm_counts[name] = (
+                alarm_prefix[alarm_stop] - alarm_prefix[alarm_first]
+            ).tolist()
+
+    derived = confusion_metrics()
+    windows = []
+    with quiet_metrics():
+        for i, (window_start, window_end) in enumerate(
+            zip(start.tolist(), end.tolist())
+        ):
+            ergs = {key: value[i] for key, value in counts.items()}
+            for metric in derived:
+                try:
+                    ergs.update(metric.calculate(ergs=ergs))
+                except Exception:  # e.g., a window without messages
+                    settings.logger.debug(traceback.format_exc())
+                    ergs.update({name: None for name in metric.defines()})
+
+            ergs.update({name: value[i] for name, value in alarm_counts.items()})
+            windows.append({"start": window_start, "end": window_end, **ergs})
+
+    return windows
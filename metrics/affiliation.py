@@ -1,10 +1,205 @@
-from affiliation.generics import convert_vector_to_events
-from affiliation.metrics import pr_from_events
+import numpy as np
 
 import evaluate.settings as settings
 
 from .basic_metrics import FScore
-from .metric import Metric
+from .intervals import runs
+from .metric import Metric, sequential_sum
+
+# Events are half-open (start, stop) intervals given as arrays of their starts
+# and stops. This follows https://github.com/ahstat/affiliation-metrics-py in
+# closed form, but for all events at once.
+
+
+def affiliation_zones(start, stop, trange):
+    """Affiliation zones of sorted disjoint events, i.e., the part of the time
+    range closer to an event than to any other event
+
+    Args:
+        start: array of the event starts
+        stop: array of the event stops
+        trange: (begin, end) of the time range containing all events
+
+    Returns:
+        (zone_start, zone_stop) arrays with the zone of each event
+    """
+
+    # Zones are bounded by the midpoints between events, and by the time range
+    # mirrored at the first and last event
+    before = np.append(2 * trange[0] - start[0], stop[:-1])
+    after = np.append(start[1:], 2 * trange[1] - stop[-1])
+    return (before + start) / 2, (stop + after) / 2
+
+
+def _precision_integral(first, last, start, stop, zone_start, zone_stop):
+    # Integral of the precision survival function over pieces [first, last] of
+    # predictions on one side of the ground truth events [start, stop]
+    d_min = np.maximum(first - stop, start - last)
+    d_max = np.maximum(last - stop, start - first)
+    m = np.minimum(start - zone_start, zone_stop - stop)
+
+    min_part = (np.minimum(d_max, m) ** 2 - np.minimum(d_min, m) ** 2) / 2 + m * (
+        np.maximum(d_max, m) - np.maximum(d_min, m)
+    )
+    linear_part = (d_max**2 - d_min**2) / 2
+    remaining_part = (stop - start) * (last - first)
+
+    return (last - first) - (1 / (zone_stop - zone_start)) * (
+        min_part + linear_part + remaining_part
+    )
+
+
+def _recall_integral(first, last, pivot, zone_start, zone_stop):
+    # Integral of the recall survival function over pieces [first, last] of the
+    # ground truth events on one side of the prediction bordered by pivot
+    middle = (zone_start + zone_stop) / 2
+    middle_start = (zone_start + pivot) / 2
+    middle_stop = (zone_stop + pivot) / 2
+
+    def part(low, high):
+        # Length and difference of squares of [first, last] within [low, high]
+        low = np.clip(low, first, last)
+        high = np.maximum(np.clip(high, first, last), low)
+        return high - low, high**2 - low**2
+
+    # Cut at the middle of the zone and the middles between pivot and the zone
+    # borders, where the distance to the pivot exceeds the one to the border
+    length1, square1 = part(first, np.minimum(middle_start, middle))
+    length2, square2 = part(np.minimum(middle_start, middle), middle)
+    length3, square3 = part(middle, np.maximum(middle_stop, middle))
+    length4, square4 = part(np.maximum(middle_stop, middle), last)
+
+    # Integral of min(d, m) + d for the distance d to the pivot and m to the border
+    left = pivot >= last
+    integral = (
+        np.where(
+            left,
+            (pivot - zone_start) * length1,
+            square1 - (zone_start + pivot) * length1,
+        )
+        + np.where(left, 2 * pivot * length2 - square2, square2 - 2 * pivot * length2)
+        + np.where(left, 2 * pivot * length3 - square3, square3 - 2 * pivot * length3)
+        + np.where(
+            left, (zone_stop + pivot) * length4 - square4, (zone_stop - pivot) * length4
+        )
+    )
+
+    inside = (zone_start < pivot) & (pivot < zone_stop)
+    return np.where(
+        inside, (last - first) - (1 / (zone_stop - zone_start)) * integral, 0.0
+    )
+
+
+def pr_from_events(pred_start, pred_stop, gt_start, gt_stop, trange):
+    """Affiliation precision and recall of each ground truth event
+
+    Args:
+        pred_start: array of the starts of sorted disjoint predicted events
+        pred_stop: array of the stops of the predicted events
+        gt_start: array of the starts of sorted disjoint ground truth events
+        gt_stop: array of the stops of the ground truth events
+        trange: (begin, end) of the time range containing all events
+
+    Returns:
+        (precision, recall) arrays with an entry per ground truth event, the
+        precision is NaN for events without any prediction in their zone
+    """
+
+    if len(gt_start) == 0:
+        raise ValueError("Affiliation requires at least one ground truth event")
+
+    zone_start, zone_stop = affiliation_zones(gt_start, gt_stop, trange)
+
+    # Pieces of the predictions within each zone, in the order of their zones
+    low = np.searchsorted(zone_stop, pred_start, side="right")
+    high = np.searchsorted(zone_start, pred_stop, side="left")
+    counts = high - low
+    piece = np.repeat(np.arange(len(counts)), counts)
+    zone = np.repeat(low - np.cumsum(counts) + counts, counts) + np.arange(len(piece))
+    first = np.maximum(pred_start[piece], zone_start[zone])
+    last = np.minimum(pred_stop[piece], zone_stop[zone])
+
+    start, stop = gt_start[zone], gt_stop[zone]
+    e_start, e_stop = zone_start[zone], zone_stop[zone]
+    count = len(gt_start)
+
+    # Precision integrates over the predictions, cut into the parts before, within,
+    # and after the ground truth event
+    integral = (
+        _precision_integral(
+            np.minimum(first, start),
+            np.minimum(last, start),
+            start,
+            stop,
+            e_start,
+            e_stop,
+        )
+        + np.maximum(np.minimum(last, stop) - np.maximum(first, start), 0)
+        + _precision_integral(
+            np.maximum(first, stop),
+            np.maximum(last, stop),
+            start,
+            stop,
+            e_start,
+            e_stop,
+        )
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.bincount(zone, integral, minlength=count) / np.bincount(
+            zone, last - first, minlength=count
+        )
+
+    # Recall integrates over the ground truth event, cut into the parts closest to
+    # each prediction in its zone, i.e., within the zones of the predictions
+    new = np.ones(len(zone), dtype=np.bool_)
+    np.not_equal(zone[1:], zone[:-1], out=new[1:])
+    end = np.append(new[1:], True)
+    cut_start = np.where(
+        new, (2 * e_start - first + first) / 2, (np.roll(last, 1) + first) / 2
+    )
+    cut_stop = np.where(
+        end, (last + (2 * e_stop - last)) / 2, (last + np.roll(first, -1)) / 2
+    )
+    cut_first = np.maximum(start, cut_start)
+    cut_last = np.maximum(np.minimum(stop, cut_stop), cut_first)
+
+    integral = (
+        _recall_integral(
+            np.minimum(cut_first, first),
+            np.minimum(cut_last, first),
+            first,
+            e_start,
+            e_stop,
+        )
+        + np.maximum(np.minimum(cut_last, last) - np.maximum(cut_first, first), 0)
+        + _recall_integral(
+            np.maximum(cut_first, last),
+            np.maximum(cut_last, last),
+            last,
+            e_start,
+            e_stop,
+        )
+    )
+    recall = np.bincount(zone, integral, minlength=count) / (gt_stop - gt_start)
+
+    return precision, recall
+
+
+def events(mask, bounds):
+    """Events of the consecutive True values of a boolean array
+
+    Args:
+        mask: boolean array
+        bounds: array of the time each entry starts, and the end of the last one
+
+    Returns:
+        (start, stop) arrays of the events with a duration
+    """
+
+    first, last = runs(mask)
+    start, stop = bounds[first], bounds[last + 1]
+    duration = stop > start
+    return start[duration], stop[duration]
 
 
 class AffiliationMetric(Metric):
@@ -14,6 +209,7 @@ class AffiliationMetric(Metric):
     _requires_timed_dataset = True
     _requires_attacks = False
     _higher_is_better = True
+    _mergeable = True
 
     @classmethod
     def defines(cls):
@@ -21,6 +217,46 @@ class AffiliationMetric(Metric):
             f"Affiliation-F{beta}" for beta in settings.fscore_betas
         ]
 
+    @classmethod
+    def _bounds(cls, length, dataset):
+        # Each message lasts until the next one, the last one as long as the one
+        # before. Without timestamps, the i-th message is the interval [i, i + 1).
+        if not settings.affiliation_timestamps:
+            return np.arange(length + 1, dtype=np.float64)
+
+        assert dataset is not None
+        timestamps = np.asarray(dataset.timestamp, dtype=np.float64)
+        step = timestamps[-1] - timestamps[-2] if length > 1 else 0
+        return np.append(timestamps, timestamps[-1] + (step if step > 0 else 1))
+
+    @classmethod
+    def _results(cls, pred_start, pred_stop, gt_start, gt_stop, trange):
+        precision, recall = pr_from_events(
+            pred_start, pred_stop, gt_start, gt_stop, trange
+        )
+
+        # Zones without predictions have no precision
+        precision = precision[~np.isnan(precision)]
+        output = {
+            "Affiliation-Precision": (
+                sequential_sum(precision) / len(precision)
+                if len(precision) > 0
+                else np.nan
+            ),
+            "Affiliation-Recall": sequential_sum(recall) / len(recall),
+        }
+
+        fscores = FScore.calculate(
+            ergs={
+                "Precision": output["Affiliation-Precision"],
+                "Recall": output["Affiliation-Recall"],
+            }
+        )
+        for fscore, score in fscores.items():
+            output["Affiliation-{}".format(fscore)] = score
+
+        return output
+
     @classmethod
     def calculate(
         cls,
@@ -32,21 +268,44 @@ class AffiliationMetric(Metric):
     ):
         assert truth is not None and predicted is not None
 
-        # Cf. https://github.com/ahstat/affiliation-metrics-py#usage
-        events_pred = convert_vector_to_events(predicted)
-        events_gt = convert_vector_to_events(truth)
-        Trange = (0, len(predicted))
-        result = pr_from_events(events_pred, events_gt, Trange)
+        bounds = cls._bounds(len(predicted), dataset)
+        pred_start, pred_stop = events(np.asarray(predicted) > 0, bounds)
+        gt_start, gt_stop = events(np.asarray(truth) > 0, bounds)
+        return cls._results(
+            pred_start, pred_stop, gt_start, gt_stop, (bounds[0], bounds[-1])
+        )
 
-        output = {
-            "Affiliation-Precision": result["precision"],
-            "Affiliation-Recall": result["recall"],
+    # Segments keep their events. No event ends at the last message of a segment,
+    # such that events never need to be joined across segments.
+
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        bounds = cls._bounds(len(predicted), dataset)
+        return {
+            "pred": events(np.asarray(predicted) > 0, bounds),
+            "gt": events(np.asarray(truth) > 0, bounds),
+            "trange": (bounds[0], bounds[-1]),
         }
 
-        fscores = FScore.calculate(
-            ergs={"Precision": result["precision"], "Recall": result["recall"]}
-        )
-        for fscore, score in fscores.items():
-            output["Affiliation-{}".format(fscore)] = score
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        # Without timestamps, the segment of the other state starts at index 0
+        shift = 0
+        if not settings.affiliation_timestamps:
+            shift = state["trange"][1] - other["trange"][0]
 
-        return output
+        def concatenate(key):
+            return tuple(
+                np.concatenate([mine, theirs + shift])
+                for mine, theirs in zip(state[key], other[key])
+            )
+
+        return {
+            "pred": concatenate("pred"),
+            "gt": concatenate("gt"),
+            "trange": (state["trange"][0], other["trange"][1] + shift),
+        }
+
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        return cls._results(*state["pred"], *state["gt"], state["trange"])
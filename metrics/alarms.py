@@ -1,8 +1,79 @@
+import numpy as np
+
 import evaluate.settings as settings
 
+from .intervals import AttackIndex
 from .metric import Metric, get_alarms
 
 
+# Test which alarms overlap with at least a single attack
+def overlapping_alarms(alarms, attacks):
+    index = AttackIndex.of(attacks)
+    return index.overlaps(alarms.start, alarms.end, settings.alarm_gracetime)
+
+
+# Mark the alarms counted as false positive alarms
+def false_positive_alarms(alarms, attacks):
+    counted = ~overlapping_alarms(alarms, attacks)
+    rows = np.flatnonzero(counted)
+
+    # Alarms with identical (start, end) timestamps count once. Alarms are in
+    # chronological order, such that duplicates are adjacent.
+    start, end = alarms.start[rows], alarms.end[rows]
+    duplicate = (start[1:] == start[:-1]) & (end[1:] == end[:-1])
+    counted[rows[1:][duplicate]] = False
+    return counted
+
+
+# Streaming: track the open alarm and count closed alarms
+def _init_alarm_state():
+    return {"alarm": None, "tpa": 0, "fpa": 0, "last_fpa": None}
+
+
+def _update_alarm_state(state, js, attacks):
+    if js["ids"]:
+        start = js["timestamp"] if state["alarm"] is None else state["alarm"][0]
+        state["alarm"] = (start, js["timestamp"])
+    elif state["alarm"] is not None:
+        _close_alarm(state, attacks)
+
+
+def _close_alarm(state, attacks):
+    start, end = state["alarm"]
+    index = AttackIndex.of(attacks)
+    if index.overlaps([start], [end], settings.alarm_gracetime)[0]:
+        state["tpa"] += 1
+    elif state["last_fpa"] != (start, end):  # identical alarms count once
+        state["fpa"] += 1
+        state["last_fpa"] = (start, end)
+    state["alarm"] = None
+
+
+def _alarm_counts(state, attacks):
+    # (TPA, FPA) including the still open alarm
+    if state["alarm"] is not None:
+        state = dict(state)
+        _close_alarm(state, attacks)
+    return state["tpa"], state["fpa"]
+
+
+# Segments: no alarm is open at the end of a segment, such that the alarms of
+# consecutive segments add up
+def _partial_alarm_state(dataset, attacks):
+    alarms = get_alarms(dataset)
+    state = _init_alarm_state()
+    state["tpa"] = int(np.count_nonzero(overlapping_alarms(alarms, attacks)))
+    state["fpa"] = int(np.count_nonzero(false_positive_alarms(alarms, attacks)))
+    return state
+
+
+def _merge_alarm_states(state, other):
+    merged = _init_alarm_state()
+    merged["tpa"] = state["tpa"] + other["tpa"]
+    merged["fpa"] = state["fpa"] + other["fpa"]
+    return merged
+
+
 class TruePositiveAlarms(Metric):
     _name = "TPA"
     _description = "True positive alarms (TPA) counts the number of continuous alarms that overlap with at least a single attack."
@@ -10,6 +81,8 @@ class TruePositiveAlarms(Metric):
     _requires_timed_dataset = True
     _requires_attacks = True
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -21,18 +94,29 @@ class TruePositiveAlarms(Metric):
         ergs=None,
     ):
         assert dataset is not None and attacks is not None
-        count = 0
+        count = np.count_nonzero(overlapping_alarms(get_alarms(dataset), attacks))
+
+        return {cls._name: int(count)}
 
-        for start, end in get_alarms(dataset):
-            for attack in attacks:
-                if (
-                    start <= attack["end"] + settings.alarm_gracetime
-                    and end >= attack["start"] - settings.alarm_gracetime
-                ):  # any overlap
-                    count += 1
-                    break
+    @classmethod
+    def init_state(cls, attacks=None):
+        return _init_alarm_state()
+
+    @classmethod
+    def update(cls, state, js, attacks=None):
+        _update_alarm_state(state, js, attacks)
+
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        return _partial_alarm_state(dataset, attacks)
 
-        return {cls._name: count}
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        return _merge_alarm_states(state, other)
+
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        return {cls._name: _alarm_counts(state, attacks)[0]}
 
 
 class FalsePositiveAlarms(Metric):
@@ -42,6 +126,8 @@ class FalsePositiveAlarms(Metric):
     _requires_timed_dataset = True
     _requires_attacks = True
     _higher_is_better = False
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -53,15 +139,26 @@ class FalsePositiveAlarms(Metric):
         ergs=None,
     ):
         assert dataset is not None and attacks is not None
-        fpa = set(get_alarms(dataset))
-
-        for start, end in get_alarms(dataset):
-            for attack in attacks:
-                if (
-                    start <= attack["end"] + settings.alarm_gracetime
-                    and end >= attack["start"] - settings.alarm_gracetime
-                ):  # any overlap
-                    fpa.remove((start, end))
-                    break
-
-        return {cls._name: len(fpa)}
+        count = np.count_nonzero(false_positive_alarms(get_alarms(dataset), attacks))
+
+        return {cls._name: int(count)}
+
+    @classmethod
+    def init_state(cls, attacks=None):
+        return _init_alarm_state()
+
+    @classmethod
+    def update(cls, state, js, attacks=None):
+        _update_alarm_state(state, js, attacks)
+
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        return _partial_alarm_state(dataset, attacks)
+
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        return _merge_alarm_states(state, other)
+
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        return {cls._name: _alarm_counts(state, attacks)[1]}
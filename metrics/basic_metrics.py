@@ -1,7 +1,6 @@
-from sklearn.metrics import confusion_matrix
-
 import evaluate.settings as settings
 
+from .confusion import confusion_counts
 from .metric import Metric
 
 
@@ -12,6 +11,8 @@ class Confusion(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = False
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def defines(cls):
@@ -28,15 +29,38 @@ class Confusion(Metric):
     ):
         assert truth is not None and predicted is not None
 
-        tn, fp, fn, tp = confusion_matrix(truth, predicted, labels=[0, 1]).ravel()
+        tn, fp, fn, tp = confusion_counts(truth, predicted).tolist()
 
         return {
-            "tn": int(tn),
-            "fp": int(fp),
-            "fn": int(fn),
-            "tp": int(tp),
+            "tn": tn,
+            "fp": fp,
+            "fn": fn,
+            "tp": tp,
         }
 
+    @classmethod
+    def init_state(cls, attacks=None):
+        return {"tn": 0, "fp": 0, "fn": 0, "tp": 0}
+
+    @classmethod
+    def update(cls, state, js, attacks=None):
+        if js["ids"]:
+            state["tp" if js["malicious"] else "fp"] += 1
+        else:
+            state["fn" if js["malicious"] else "tn"] += 1
+
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        return dict(state)
+
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        return cls.calculate(truth, predicted)
+
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        return {key: state[key] + other[key] for key in state}
+
 
 class Accuracy(Metric):
     _name = "Accuracy"
@@ -45,6 +69,8 @@ class Accuracy(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -67,6 +93,8 @@ class Precision(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -89,6 +117,8 @@ class InversePrecision(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -111,6 +141,8 @@ class Recall(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -133,6 +165,8 @@ class InverseRecall(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -155,6 +189,8 @@ class Fallout(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = False
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -180,6 +216,8 @@ class MissRate(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = False
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -203,6 +241,8 @@ class Informedness(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -225,6 +265,8 @@ class Markedness(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -247,6 +289,8 @@ class FScore(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def defines(cls):
@@ -1,6 +1,9 @@
+import numpy as np
+
 import evaluate.settings as settings
 
-from .metric import Metric
+from .intervals import Runs
+from .metric import Metric, get_alarms, sequential_sum
 
 
 # https://par.nsf.gov/servlets/purl/10104860
@@ -14,6 +17,7 @@ class BatadalTTD(Metric):
     _requires_timed_dataset = True
     _requires_attacks = True
     _higher_is_better = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -25,47 +29,67 @@ class BatadalTTD(Metric):
         ergs=None,
     ):
         assert dataset is not None
-        attackCount = 0
-        score = 0
-
-        attack_start = None
-        prev_timestamp = None
-        detection = None
+        ttd = cls._ttd(dataset)
 
-        for d in dataset:
-            if attack_start is None and d["malicious"]:  # Start of attack
-                attack_start = d["timestamp"]
-                detection = None
+        return {cls._name: 1 - sequential_sum(ttd) / len(ttd)}
 
-            elif attack_start is not None and not d["malicious"]:  # End of attack
-                if prev_timestamp == attack_start:  # attack only one timestep
-                    score += 0 if detection else 1
-                else:
-                    if (
-                        detection is None
-                    ):  # attack not detected. Assign maximum TTD (cf paper)
-                        detection = prev_timestamp
+    @classmethod
+    def _ttd(cls, dataset, detection=None):
+        # Normalized time to detection of each attack. The first alarm at or after
+        # the start of each attack may be given instead of taken from the dataset's
+        # alarms (e.g., by evaluate.sweep).
+        timestamps = dataset.timestamp
+
+        # Attacks are runs of malicious entries, detected by their first alarm
+        malicious = Runs.of(dataset, "malicious")
+        first, last = malicious.select(malicious.value != 0)
+        if detection is None:
+            detection = get_alarms(dataset).first_from(first)
+        detected = detection <= last
+
+        # An attack that lasts until the end of the dataset is scored separately
+        final = len(first) > 0 and last[-1] == len(timestamps) - 1
+        if final:
+            final_first, final_last = first[-1], last[-1]
+            final_detection = detection[-1] if detected[-1] else final_last
+            first, last = first[:-1], last[:-1]
+            detection, detected = detection[:-1], detected[:-1]
+
+        attack_start, attack_end = timestamps[first], timestamps[last]
+        detection_time = timestamps[np.where(detected, detection, last)]
+        single = attack_end == attack_start  # attack only one timestep
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Undetected attacks are assigned the maximum TTD (cf paper)
+            ttd = (detection_time - attack_start) / (attack_end - attack_start)
+        undetected = ~detected | (detection_time == 0)
+        ttd = np.where(single, undetected.astype(np.float64), ttd)
 
-                    ttd = detection - attack_start
-                    score += ttd / (prev_timestamp - attack_start)
+        # End of dataset
+        if final:
+            attack_start = timestamps[final_first].item()
+            final_ttd = timestamps[final_detection].item() - attack_start
+            ttd = np.append(
+                ttd, final_ttd / (timestamps[final_last].item() - attack_start)
+            )
 
-                attack_start = None
-                attackCount += 1
+        return ttd
 
-            if d["ids"] and detection is None:  # Store earliest detection
-                detection = d["timestamp"]
-            prev_timestamp = d["timestamp"]
+    # Attacks lie within a single segment, such that the time to detection of
+    # each attack is known from its segment
 
-        # End of dataset
-        if attack_start is not None:
-            if detection is None:
-                detection = prev_timestamp
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        return {"ttd": cls._ttd(dataset)}
 
-            ttd = detection - attack_start
-            score += ttd / (prev_timestamp - attack_start)
-            attackCount += 1
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        return {"ttd": np.concatenate([state["ttd"], other["ttd"]])}
 
-        return {cls._name: 1 - score / attackCount}
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        ttd = state["ttd"]
+        return {cls._name: 1 - sequential_sum(ttd) / len(ttd)}
 
 
 class BatadalCLF(Metric):
@@ -76,6 +100,8 @@ class BatadalCLF(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -100,6 +126,7 @@ class Batadal(Metric):
     _requires_timed_dataset = True
     _requires_attacks = True
     _higher_is_better = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -0,0 +1,69 @@
+import numpy as np
+
+# Column order of confusion counts, as defined by the Confusion metric
+CONFUSION = ["tn", "fp", "fn", "tp"]
+
+
+def confusion_counts(truth, predicted):
+    """Counts the confusion matrix of binary labels
+
+    Args:
+        truth: label array of the ground truth (non-zero is malicious)
+        predicted: label array of the IDS classification (non-zero is an alarm)
+
+    Returns:
+        int64 array [tn, fp, fn, tp]
+    """
+
+    return batch_confusion(truth, np.asarray(predicted)[np.newaxis, :])[0]
+
+
+def batch_confusion(truth, predicted):
+    """Counts the confusion matrices of many classifications of the same messages,
+    e.g., of individual IDSs
+
+    Args:
+        truth: label array of the ground truth with N messages
+        predicted: (M, N) array of M classifications
+
+    Returns:
+        (M, 4) int64 array, one [tn, fp, fn, tp] row per classification
+    """
+
+    truth = np.asarray(truth) != 0
+    predicted = np.asarray(predicted) != 0
+
+    positives = np.count_nonzero(truth)
+    tp = np.count_nonzero(predicted & truth, axis=1)
+    fp = np.count_nonzero(predicted, axis=1) - tp
+    fn = positives - tp
+    tn = truth.size - positives - fp
+    return np.stack([tn, fp, fn, tp], axis=1).astype(np.int64)
+
+
+def threshold_confusion(truth, score, thresholds):
+    """Counts the confusion matrices of a score for many thresholds at once.
+    Messages with a score >= threshold are classified as alarms.
+
+    Args:
+        truth: label array of the ground truth
+        score: float64 array of scores
+        thresholds: array of M thresholds
+
+    Returns:
+        (M, 4) int64 array, one [tn, fp, fn, tp] row per threshold
+    """
+
+    truth = np.asarray(truth) != 0
+    positives = np.count_nonzero(truth)
+    tp = count_at_least(score[truth], thresholds)
+    fp = count_at_least(score[~truth], thresholds)
+    fn = positives - tp
+    tn = len(truth) - positives - fp
+    return np.stack([tn, fp, fn, tp], axis=1).astype(np.int64)
+
+
+def count_at_least(values, thresholds):
+    # Number of values >= each threshold
+    values = np.sort(values)
+    return len(values) - np.searchsorted(values, thresholds, side="left")
@@ -0,0 +1,267 @@
+import numpy as np
+
+
+def runs(mask):
+    """Run-length encodes the consecutive True values of a boolean array
+
+    Args:
+        mask: boolean array
+
+    Returns:
+        (first, last) arrays with the first and last index of each run
+    """
+
+    change = np.diff(np.asarray(mask).astype(np.int8), prepend=0, append=0)
+    return np.flatnonzero(change == 1), np.flatnonzero(change == -1) - 1
+
+
+class Runs:
+    """Run-length encoding of a column of the dataset, i.e., the maximal runs of
+    consecutive messages with equal values
+
+    Attributes:
+        first: row of the first message of each run
+        last: row of the last message of each run
+        length: number of messages of each run
+        value: value of each run
+        start: timestamp of the first message (None for untimed datasets)
+        end: timestamp of the last message (None for untimed datasets)
+    """
+
+    def __init__(self, values, timestamps=None):
+        values = np.asarray(values)
+        change = np.ones(len(values), dtype=np.bool_)
+        np.not_equal(values[1:], values[:-1], out=change[1:])
+
+        self.first = np.flatnonzero(change)
+        self.last = np.append(self.first[1:], len(values))[: len(self.first)] - 1
+        self.length = self.last - self.first + 1
+        self.value = values[self.first]
+
+        if timestamps is not None:
+            self.start = timestamps[self.first]
+            self.end = timestamps[self.last]
+        else:
+            self.start = self.end = None
+
+    def __len__(self):
+        return len(self.first)
+
+    @classmethod
+    def of(cls, dataset, column):
+        """Run-length encoding of a column, computed once per dataset
+
+        Args:
+            dataset: the Dataset
+            column: 'ids' or 'malicious' (runs of equal label codes)
+
+        Returns:
+            the Runs
+        """
+
+        return dataset.cached(
+            "runs-" + column, lambda d: cls(getattr(d, column), d.timestamp)
+        )
+
+    def select(self, mask):
+        """Merges consecutive runs selected by a mask over the runs
+
+        Args:
+            mask: boolean array with an entry per run
+
+        Returns:
+            (first, last) arrays with the first and last row of each merged run
+        """
+
+        first, last = runs(mask)
+        return self.first[first], self.last[last]
+
+
+def uncovered(first, last, cover_first, cover_stop):
+    """Splits intervals of rows at rows covered by other intervals
+
+    Args:
+        first: sorted array of the first rows of disjoint intervals
+        last: array of the last rows of these intervals
+        cover_first: array of the first rows of covering intervals sorted by it
+        cover_stop: array of the rows after these intervals (may overlap)
+
+    Returns:
+        (first, last) arrays of the pieces of the intervals not covered
+    """
+
+    if len(first) == 0:
+        return first, last
+
+    bounds = np.unique(np.concatenate((first, last + 1, cover_first, cover_stop)))
+    piece_first, piece_stop = bounds[:-1], bounds[1:]
+
+    # Pieces within any interval, yet not within any covering interval
+    k = np.searchsorted(first, piece_first, side="right") - 1
+    inside = (k >= 0) & (piece_first <= last[np.maximum(k, 0)])
+    if len(cover_first) > 0:
+        j = np.searchsorted(cover_first, piece_first, side="right") - 1
+        reach = np.maximum.accumulate(cover_stop)[np.maximum(j, 0)]
+        inside &= (j < 0) | (piece_first >= reach)
+
+    return piece_first[inside], piece_stop[inside] - 1
+
+
+class AttackIndex:
+    """Interval index over the timed attacks (with 'start' and 'end') of an attack
+    file. Attacks are kept sorted by their start as sorted start/end arrays, which
+    are queried with np.searchsorted. Overlapping attacks are supported.
+
+    Attributes:
+        attacks: the timed attacks sorted by start
+        position: index of each sorted attack in the original attack list
+        ids: attack ids in sorted order
+        start: sorted start timestamps
+        end: end timestamps in the order of start
+    """
+
+    _cache = None  # (attacks, index) of the most recently indexed attack list
+
+    def __init__(self, attacks):
+        timed = [
+            (i, att) for i, att in enumerate(attacks) if "start" in att and "end" in att
+        ]
+        timed.sort(key=lambda x: x[1]["start"])  # stable for equal starts
+
+        self.attacks = [att for _, att in timed]
+        self.position = np.array([i for i, _ in timed], dtype=np.int64)
+        self.ids = [att["id"] for att in self.attacks]
+        self.start = np.array([att["start"] for att in self.attacks])
+        self.end = np.array([att["end"] for att in self.attacks])
+
+        # Latest end among all attacks starting before or with the i-th attack
+        self._max_end = np.maximum.accumulate(self.end) if len(self) > 0 else self.end
+
+    def __len__(self):
+        return len(self.attacks)
+
+    @classmethod
+    def of(cls, attacks):
+        # Reuse the index if the same attack list is queried by multiple metrics
+        if cls._cache is None or cls._cache[0] is not attacks:
+            cls._cache = (attacks, cls(attacks))
+        return cls._cache[1]
+
+    def overlaps(self, start, end, gracetime=0):
+        """Tests for each interval whether it overlaps with any attack
+
+        Args:
+            start: array of interval starts (in any order)
+            end: array of interval ends
+            gracetime: extends every attack by this time in both directions
+
+        Returns:
+            boolean array, True if start <= attack end + gracetime and
+            end >= attack start - gracetime for at least one attack
+        """
+
+        start, end = np.asarray(start), np.asarray(end)
+        if len(self) == 0:
+            return np.zeros(len(start), dtype=np.bool_)
+
+        # Last attack starting before the interval ends and the latest end up to it
+        k = np.searchsorted(self.start - gracetime, end, side="right")
+        max_end = self._max_end[np.maximum(k - 1, 0)] + gracetime
+        return (k > 0) & (start <= max_end)
+
+    def covered(self, timestamps, gracetime=0):
+        """Tests for each timestamp whether it lies within any attack
+
+        Args:
+            timestamps: array of timestamps (in any order)
+            gracetime: extends every attack by this time in both directions
+
+        Returns:
+            boolean array, True if start - gracetime <= timestamp <= end + gracetime
+            for at least one attack
+        """
+
+        return self.overlaps(timestamps, timestamps, gracetime)
+
+    def rows(self, timestamps, gracetime=0):
+        """Maps each attack to the rows of a chronologically sorted dataset
+
+        Args:
+            timestamps: sorted array of timestamps
+            gracetime: extends every attack by this time in both directions
+
+        Returns:
+            (first, stop) arrays, the rows first[i] to stop[i] - 1 lie within the
+            i-th (sorted) attack
+        """
+
+        first = np.searchsorted(timestamps, self.start - gracetime, side="left")
+        stop = np.searchsorted(timestamps, self.end + gracetime, side="right")
+        return first, stop
+
+    def hits(self, timestamps, gracetime=0):
+        """Tests for each attack whether any of the timestamps lies within it
+
+        Args:
+            timestamps: array of timestamps (in any order)
+            gracetime: extends every attack by this time in both directions
+
+        Returns:
+            boolean array in the order of the sorted attacks
+        """
+
+        timestamps = np.asarray(timestamps)
+        if len(timestamps) > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+            timestamps = np.sort(timestamps)
+
+        first, stop = self.rows(timestamps, gracetime)
+        return stop > first
+
+
+class AlarmIntervals:
+    """Consecutive alarms of the IDS, i.e., runs of messages with `ids` set
+
+    Attributes:
+        rows: rows of all alarm messages
+        first: row of the first message of each alarm
+        last: row of the last message of each alarm
+        start: timestamp of the first message (None for untimed datasets)
+        end: timestamp of the last message (None for untimed datasets)
+    """
+
+    def __init__(self, dataset):
+        self._ids = dataset.ids
+        ids = Runs.of(dataset, "ids")
+        alarm = ids.value.astype(np.bool_)
+        self.first, self.last = ids.first[alarm], ids.last[alarm]
+
+        if ids.start is not None:
+            self.start, self.end = ids.start[alarm], ids.end[alarm]
+        else:
+            self.start = self.end = None
+
+    @property
+    def rows(self):
+        # Materialized on demand, e.g., by metrics scoring individual alarm messages
+        return np.flatnonzero(self._ids)
+
+    def first_from(self, rows):
+        """First alarm message at or after each row
+
+        Args:
+            rows: array of rows
+
+        Returns:
+            array of alarm message rows, the number of messages if there is none
+        """
+
+        k = np.searchsorted(self.last, rows, side="left")
+        first = np.append(self.first, len(self._ids))[k]
+        return np.maximum(first, np.where(k < len(self), rows, 0))
+
+    def __len__(self):
+        return len(self.first)
+
+    def __iter__(self):
+        # (start, end) tuples of all alarms
+        return zip(self.start.tolist(), self.end.tolist())
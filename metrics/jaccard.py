@@ -10,6 +10,8 @@ class JaccardIndex(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -40,6 +42,8 @@ class JaccardDistance(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = False
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -12,6 +12,8 @@ class MCC(Metric):
     _requires_timed_dataset = False
     _requires_attacks = False
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -1,5 +1,9 @@
+import numpy as np
+
 import evaluate.settings as settings
 
+from .intervals import AlarmIntervals
+
 
 class Metric:
     _name = ""  # the name of the metric
@@ -8,6 +12,8 @@ class Metric:
     _requires_timed_dataset = False  # whether the metric requires a timed dataset
     _requires_attacks = False  # whether the metric requires the attack file
     _higher_is_better = True  # is a higher score in that metric better?
+    _streaming = False  # can the metric be evaluated on a stream of messages?
+    _mergeable = False  # can the metric be evaluated on segments of the dataset?
 
     @classmethod
     def defines(cls):
@@ -61,30 +67,55 @@ class Metric:
         raise NotImplementedError
         # return {cls._name: the-score}
 
+    # Streaming protocol: metrics supporting streams (see _streaming) either keep a
+    # state that is updated message by message, or only derive from the results of
+    # other metrics, in which case finalize falls back to calculate.
 
-# Helper
+    @classmethod
+    def init_state(cls, attacks=None):
+        # Initial state of the metric, None if no state is required
+        return None
 
+    @classmethod
+    def update(cls, state, js, attacks=None):
+        # Update the state with the next IPAL message (in chronological order)
+        raise NotImplementedError
 
-# Get start and end of consecutive alarms as tuples
-def get_alarms(dataset):
-    alarms = []
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        # Results for all messages seen so far. Must not alter the state, such that
+        # the stream can be continued afterwards.
+        return cls.calculate(attacks=attacks, ergs=ergs)
+
+    # Segment protocol: metrics supporting segments (see _mergeable) compute a
+    # partial state of each segment of the dataset, which merge into the state of
+    # the whole dataset, and finalize turns into results. Segments are split where
+    # the preceding message is neither malicious nor an alarm and no attack is
+    # ongoing (cf. evaluate.segments). Metrics without a state only derive from
+    # the results of other metrics.
 
-    START = None
-    END = None
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        # State of a segment, None if no state is required
+        return None
+
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        # State of a segment followed by the segment of the other state
+        return None
 
-    for d in dataset:
-        if d["ids"]:  # IDS Alarm
-            END = d["timestamp"]
-            if START is None:
-                START = d["timestamp"]
 
-        else:
-            if START is not None:
-                alarms.append((START, END))
-                START = None
-                END = None
+# Helper
 
-    if START is not None:  # Add alarm, which is not finished at the end
-        alarms.append((START, END))
 
-    return alarms
+# Sum values in order like a python loop would (np.sum sums pairwise). Returns the
+# integer 0 if there is nothing to sum.
+def sequential_sum(values):
+    if len(values) == 0:
+        return 0
+    return np.cumsum(values)[-1].item()
+
+
+# Get start and end of consecutive alarms (computed once per dataset)
+def get_alarms(dataset):
+    return dataset.cached("alarms", AlarmIntervals)
@@ -1,9 +1,17 @@
-from math import exp, inf
-from typing import Any, Dict, List
+from math import exp
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
 
 import evaluate.settings as settings
+from evaluate.dataset import Dataset
+
+from .metric import Metric, get_alarms
+from .registry import nab_suffix
 
-from .metric import Metric
+# Number of alarms searched for the next true positive at once, doubled while
+# there is none
+BLOCKSIZE = 1024
 
 
 class Nab(Metric):
@@ -12,6 +20,8 @@ class Nab(Metric):
     _requires = ["Detected-Scenarios"]
     _requires_timed_dataset = True
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def _sigma(cls, relative_distance) -> float:
@@ -20,18 +30,27 @@ class Nab(Metric):
             return -1
         return 2 * (1 / (1 + exp(5 * relative_distance))) - 1
 
+    @classmethod
+    def _sigmas(cls, relative_distance: np.ndarray) -> np.ndarray:
+        # _sigma of an array of relative distances
+        capped = np.minimum(relative_distance, 10)
+        return np.where(
+            relative_distance >= 10, -1.0, 2 * (1 / (1 + np.exp(5 * capped))) - 1
+        )
+
     @classmethod
     def defines(cls) -> List[str]:
-        return ["NAB-score-default, NAB-score-low-fp, NAB-score-low-fn"]
+        return [
+            "NAB-score-{}".format(nab_suffix(name)) for name in settings.nab_profiles
+        ]
 
     @classmethod
-    def _relative_pos(cls, entry: Dict[str, Any], attack: Dict[str, Any]) -> float:
+    def _relative_pos(cls, t: float, attack: Dict[str, Any]) -> float:
         # relative position as calculated in the NAB project
         # negative position is off-by-one in that the computed position can
         # never be 0, but is instead 1 / window_len at the right-most position
         w_end = attack["end"]
         w_start = attack["start"]
-        t = entry["timestamp"]
 
         if t <= w_end:
             return (t - w_end - 1) / (w_end - w_start + 1)
@@ -39,66 +58,73 @@ class Nab(Metric):
         return (t - w_end) / (w_end - w_start) if w_end - w_start != 0 else t - w_end
 
     @classmethod
-    def _compute_scores(
+    def _score_alarm(
         cls,
+        state: Dict[str, Any],
         scores: Dict[str, Dict[str, float]],
-        dataset: List[Dict],
+        timestamp: float,
         attacks: List[Dict],
         profiles: Dict[str, Dict],
+    ) -> None:
+        # Scores the next alarm in chronological order, state keeps the position
+        # within the attacks and the entries to ignore after a true positive
+        if timestamp <= state["ignore_until"]:
+            return
+        # find the earliest attack that starts after the current timestamp (false positive)
+        # or ends before the current timestamp (true positive)
+        a_index = state["a_index"]
+        while a_index < len(attacks):
+            if attacks[a_index]["start"] > timestamp:
+                a_index -= 1
+                break
+            else:
+                if attacks[a_index]["end"] >= timestamp:
+                    break
+            a_index += 1
+
+        if a_index < 0:
+            # no attack before the alarm, scored as false positive with maximal penality
+            for name, profile in profiles.items():
+                scores[name]["raw"] += profile["nab_afp"]
+            state["a_index"] = 0
+            return
+        else:
+            # handle false positives after the last attack
+            a_index = min(len(attacks) - 1, a_index)
+
+        attack = attacks[a_index]
+        rel_pos = cls._relative_pos(timestamp, attack)
+        if rel_pos <= 0:
+            # true positive: the alarm is before the end of the attack
+            # ignore all following entries until the furthest end of all detected attacks so far,
+            # or the start of the following attack if it overlaps with the current attack
+            state["max_end"] = max(attack["end"], state["max_end"])
+            state["ignore_until"] = state["max_end"]
+            if (
+                a_index + 1 < len(attacks)
+                and state["ignore_until"] >= attacks[a_index + 1]["start"]
+            ):
+                state["ignore_until"] = attacks[a_index + 1]["start"] - 1
+                a_index += 1
+            score = cls._sigma(rel_pos) / cls._sigma(-1.0)
+            for name, profile in profiles.items():
+                scores[name]["raw"] += score * profile["nab_atp"]
+        else:
+            # false positive: sigmoidally increasing penality for missing the attack
+            score = abs(cls._sigma(rel_pos))
+            for name, profile in profiles.items():
+                scores[name]["raw"] += score * profile["nab_afp"]
+
+        state["a_index"] = a_index
+
+    @classmethod
+    def _normalize(
+        cls,
+        scores: Dict[str, Dict[str, float]],
+        profiles: Dict[str, Dict],
         scenario_count: int,
         false_negatives: int,
     ) -> Dict[str, Dict[str, float]]:
-        ignore_until = 0
-        a_index = 0
-        max_end = 0
-        for entry in dataset:
-            if entry["ids"]:
-                if entry["timestamp"] <= ignore_until:
-                    continue
-                # find the earliest attack that starts after the current timestamp (false positive)
-                # or ends before the current timestamp (true positive)
-                while a_index < len(attacks):
-                    if attacks[a_index]["start"] > entry["timestamp"]:
-                        a_index -= 1
-                        break
-                    else:
-                        if attacks[a_index]["end"] >= entry["timestamp"]:
-                            break
-                    a_index += 1
-
-                if a_index < 0:
-                    # no attack before the alarm, scored as false positive with maximal penality
-                    for name, profile in profiles.items():
-                        scores[name]["raw"] += profile["nab_afp"]
-                    a_index = 0
-                    continue
-                else:
-                    # handle false positives after the last attack
-                    a_index = min(len(attacks) - 1, a_index)
-
-                attack = attacks[a_index]
-                rel_pos = cls._relative_pos(entry, attack)
-                if rel_pos <= 0:
-                    # true positive: the alarm is before the end of the attack
-                    # ignore all following entries until the furthest end of all detected attacks so far,
-                    # or the start of the following attack if it overlaps with the current attack
-                    max_end = max(attack["end"], max_end)
-                    ignore_until = max_end
-                    if (
-                        a_index + 1 < len(attacks)
-                        and ignore_until >= attacks[a_index + 1]["start"]
-                    ):
-                        ignore_until = attacks[a_index + 1]["start"] - 1
-                        a_index += 1
-                    score = cls._sigma(rel_pos) / cls._sigma(-1.0)
-                    for name, profile in profiles.items():
-                        scores[name]["raw"] += score * profile["nab_atp"]
-                else:
-                    # false positive: sigmoidally increasing penality for missing the attack
-                    score = abs(cls._sigma(rel_pos))
-                    for name, profile in profiles.items():
-                        scores[name]["raw"] += score * profile["nab_afp"]
-
         for name, profile in profiles.items():
             scores[name]["raw"] += profile["nab_afn"] * false_negatives
             scores[name]["null"] = profile["nab_afn"] * scenario_count
@@ -111,6 +137,212 @@ class Nab(Metric):
 
         return scores
 
+    @classmethod
+    def _govern(
+        cls, timestamps: np.ndarray, start: List, end: List
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Vectorized equivalent of calling _score_alarm for the chronologically
+        # sorted alarm timestamps and attacks sorted by start. Returns the attack
+        # governing each alarm (-1 before any attack), whether it is a true
+        # positive, and whether it is scored at all (i.e., not ignored).
+        starts, ends = np.asarray(start), np.asarray(end)
+
+        # Last attack starting before each alarm, governs false positives
+        governing = np.searchsorted(starts, timestamps, side="right") - 1
+        positive = np.zeros(len(timestamps), dtype=np.bool_)
+        scored = np.ones(len(timestamps), dtype=np.bool_)
+
+        # A true positive detects the first attack since 'first' that did not end
+        # yet. Only these change the state, which is replayed one at a time.
+        first, ignore_until, max_end = 0, 0, 0
+        reach = np.maximum.accumulate(ends)  # latest end of attacks since 'first'
+        pos, blocksize = 0, BLOCKSIZE
+
+        while pos < len(timestamps):
+            skip = np.searchsorted(timestamps, ignore_until, side="right")
+            if skip > pos:
+                scored[pos:skip] = False
+                pos = skip
+                continue
+
+            stop = min(pos + blocksize, len(timestamps))
+            block = timestamps[pos:stop]
+            detects = first + np.searchsorted(reach, block, side="left")
+            if first > 0:
+                # Alarms before the start of the following attack (but after
+                # ignore_until) detect the overlapping attack once more
+                again = (governing[pos:stop] == first - 1) & (block <= end[first - 1])
+                detects[again] = first - 1
+            hits = detects <= governing[pos:stop]
+            if not hits.any():
+                pos, blocksize = stop, 2 * blocksize
+                continue
+
+            i = int(np.argmax(hits))
+            a_index = int(detects[i])
+            pos, blocksize = pos + i, BLOCKSIZE
+            governing[pos] = a_index
+            positive[pos] = True
+
+            # Ignore entries until the end of the detected attacks, or the start of
+            # the following attack if it overlaps
+            max_end = max(end[a_index], max_end)
+            ignore_until = max_end
+            if a_index + 1 < len(start) and ignore_until >= start[a_index + 1]:
+                ignore_until = start[a_index + 1] - 1
+                first = a_index + 1
+                reach = np.maximum.accumulate(ends[first:])
+            pos += 1
+
+        return governing, positive, scored
+
+    @classmethod
+    def _weights(cls, timestamps: np.ndarray, attacks: List[Dict]) -> np.ndarray:
+        # Weights of all alarms as (true positive, false positive) rows, scaling the
+        # nab_atp and nab_afp of a profile, respectively
+        start = [att["start"] for att in attacks]
+        end = [att["end"] for att in attacks]
+        governing, positive, scored = cls._govern(timestamps, start, end)
+
+        timestamps, governing = timestamps[scored], governing[scored]
+        positive = positive[scored]
+        w_start = np.asarray(start)[governing]
+        w_end = np.asarray(end)[governing]
+
+        # Relative positions like _relative_pos
+        length = w_end - w_start
+        relative = np.where(
+            positive,
+            (timestamps - w_end - 1) / (length + 1),
+            np.divide(
+                timestamps - w_end,
+                length,
+                out=(timestamps - w_end).astype(np.float64),
+                where=length != 0,
+            ),
+        )
+
+        weights = np.zeros((len(timestamps), 2))
+        sigmas = cls._sigmas(relative)
+        weights[positive, 0] = sigmas[positive] / cls._sigma(-1.0)
+        weights[~positive, 1] = np.where(governing < 0, 1.0, np.abs(sigmas))[~positive]
+        return weights
+
+    @classmethod
+    def _compute_scores(
+        cls,
+        scores: Dict[str, Dict[str, float]],
+        dataset: Dataset,
+        attacks: List[Dict],
+        profiles: Dict[str, Dict],
+        scenario_count: int,
+        false_negatives: int,
+    ) -> Dict[str, Dict[str, float]]:
+        cls._score_alarms(scores, dataset, attacks, profiles)
+        return cls._normalize(scores, profiles, scenario_count, false_negatives)
+
+    @classmethod
+    def _score_alarms(
+        cls,
+        scores: Dict[str, Dict[str, float]],
+        dataset: Dataset,
+        attacks: List[Dict],
+        profiles: Dict[str, Dict],
+    ) -> None:
+        # Adds the raw scores of all alarms
+        alarms = get_alarms(dataset)
+        timestamps = np.asarray(dataset.timestamp)[alarms.rows]
+        starts = np.array([att["start"] for att in attacks])
+
+        if np.any(starts[1:] < starts[:-1]) or np.any(timestamps[1:] < timestamps[:-1]):
+            # The vectorized kernel requires chronological order
+            state = {"ignore_until": 0, "a_index": 0, "max_end": 0}
+            for timestamp in timestamps.tolist():
+                cls._score_alarm(state, scores, timestamp, attacks, profiles)
+            return
+
+        # All profiles at once, (alarms x 2) weights times (2 x profiles) rewards
+        rewards = np.array(
+            [
+                [profile["nab_atp"] for profile in profiles.values()],
+                [profile["nab_afp"] for profile in profiles.values()],
+            ],
+            dtype=np.float64,
+        )
+        raw = np.cumsum(cls._weights(timestamps, attacks) @ rewards, axis=0)
+
+        # Sums in the order of alarms, like _score_alarm
+        if len(raw) > 0:
+            for name, score in zip(profiles, raw[-1].tolist()):
+                scores[name]["raw"] += score
+
+    @classmethod
+    def _results(cls, scores: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+        return {
+            "NAB-score-{}".format(nab_suffix(name)): score["normalized"]
+            for name, score in scores.items()
+        }
+
+    @classmethod
+    def init_state(cls, attacks=None) -> Dict[str, Any]:
+        return {
+            "alarm": {"ignore_until": 0, "a_index": 0, "max_end": 0},
+            "scores": {name: {"raw": 0.0} for name in settings.nab_profiles.keys()},
+        }
+
+    @classmethod
+    def update(cls, state, js, attacks=None) -> None:
+        if js["ids"] and len(attacks) > 0:
+            cls._score_alarm(
+                state["alarm"],
+                state["scores"],
+                js["timestamp"],
+                attacks,
+                settings.nab_profiles,
+            )
+
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None) -> Dict[str, float]:
+        if len(attacks) == 0:
+            return {name: 0 for name in cls.defines()}
+
+        scenario_count = len(attacks)
+        false_negatives = scenario_count - len(ergs["Detected-Scenarios"])
+        scores = {
+            name: {"raw": score["raw"], "null": 0.0, "perfect": 0.0, "normalized": 0.0}
+            for name, score in state["scores"].items()
+        }
+        scores = cls._normalize(
+            scores, settings.nab_profiles, scenario_count, false_negatives
+        )
+        return cls._results(scores)
+
+    # Segments are split outside of attacks, where no alarm is ignored after a true
+    # positive. Alarms are scored relative to all attacks, such that the raw scores
+    # of consecutive segments add up.
+
+    @classmethod
+    def partial(
+        cls, truth=None, predicted=None, dataset=None, attacks=None
+    ) -> Dict[str, Any]:
+        assert attacks is not None and dataset is not None
+
+        starts = np.array([att["start"] for att in attacks])
+        if np.any(starts[1:] < starts[:-1]):
+            raise ValueError("NAB segments require attacks sorted by their start")
+
+        state = cls.init_state(attacks)
+        if len(attacks) > 0:
+            cls._score_alarms(state["scores"], dataset, attacks, settings.nab_profiles)
+        return state
+
+    @classmethod
+    def merge(cls, state, other, attacks=None) -> Dict[str, Any]:
+        merged = cls.init_state(attacks)
+        for name, score in merged["scores"].items():
+            score["raw"] = state["scores"][name]["raw"] + other["scores"][name]["raw"]
+        return merged
+
     @classmethod
     def calculate(
         cls, truth=None, predicted=None, dataset=None, attacks=None, ergs=None
@@ -127,18 +359,10 @@ class Nab(Metric):
         }
 
         if len(attacks) == 0:
-            return {
-                "NAB-score-default": 0,
-                "NAB-score-low-fp": 0,
-                "NAB-score-low-fn": 0,
-            }
+            return {name: 0 for name in cls.defines()}
 
         scores = cls._compute_scores(
             scores, dataset, attacks, profiles, scenario_count, false_negatives
         )
 
-        return {
-            "NAB-score-default": scores["default"]["normalized"],
-            "NAB-score-low-fp": scores["reward_low_fp"]["normalized"],
-            "NAB-score-low-fn": scores["reward_low_fn"]["normalized"],
-        }
+        return cls._results(scores)
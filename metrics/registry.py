@@ -0,0 +1,338 @@
+import importlib
+
+import evaluate.settings as settings
+
+# Static description of all metrics in the order of evaluation. It does not import
+# any metric module, such that, e.g., ipal-plot-metrics lists the metrics without
+# loading numpy or third-party metric packages. Outputs may contain '{beta}', which
+# expands to each of settings.fscore_betas, or '{nab_profile}', which expands to
+# each of settings.nab_profiles. Requirements mirror the class attributes, such that
+# metrics are resolved before their modules are imported.
+REGISTRY = [
+    {
+        "name": "Confusion-Matrix",
+        "metric": "metrics.basic_metrics.Confusion",
+        "requires": [],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["tn", "fp", "fn", "tp"],
+        "higher_is_better": False,
+        "description": "Calculates the confusion metrix including tn, fp, fn, tp",
+    },
+    {
+        "name": "Accuracy",
+        "metric": "metrics.basic_metrics.Accuracy",
+        "requires": ["tp", "fp", "tn", "fn"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Accuracy"],
+        "higher_is_better": True,
+        "description": "Accuracy captures the overall proportion of correct classifications. The higher the accuracy score is, the more reliable the predictions of the IIDS are. Synonyms: Rand Index.",
+    },
+    {
+        "name": "Precision",
+        "metric": "metrics.basic_metrics.Precision",
+        "requires": ["tp", "fp"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Precision"],
+        "higher_is_better": True,
+        "description": "Precision is the proportion of correct classifications among all positive classifications (entries classified as malicious). It captures the validness of positive classifications. Synonyms: PPV, Confidence.",
+    },
+    {
+        "name": "Inverse-Precision",
+        "metric": "metrics.basic_metrics.InversePrecision",
+        "requires": ["tn", "fn"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Inverse-Precision"],
+        "higher_is_better": True,
+        "description": "In contrast to precision, inverse precision is the proportion of benign entries correctly classified as benign. Synonyms: NPV, TNA.",
+    },
+    {
+        "name": "Recall",
+        "metric": "metrics.basic_metrics.Recall",
+        "requires": ["tp", "fn"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Recall"],
+        "higher_is_better": True,
+        "description": "Recall states how many malicious entries of the dataset are actually detected by an IIDS. It captures the completeness of positive classifications. Synonyms: TPR, Sensitivity, Hit Rate.",
+    },
+    {
+        "name": "Inverse-Recall",
+        "metric": "metrics.basic_metrics.InverseRecall",
+        "requires": ["tn", "fp"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Inverse-Recall"],
+        "higher_is_better": True,
+        "description": "Inverse recall is the proportion of classifications as benign behavior that are correct. Synonyms: TNR, Specificity, Selectivity.",
+    },
+    {
+        "name": "Fallout",
+        "metric": "metrics.basic_metrics.Fallout",
+        "requires": ["fp", "tn"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Fallout"],
+        "higher_is_better": False,
+        "description": "Fallout calculates the fraction of false alarms across the dataset. Synonyms: FPR.",
+    },
+    {
+        "name": "Missrate",
+        "metric": "metrics.basic_metrics.MissRate",
+        "requires": ["fn", "tp"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Missrate"],
+        "higher_is_better": False,
+        "description": "Missrate measures the fraction of missed malicious entries. Synonyms: FNR.",
+    },
+    {
+        "name": "Informedness",
+        "metric": "metrics.basic_metrics.Informedness",
+        "requires": ["Recall", "Inverse-Recall"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Informedness"],
+        "higher_is_better": True,
+        "description": "Informedness aggregates recall and inverse recall, measuring how informed the IIDS is, i.e. the completeness of both positive and negative classifications. Synonyms: Youden's J statistic.",
+    },
+    {
+        "name": "Markedness",
+        "metric": "metrics.basic_metrics.Markedness",
+        "requires": ["Precision", "Inverse-Precision"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Markedness"],
+        "higher_is_better": True,
+        "description": "Markedness aggregates precision and inverse precision, measuring the reliability of the IIDS, i.e. the validness of both positive and negative classifications.",
+    },
+    {
+        "name": "F-Score",
+        "metric": "metrics.basic_metrics.FScore",
+        "requires": ["Precision", "Recall"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["F{beta}"],
+        "higher_is_better": True,
+        "description": "Usually, an inherent tradeoff between achieving a maximal number of detected attacks (recall) while reducing false positives (precision) exists. The F-score combines both design goals into a single metric. F1 is the harmonic mean between precision and recall.",
+    },
+    {
+        "name": "MCC",
+        "metric": "metrics.matthews_corr_coeff.MCC",
+        "requires": ["tp", "fp", "tn", "fn"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["MCC"],
+        "higher_is_better": True,
+        "description": "Matthew's Correlation Coefficient measures the correlation between the IIDS' classification and the ground truth. Its main advantage over the F-score is that it is not affected by over-representation of either benign of malicious entries. Synonyms: Phi coefficient.",
+    },
+    {
+        "name": "Jaccard-Index",
+        "metric": "metrics.jaccard.JaccardIndex",
+        "requires": ["tp", "fn", "fp"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Jaccard-Index"],
+        "higher_is_better": True,
+        "description": "The Jaccard index measures the similarity between the set of entries deemed to be malicious obtained from the classification and the one obtained from the ground truth. Synonyms: Tanimoto Index.",
+    },
+    {
+        "name": "Jaccard-Distance",
+        "metric": "metrics.jaccard.JaccardDistance",
+        "requires": ["Jaccard-Index"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["Jaccard-Distance"],
+        "higher_is_better": False,
+        "description": "The Jaccard distance is the complement to the Jaccard index, it measures the dissimilarity between the classification and the ground truth.",
+    },
+    {
+        "name": "Detected-Scenarios",
+        "metric": "metrics.scenarios.DetectedScenarios",
+        "requires": [],
+        "requires_attacks": True,
+        "requires_timed_dataset": False,
+        "outputs": ["Detected-Scenarios"],
+        "higher_is_better": True,
+        "description": "Detected scenarios lists the attack scenarios detected by at least a single alarm.",
+    },
+    {
+        "name": "Detected-Scenarios-Percent",
+        "metric": "metrics.scenarios.DetectedScenariosPercent",
+        "requires": ["Detected-Scenarios"],
+        "requires_attacks": True,
+        "requires_timed_dataset": False,
+        "outputs": ["Detected-Scenarios-Percent"],
+        "higher_is_better": True,
+        "description": "Proportion of attack scenarios that were detected by the IIDS.",
+    },
+    {
+        "name": "Scenario-Recall",
+        "metric": "metrics.scenarios.ScenarioRecall",
+        "requires": [],
+        "requires_attacks": True,
+        "requires_timed_dataset": False,
+        "outputs": ["Scenario-Recall", "Scenario-Statistics"],
+        "higher_is_better": True,
+        "description": "Recall measurement on a per-attack-scenario basis.",
+    },
+    {
+        "name": "Penalty-Score",
+        "metric": "metrics.scenarios.PenaltyScore",
+        "requires": [],
+        "requires_attacks": True,
+        "requires_timed_dataset": True,
+        "outputs": ["Penalty-Score"],
+        "higher_is_better": False,
+        "description": "Penalty Score (PS) is the length of detection results outside their overlap with attack scenarios (cf. TABOR paper).",
+    },
+    {
+        "name": "Detection-Delay",
+        "metric": "metrics.scenarios.DetectionDelay",
+        "requires": ["Detected-Scenarios"],
+        "requires_attacks": True,
+        "requires_timed_dataset": True,
+        "outputs": ["Detection-Delay"],
+        "higher_is_better": False,
+        "description": "The detection delay aggregates the time intervals between the start of an attack and the time of the first detection.",
+    },
+    {
+        "name": "TPA",
+        "metric": "metrics.alarms.TruePositiveAlarms",
+        "requires": [],
+        "requires_attacks": True,
+        "requires_timed_dataset": True,
+        "outputs": ["TPA"],
+        "higher_is_better": True,
+        "description": "True positive alarms (TPA) counts the number of continuous alarms that overlap with at least a single attack.",
+    },
+    {
+        "name": "FPA",
+        "metric": "metrics.alarms.FalsePositiveAlarms",
+        "requires": [],
+        "requires_attacks": True,
+        "requires_timed_dataset": True,
+        "outputs": ["FPA"],
+        "higher_is_better": False,
+        "description": "False positive alarms (FPA) counts the number of continuous alarms that do not overlap with any attack.",
+    },
+    {
+        "name": "TaPR",
+        "metric": "metrics.tapr.eTaPR",
+        "requires": [],
+        "requires_attacks": False,
+        "requires_timed_dataset": True,
+        "outputs": ["eTaP", "eTaR", "eTaF{beta}"],
+        "higher_is_better": True,
+        "description": "Hwang et al. proposed their (enhanced) time series-aware variants for classical point-based metrics, i.e., precision, recall, and F1, addressing known issues when adopting point-based metrics for time series-aware evaluations. For instance, while point-based recall weights long attacks as more important, the new time series-aware recall variant (eTaR) treats all consecutive attacks equally. To replace precision, eTaP implements diminishing returns for long-lasting alarms. Lastly, the new proposed eTaF score is defined in the same way as the regular F score but leverages the substitute eTaP and eTaR metrics.",
+    },
+    {
+        "name": "BATADAL-TTD",
+        "metric": "metrics.batadal.BatadalTTD",
+        "requires": [],
+        "requires_attacks": True,
+        "requires_timed_dataset": True,
+        "outputs": ["BATADAL-TTD"],
+        "higher_is_better": True,
+        "description": "BATADAL time-to-detection. Normalized time until an attack is detected.",
+    },
+    {
+        "name": "BATADAL-CLF",
+        "metric": "metrics.batadal.BatadalCLF",
+        "requires": ["Recall", "Inverse-Recall"],
+        "requires_attacks": False,
+        "requires_timed_dataset": False,
+        "outputs": ["BATADAL-CLF"],
+        "higher_is_better": True,
+        "description": "BATADAL classification performance. Mean between TNR and TPR",
+    },
+    {
+        "name": "BATADAL",
+        "metric": "metrics.batadal.Batadal",
+        "requires": ["BATADAL-TTD", "BATADAL-CLF"],
+        "requires_attacks": True,
+        "requires_timed_dataset": True,
+        "outputs": ["BATADAL"],
+        "higher_is_better": True,
+        "description": "BATADAL ranking. Weighted BATADAL-TTD and BATADAL-CLF",
+    },
+    {
+        "name": "nab-score",
+        "metric": "metrics.nab_score.Nab",
+        "requires": ["Detected-Scenarios"],
+        "requires_attacks": False,
+        "requires_timed_dataset": True,
+        "outputs": ["NAB-score-{nab_profile}"],
+        "higher_is_better": True,
+        "description": "The NAB score weighs the evaluation of classification results based on their relative position to attack scenarios. Rewards (for true positives) and penalities (for false positives) are scaled by the sigmoid function centered around the end of attack windows. This ensures that early detections are rewarded, while trailing false positives are only gradually penalized.",
+    },
+    {
+        "name": "Affiliation",
+        "metric": "metrics.affiliation.AffiliationMetric",
+        "requires": [],
+        "requires_attacks": False,
+        "requires_timed_dataset": True,
+        "outputs": [
+            "Affiliation-Precision",
+            "Affiliation-Recall",
+            "Affiliation-F{beta}",
+        ],
+        "higher_is_better": True,
+        "description": "The [Affiliation Metric](https://dl.acm.org/doi/pdf/10.1145/3534678.3539339) implements two variants of precision and recall to solve the insufficiencies of their point-based counterparts. Moreover, this metric claims to be more resilient against adversarial algorithms and random predictions.",
+    },
+]
+
+
+def outputs(entry):
+    """Outputs of a registered metric under the current settings
+
+    Args:
+        entry: the registry entry
+
+    Returns:
+        list of output names, like the metric's defines()
+    """
+
+    names = []
+    for output in entry["outputs"]:
+        if "{beta}" in output:
+            names += [output.format(beta=beta) for beta in settings.fscore_betas]
+        elif "{nab_profile}" in output:
+            names += [
+                output.format(nab_profile=nab_suffix(profile))
+                for profile in settings.nab_profiles
+            ]
+        else:
+            names.append(output)
+    return names
+
+
+# Output suffixes of the NAB profiles whose name differs from the profile name
+NAB_SUFFIXES = {"reward_low_fp": "low-fp", "reward_low_fn": "low-fn"}
+
+
+def nab_suffix(profile):
+    # Output suffix of a NAB profile, e.g., 'reward_low_fp' yields 'NAB-score-low-fp'
+    return NAB_SUFFIXES.get(profile, profile)
+
+
+def all_outputs():
+    # Outputs of all registered metrics
+    return [name for entry in REGISTRY for name in outputs(entry)]
+
+
+def load_metric(entry):
+    """Imports the class of a registered metric
+
+    Args:
+        entry: the registry entry
+
+    Returns:
+        the Metric class
+    """
+
+    module, name = entry["metric"].rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)
@@ -1,6 +1,9 @@
+import numpy as np
+
 import evaluate.settings as settings
 
-from .metric import Metric
+from .intervals import AttackIndex, uncovered
+from .metric import Metric, get_alarms, sequential_sum
 
 
 class DetectedScenarios(Metric):
@@ -10,6 +13,8 @@ class DetectedScenarios(Metric):
     _requires_timed_dataset = False
     _requires_attacks = True
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -21,24 +26,61 @@ class DetectedScenarios(Metric):
         ergs=None,
     ):
         assert dataset is not None and attacks is not None
+        scenarios = cls._scenarios(dataset, attacks)
+
+        return {cls._name: sorted([s[0] for s in scenarios])}
+
+    @classmethod
+    def _scenarios(cls, dataset, attacks):
+        # (id, start, end) of the attacks detected within their time range. The
+        # 'ipalid' of an attack is not matched, as IPAL messages do not carry one.
         scenarios = set()
 
-        attackids = {att["ipalid"]: att["id"] for att in attacks if "ipalid" in att}
+        index = AttackIndex.of(attacks)
+        if len(index) > 0:  # detected time range
+            alarms = dataset.timestamp[dataset.ids]
+            for i in np.flatnonzero(index.hits(alarms, settings.alarm_gracetime)):
+                att = index.attacks[i]
+                scenarios.add((att["id"], att["start"], att["end"]))
 
-        for d in dataset:
-            if d["ids"]:  # if there is an alert
-                if "ipalid" in d and d["ipalid"] in attackids:  # detected by ipalid
-                    scenarios.add((attackids[d["ipalid"]], None, None))
+        return scenarios
 
-                for att in attacks:  # detected time range
-                    if "start" in att and "end" in att:
-                        if (
-                            att["start"] - settings.alarm_gracetime <= d["timestamp"]
-                            and d["timestamp"] <= att["end"] + settings.alarm_gracetime
-                        ):
-                            scenarios.add((att["id"], att["start"], att["end"]))
+    @classmethod
+    def init_state(cls, attacks=None):
+        return {
+            "scenarios": set(),
+            "next": 0,  # next attack (sorted by start) not reached by an alarm yet
+        }
 
-        return {cls._name: sorted([s[0] for s in scenarios])}
+    @classmethod
+    def update(cls, state, js, attacks=None):
+        if not js["ids"]:
+            return
+
+        # Alarms arrive in chronological order, such that the first alarm after the
+        # start of an attack decides whether the attack is detected
+        index = AttackIndex.of(attacks)
+        timestamp, gracetime = js["timestamp"], settings.alarm_gracetime
+        while (
+            state["next"] < len(index)
+            and index.start[state["next"]] - gracetime <= timestamp
+        ):
+            att = index.attacks[state["next"]]
+            if timestamp <= att["end"] + gracetime:  # detected time range
+                state["scenarios"].add((att["id"], att["start"], att["end"]))
+            state["next"] += 1
+
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        return {cls._name: sorted([s[0] for s in state["scenarios"]])}
+
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        return {"scenarios": cls._scenarios(dataset, attacks)}
+
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        return {"scenarios": state["scenarios"] | other["scenarios"]}
 
 
 class DetectedScenariosPercent(Metric):
@@ -48,6 +90,8 @@ class DetectedScenariosPercent(Metric):
     _requires_timed_dataset = False
     _requires_attacks = True
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -72,6 +116,12 @@ class ScenarioRecall(Metric):
     _requires_timed_dataset = False
     _requires_attacks = True
     _higher_is_better = True
+    _streaming = True
+    _mergeable = True
+
+    @classmethod
+    def defines(cls):
+        return [cls._name, "Scenario-Statistics"]
 
     @classmethod
     def calculate(
@@ -83,30 +133,124 @@ class ScenarioRecall(Metric):
         ergs=None,
     ):
         assert attacks is not None and dataset is not None
-        scenarios = {a["id"]: {"tp": 0, "fn": 0} for a in attacks}
+        return cls._results(cls._scenarios(dataset, attacks))
 
-        for d in dataset:
-            if not d["malicious"]:
+    @classmethod
+    def _scenarios(cls, dataset, attacks):
+        # Counts of each scenario (see _count)
+        scenarios = {a["id"]: cls._empty() for a in attacks}
+
+        # Messages and alerts of each label code
+        codes = np.asarray(dataset.malicious)
+        alerted = codes[dataset.ids]
+        total = np.bincount(codes, minlength=len(dataset.scenarios))
+        alerts = np.bincount(alerted, minlength=len(dataset.scenarios))
+
+        # First and last alert of each label code
+        first, last = {}, {}
+        if dataset.timestamp is not None and len(alerted) > 0:
+            timestamps = np.asarray(dataset.timestamp)[dataset.ids]
+            order = np.lexsort((timestamps, alerted))
+            alerted, timestamps = alerted[order], timestamps[order]
+            bounds = np.flatnonzero(alerted[1:] != alerted[:-1]) + 1
+            starts = np.concatenate(([0], bounds))
+            stops = np.concatenate((bounds, [len(alerted)])) - 1
+            first = dict(zip(alerted[starts].tolist(), timestamps[starts].tolist()))
+            last = dict(zip(alerted[stops].tolist(), timestamps[stops].tolist()))
+
+        for code in np.flatnonzero(total).tolist():
+            if code == 0:
                 continue
 
-            if d["malicious"] not in scenarios:
-                settings.logger.warning(
-                    "Scenario '{}' not found!".format(d["malicious"])
-                )
+            malicious = dataset.scenarios[code]
+            if malicious not in scenarios:
+                settings.logger.warning("Scenario '{}' not found!".format(malicious))
                 continue
 
-            if d["ids"]:
-                scenarios[d["malicious"]]["tp"] += 1
-            else:
-                scenarios[d["malicious"]]["fn"] += 1
+            tp = int(alerts[code])
+            cls._count(
+                scenarios[malicious],
+                tp,
+                int(total[code]) - tp,
+                first.get(code),
+                last.get(code),
+            )
+
+        return scenarios
 
+    @classmethod
+    def _empty(cls):
+        return {"tp": 0, "fn": 0, "first": None, "last": None}
+
+    @classmethod
+    def _count(cls, scenario, tp, fn, first=None, last=None):
+        # Adds messages of a scenario and the timestamps of their first/last alert
+        scenario["tp"] += tp
+        scenario["fn"] += fn
+        if first is not None and (
+            scenario["first"] is None or first < scenario["first"]
+        ):
+            scenario["first"] = first
+        if last is not None and (scenario["last"] is None or last > scenario["last"]):
+            scenario["last"] = last
+
+    @classmethod
+    def _recall(cls, scenarios):
+        recall = {}
         for k, v in scenarios.items():
             if v["tp"] + v["fn"] == 0:
-                scenarios[k] = 0
+                recall[k] = 0
             else:
-                scenarios[k] = v["tp"] / (v["tp"] + v["fn"])
+                recall[k] = v["tp"] / (v["tp"] + v["fn"])
+        return recall
 
-        return {cls._name: scenarios}
+    @classmethod
+    def _results(cls, scenarios):
+        statistics = {
+            k: {
+                "messages": v["tp"] + v["fn"],
+                "alerts": v["tp"],
+                "first-alert": v["first"],
+                "last-alert": v["last"],
+            }
+            for k, v in scenarios.items()
+        }
+        return {cls._name: cls._recall(scenarios), "Scenario-Statistics": statistics}
+
+    @classmethod
+    def init_state(cls, attacks=None):
+        return {a["id"]: cls._empty() for a in attacks}
+
+    @classmethod
+    def update(cls, state, js, attacks=None):
+        malicious = js["malicious"]
+        if not malicious:
+            return
+
+        if malicious not in state:
+            settings.logger.warning("Scenario '{}' not found!".format(malicious))
+            return
+
+        if js["ids"]:
+            timestamp = js.get("timestamp")
+            cls._count(state[malicious], 1, 0, timestamp, timestamp)
+        else:
+            cls._count(state[malicious], 0, 1)
+
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        return cls._results(state)
+
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        return cls._scenarios(dataset, attacks)
+
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        merged = {k: dict(v) for k, v in state.items()}
+        for k, v in other.items():
+            cls._count(merged[k], v["tp"], v["fn"], v["first"], v["last"])
+        return merged
 
 
 class PenaltyScore(Metric):
@@ -116,6 +260,8 @@ class PenaltyScore(Metric):
     _requires_timed_dataset = True
     _requires_attacks = True
     _higher_is_better = False
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -127,32 +273,76 @@ class PenaltyScore(Metric):
         ergs=None,
     ):
         assert attacks is not None and dataset is not None
-        ps = 0
-        prev = dataset[0]["timestamp"]
-
-        for d in dataset:
-            if d["ids"]:
-                for attack in attacks:
-                    if (
-                        attack["start"] <= d["timestamp"]
-                        and d["timestamp"] <= attack["end"]
-                    ):
-                        break
-                else:
-                    ps += d["timestamp"] - prev
-
-            prev = d["timestamp"]
+        timestamps = dataset.timestamp
+
+        # Alarms outside of any attack are penalized by the time since the last entry,
+        # which telescopes to the time from the entry preceding each piece of an
+        # alarm outside the attacks to its last entry
+        first, last = cls._pieces(dataset, attacks)
+        ps = sequential_sum(timestamps[last] - timestamps[np.maximum(first - 1, 0)])
 
         return {cls._name: ps}
 
+    @classmethod
+    def _pieces(cls, dataset, attacks):
+        # First and last entry of each piece of an alarm outside the attacks
+        alarms = get_alarms(dataset)
+        first, stop = AttackIndex.of(attacks).rows(dataset.timestamp)
+        return uncovered(alarms.first, alarms.last, first, stop)
+
+    @classmethod
+    def init_state(cls, attacks=None):
+        return {"ps": 0, "prev": None}
+
+    @classmethod
+    def update(cls, state, js, attacks=None):
+        timestamp = js["timestamp"]
+        prev = timestamp if state["prev"] is None else state["prev"]
+
+        if js["ids"] and not AttackIndex.of(attacks).covered([timestamp])[0]:
+            state["ps"] += timestamp - prev
+        state["prev"] = timestamp
+
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        return {cls._name: state["ps"]}
+
+    # A segment starting with an alarm outside the attacks is penalized by the time
+    # since the end of the previous segment once merged
+
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        timestamps = dataset.timestamp
+        first, _ = cls._pieces(dataset, attacks)
+        return {
+            "ps": cls.calculate(dataset=dataset, attacks=attacks)[cls._name],
+            "prev": timestamps[-1].item(),
+            "first": timestamps[0].item(),
+            "head": len(first) > 0 and first[0] == 0,
+        }
+
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        ps = state["ps"] + other["ps"]
+        if other["head"]:
+            ps += other["first"] - state["prev"]
+        return {
+            "ps": ps,
+            "prev": other["prev"],
+            "first": state["first"],
+            "head": state["head"],
+        }
+
 
 class DetectionDelay(Metric):
     _name = "Detection-Delay"
     _description = "The detection delay aggregates the time intervals between the start of an attack and the time of the first detection."
-    _requires = []
+    _requires = ["Detected-Scenarios"]
     _requires_timed_dataset = True
     _requires_attacks = True
     _higher_is_better = False
+    _streaming = True
+    _mergeable = True
 
     @classmethod
     def calculate(
@@ -164,28 +354,131 @@ class DetectionDelay(Metric):
         ergs=None,
     ):
         assert dataset is not None and attacks is not None and ergs is not None
-        dd = 0
-        detected = set()
-        prev = dataset[0]["timestamp"]
+        _, delay, _ = cls._delays(dataset, attacks, set(ergs["Detected-Scenarios"]))
+        dd = sequential_sum(delay)
+
+        return {cls._name: dd}
 
-        for d in dataset:
-            for attack in attacks:
-                if (
-                    attack["id"] not in ergs["Detected-Scenarios"]
-                ):  # attack not detected at all
-                    continue
+    @classmethod
+    def _delays(cls, dataset, attacks, detected_scenarios=None, first_alarm=None):
+        # Scenario and delay of the attacks of the detected scenarios (all if None)
+        # in the order of the attack list, and the entry detecting each scenario.
+        # The first alarm within each attack of the index may be given instead of
+        # taken from the dataset's alarms (e.g., by evaluate.sweep).
+        timestamps = dataset.timestamp
+        index = AttackIndex.of(attacks)
+        first, stop = index.rows(timestamps)
+
+        # First alarm within each attack (len(dataset) if there is none)
+        if first_alarm is None:
+            first_alarm = get_alarms(dataset).first_from(first)
+            first_alarm[first_alarm >= stop] = len(timestamps)
+
+        # A scenario is detected by the earliest alarm within any of its attacks
+        detection = {}
+        for i, att_id in enumerate(index.ids):
+            if detected_scenarios is None or att_id in detected_scenarios:
+                detection[att_id] = min(
+                    detection.get(att_id, len(timestamps)), first_alarm[i]
+                )
+
+        # Each attack accumulates the time of its entries until the scenario's
+        # detection. The detecting entry is only counted for the first attack in
+        # the attack list that contains it.
+        members, lasts = [], []
+        detection_counted = set()
+        for i in np.argsort(index.position, kind="stable"):
+            att_id = index.ids[i]
+            if att_id not in detection:
+                continue
+
+            last = min(stop[i], detection[att_id])
+            if first[i] <= detection[att_id] < stop[i]:
+                if att_id not in detection_counted:
+                    detection_counted.add(att_id)
+                    last += 1
 
-                if attack["id"] in detected:  # attack already counted for dd
-                    continue
+            if last > first[i]:
+                members.append(i)
+                lasts.append(last)
 
-                if (
-                    attack["start"] <= d["timestamp"]
-                    and d["timestamp"] <= attack["end"]
-                ):  # overlapping now
-                    dd += d["timestamp"] - max(prev, attack["start"])
-                    if d["ids"]:  # attack detected
-                        detected.add(attack["id"])
+        # Entries after the first one of an attack are within it, such that their
+        # delays telescope to the time from the attack's start (or the entry before
+        # it) to its last counted entry
+        members = np.array(members, dtype=np.int64)
+        rows = first[members]
+        delay = timestamps[np.array(lasts, dtype=np.int64) - 1] - np.maximum(
+            timestamps[np.maximum(rows - 1, 0)], index.start[members]
+        )
 
-            prev = d["timestamp"]
+        return [index.ids[i] for i in members.tolist()], delay, detection
+
+    @classmethod
+    def init_state(cls, attacks=None):
+        index = AttackIndex.of(attacks)
+        return {
+            "delay": {},  # accumulated delay of each scenario
+            "detected": set(),
+            "prev": None,
+            "next": 0,  # next attack (sorted by start) that has not started yet
+            "active": [],  # started attacks that did not end yet
+            "order": np.argsort(index.position, kind="stable").tolist(),
+        }
+
+    @classmethod
+    def update(cls, state, js, attacks=None):
+        index = AttackIndex.of(attacks)
+        timestamp = js["timestamp"]
+        prev = timestamp if state["prev"] is None else state["prev"]
+
+        while state["next"] < len(index) and index.start[state["next"]] <= timestamp:
+            state["active"].append(state["next"])
+            state["next"] += 1
+        state["active"] = [i for i in state["active"] if timestamp <= index.end[i]]
+
+        # Attacks overlapping now in the order of the attack list
+        for i in sorted(state["active"], key=lambda i: index.position[i]):
+            att = index.attacks[i]
+            if att["id"] in state["detected"]:  # attack already counted for dd
+                continue
 
+            delay = timestamp - max(prev, att["start"])
+            state["delay"][att["id"]] = state["delay"].get(att["id"], 0) + delay
+            if js["ids"]:  # attack detected
+                state["detected"].add(att["id"])
+
+        state["prev"] = timestamp
+
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        # Only scenarios that are detected at all count
+        detected_scenarios = set(ergs["Detected-Scenarios"])
+        dd = 0
+        for att_id, delay in state["delay"].items():
+            if att_id in detected_scenarios:
+                dd += delay
         return {cls._name: dd}
+
+    # Attacks lie within a single segment. Attacks of scenarios detected in an
+    # earlier segment do not delay the detection anymore once merged.
+
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        ids, delay, detection = cls._delays(dataset, attacks)
+        delays = {}
+        for att_id, value in zip(ids, delay.tolist()):
+            delays[att_id] = delays.get(att_id, 0) + value
+
+        length = len(dataset.timestamp)
+        return {
+            "delay": delays,
+            "detected": {att_id for att_id, row in detection.items() if row < length},
+        }
+
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        delays = dict(state["delay"])
+        for att_id, delay in other["delay"].items():
+            if att_id not in state["detected"]:
+                delays[att_id] = delays.get(att_id, 0) + delay
+        return {"delay": delays, "detected": state["detected"] | other["detected"]}
@@ -1,12 +1,9 @@
-import os
-import tempfile
-
-from eTaPR_pkg import etapr
-from eTaPR_pkg.DataManage import File_IO
+import numpy as np
 
 import evaluate.settings as settings
 
 from .basic_metrics import FScore
+from .intervals import runs
 from .metric import Metric
 
 
@@ -17,18 +14,23 @@ class eTaPR(Metric):
     _requires_timed_dataset = True
     _requires_attacks = False
     _higher_is_better = True
+    _mergeable = True
 
     @classmethod
     def _list_to_eTaPr_list(cls, inlist):
-        fd, path = tempfile.mkstemp()
-
-        with os.fdopen(fd, "w") as tmp:
-            tmp.write("\n".join([str(x) for x in inlist]) + "\n")
+        # Anomalous ranges as File_IO.load_file(..., "stream") would read them from
+        # a file with one label per line, named by their 1-based position
+        first, last = runs(np.asarray(inlist) == 1)
+        return cls._ranges(first, last)
 
-        erg = File_IO.load_file(path, "stream")
-        os.remove(path)
+    @classmethod
+    def _ranges(cls, first, last):
+        from eTaPR_pkg.DataManage import Range  # imported once required
 
-        return erg
+        return [
+            Range.Range(start, end, str(i + 1))
+            for i, (start, end) in enumerate(zip(first.tolist(), last.tolist()))
+        ]
 
     @classmethod
     def defines(cls):
@@ -46,12 +48,18 @@ class eTaPR(Metric):
         ergs=None,
     ):
         assert truth is not None and predicted is not None
-        if all([x == 0 for x in predicted]) or all([x == 0 for x in truth]):
+        truth, predicted = np.asarray(truth), np.asarray(predicted)
+        if not np.any(predicted != 0) or not np.any(truth != 0):
             # eTaR/eTaP undefined for empty truth/prediction list, set everything to 0
             return {x: 0 for x in cls.defines()}
 
-        truth = cls._list_to_eTaPr_list([-1 if x == 1 else 1 for x in truth])
-        predicted = cls._list_to_eTaPr_list([-1 if x == 1 else 1 for x in predicted])
+        return cls._results(
+            cls._list_to_eTaPr_list(truth), cls._list_to_eTaPr_list(predicted)
+        )
+
+    @classmethod
+    def _results(cls, truth, predicted):
+        from eTaPR_pkg import etapr  # imported once required
 
         result = etapr.evaluate_w_ranges(
             truth,
@@ -76,3 +84,41 @@ class eTaPR(Metric):
         assert abs(fscores["F1"] - result["f1"]) < 0.001
 
         return output
+
+    # Segments keep the runs of their entries. No run ends at the last entry of a
+    # segment, such that runs never need to be joined across segments.
+
+    @classmethod
+    def partial(cls, truth=None, predicted=None, dataset=None, attacks=None):
+        truth, predicted = np.asarray(truth), np.asarray(predicted)
+        return {
+            "length": len(truth),
+            "truth": runs(truth == 1),
+            "predicted": runs(predicted == 1),
+            "any": (np.any(truth != 0), np.any(predicted != 0)),
+        }
+
+    @classmethod
+    def merge(cls, state, other, attacks=None):
+        def concatenate(key):
+            return tuple(
+                np.concatenate([mine, theirs + state["length"]])
+                for mine, theirs in zip(state[key], other[key])
+            )
+
+        return {
+            "length": state["length"] + other["length"],
+            "truth": concatenate("truth"),
+            "predicted": concatenate("predicted"),
+            "any": tuple(a or b for a, b in zip(state["any"], other["any"])),
+        }
+
+    @classmethod
+    def finalize(cls, state, attacks=None, ergs=None):
+        if not all(state["any"]):
+            # eTaR/eTaP undefined for empty truth/prediction list, set everything to 0
+            return {x: 0 for x in cls.defines()}
+
+        return cls._results(
+            cls._ranges(*state["truth"]), cls._ranges(*state["predicted"])
+        )
@@ -1,65 +1,101 @@
-from .affiliation import AffiliationMetric
-from .alarms import FalsePositiveAlarms, TruePositiveAlarms
-from .basic_metrics import (
-    Accuracy,
-    Confusion,
-    Fallout,
-    FScore,
-    Informedness,
-    InversePrecision,
-    InverseRecall,
-    Markedness,
-    MissRate,
-    Precision,
-    Recall,
-)
-from .batadal import Batadal, BatadalCLF, BatadalTTD
-from .jaccard import JaccardDistance, JaccardIndex
-from .matthews_corr_coeff import MCC
-from .nab_score import Nab
-from .scenarios import (
-    DetectedScenarios,
-    DetectedScenariosPercent,
-    DetectionDelay,
-    PenaltyScore,
-    ScenarioRecall,
-)
-from .tapr import eTaPR
-
-metrics = [
-    # Basic Metrics
-    Confusion,
-    Accuracy,
-    Precision,
-    InversePrecision,
-    Recall,
-    InverseRecall,
-    Fallout,
-    MissRate,
-    Informedness,
-    Markedness,
-    FScore,
-    # Further basic point-based metrics
-    MCC,
-    JaccardIndex,
-    JaccardDistance,
-    # Scenario and Alarm Metrics
-    DetectedScenarios,
-    DetectedScenariosPercent,
-    ScenarioRecall,
-    PenaltyScore,
-    DetectionDelay,
-    TruePositiveAlarms,
-    FalsePositiveAlarms,
-    # Time-Aware metrics
-    eTaPR,
-    BatadalTTD,
-    BatadalCLF,
-    Batadal,
-    Nab,
-    AffiliationMetric,
-]
+import heapq
+
+from .registry import REGISTRY, load_metric, outputs
+
+# Registry entries of all metrics. Metrics are resolved from these entries and only
+# the modules of resolved metrics are imported
+metrics = REGISTRY
 
 
 def get_all_metrics():
-    return {metric._name: metric for metric in metrics}
+    return {entry["name"]: load_metric(entry) for entry in metrics}
+
+
+def confusion_metrics():
+    """Metrics computed from the confusion matrix alone (e.g., F-Score, MCC)
+
+    Returns:
+        list of metrics in dependency order
+    """
+
+    available = set(outputs(metrics[0]))  # Confusion-Matrix
+    derived = []
+    for entry in metrics:
+        if (
+            len(entry["requires"]) > 0
+            and all(r in available for r in entry["requires"])
+            and not entry["requires_attacks"]
+            and not entry["requires_timed_dataset"]
+        ):
+            derived.append(load_metric(entry))
+            available.update(outputs(entry))
+    return derived
+
+
+def resolve_metrics(selection=None):
+    """Resolves the metrics required to compute a selection of outputs
+
+    The requirements of all metrics form a dependency graph. Only the transitive
+    closure of the selected outputs is computed, dependencies first while keeping
+    the order of the `metrics` list wherever possible.
+
+    Args:
+        selection: list of metric outputs (e.g., 'F1') or metric names (e.g.,
+            'F-Score'), None selects all metrics
+
+    Returns:
+        (metrics, pruned), the metrics to compute in order and the names of
+        the metrics that are not required
+    """
+
+    producers = {}  # output name -> position of the metric in the metrics list
+    for i, entry in enumerate(metrics):
+        for name in [entry["name"]] + outputs(entry):
+            producers.setdefault(name, i)
+
+    if selection is None:
+        required = set(range(len(metrics)))
+    else:
+        unknown = [name for name in selection if name not in producers]
+        if len(unknown) > 0:
+            raise ValueError("Unknown metric(s) '{}'".format(",".join(unknown)))
+
+        # Transitive closure of the selected metrics
+        required = set()
+        stack = [producers[name] for name in selection]
+        while len(stack) > 0:
+            i = stack.pop()
+            if i not in required:
+                required.add(i)
+                stack += [
+                    producers[r] for r in metrics[i]["requires"] if r in producers
+                ]
+
+    # Topological order, ties are broken by the position in the metrics list
+    dependencies = {
+        i: {producers[r] for r in metrics[i]["requires"] if r in producers} - {i}
+        for i in required
+    }
+    dependents = {i: [] for i in required}
+    for i, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].append(i)
+
+    ready = [i for i, deps in dependencies.items() if len(deps) == 0]
+    heapq.heapify(ready)
+    ordered = []
+    while len(ready) > 0:
+        i = heapq.heappop(ready)
+        ordered.append(i)
+        for dependent in dependents[i]:
+            dependencies[dependent].discard(i)
+            if len(dependencies[dependent]) == 0:
+                heapq.heappush(ready, dependent)
+
+    if len(ordered) != len(required):
+        cyclic = [metrics[i]["name"] for i in sorted(required) if i not in ordered]
+        raise ValueError("Cyclic metric requirements '{}'".format(",".join(cyclic)))
+
+    # Only the modules of the resolved metrics are imported
+    pruned = [entry["name"] for i, entry in enumerate(metrics) if i not in required]
+    return [load_metric(metrics[i]) for i in ordered], pruned
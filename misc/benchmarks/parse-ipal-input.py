@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Compares the vectorized parse_ipal_input with the former per-element loop.
+# Usage (from the repository root): python3 misc/benchmarks/parse-ipal-input.py
+import argparse
+import gzip
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from evaluate.dataset import Dataset  # noqa: E402
+from evaluate.utils import ADLabels, parse_ipal_input  # noqa: E402
+
+
+def parse_ipal_input_loop(dataset):
+    # Former implementation constructing an ADLabels enum per element
+    truth = np.empty(len(dataset), dtype=int)
+    predicted = np.empty(len(dataset), dtype=int)
+
+    for i, (malicious, ids) in enumerate(
+        zip(dataset.malicious.tolist(), dataset.ids.tolist())
+    ):
+        truth[i] = ADLabels.from_is_malicious(malicious).value
+        predicted[i] = ADLabels.from_is_malicious(ids).value
+
+    return truth, predicted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "input",
+        metavar="FILE",
+        nargs="?",
+        default="misc/tests/testfile-1.ipal.gz",
+        help="IPAL file to benchmark with (Default: misc/tests/testfile-1.ipal.gz)",
+    )
+    parser.add_argument(
+        "--repeat", metavar="INT", type=int, default=5, help="repetitions (Default: 5)"
+    )
+    args = parser.parse_args()
+
+    with gzip.open(args.input, "rt") if args.input.endswith(".gz") else open(
+        args.input, "r"
+    ) as f:
+        dataset = Dataset.load(f)
+
+    truth, predicted = parse_ipal_input(dataset)
+    reference = parse_ipal_input_loop(dataset)
+    assert np.array_equal(truth, reference[0])
+    assert np.array_equal(predicted, reference[1])
+
+    loop = min(
+        timeit.repeat(lambda: parse_ipal_input_loop(dataset), number=1, repeat=args.repeat)
+    )
+    vectorized = min(
+        timeit.repeat(lambda: parse_ipal_input(dataset), number=1, repeat=args.repeat)
+    )
+
+    print(f"{len(dataset)} messages from {args.input}")
+    print(f"per-element loop: {loop * 1000:10.2f} ms ({reference[0].nbytes * 2} bytes)")
+    print(f"vectorized:       {vectorized * 1000:10.2f} ms ({truth.nbytes * 2} bytes)")
+    print(f"speedup:          {loop / vectorized:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
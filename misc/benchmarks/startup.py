@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# Measures the startup time of ipal-evaluate and the slowest imports.
+# Usage (from the repository root): python3 misc/benchmarks/startup.py
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+EVALUATE = os.path.join(ROOT, "ipal-evaluate")
+
+
+def run(args, repeat):
+    # Best wall time of an ipal-evaluate run in ms
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, EVALUATE] + args,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def slowest_imports(args, count):
+    # Imports with the highest cumulative time (cf. python -X importtime)
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", EVALUATE] + args,
+        capture_output=True,
+        text=True,
+    )
+    imports = []
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line[len("import time:") :].split("|")
+            if cumulative.strip().isdigit():
+                imports.append((int(cumulative) / 1000, module.rstrip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--repeat", metavar="INT", type=int, default=5, help="repetitions (Default: 5)"
+    )
+    parser.add_argument(
+        "--imports",
+        metavar="INT",
+        type=int,
+        default=10,
+        help="number of slowest imports listed (Default: 10)",
+    )
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".ipal") as f:
+        f.write(json.dumps({"timestamp": 1, "malicious": False, "ids": False}) + "\n")
+        f.write(json.dumps({"timestamp": 2, "malicious": 1, "ids": True}) + "\n")
+        f.flush()
+
+        runs = {
+            "python -c pass": None,
+            "ipal-evaluate --version": ["--version"],
+            "ipal-evaluate --metrics F1": ["--metrics", "F1", f.name],
+        }
+        for name, evaluate_args in runs.items():
+            if evaluate_args is None:
+                start = time.perf_counter()
+                subprocess.run([sys.executable, "-c", "pass"], check=True)
+                print(f"{name:30} {(time.perf_counter() - start) * 1000:8.1f} ms")
+            else:
+                print(f"{name:30} {run(evaluate_args, args.repeat):8.1f} ms")
+
+        print("\nslowest imports of ipal-evaluate --metrics F1:")
+        for cumulative, module in slowest_imports(["--metrics", "F1", f.name], args.imports):
+            print(f"{cumulative:8.1f} ms {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,15 +7,21 @@ setup(
     scripts=["ipal-evaluate", "ipal-plot-alerts", "ipal-plot-metrics", "ipal-tune"],
     install_requires=[
         "numpy",
-        "scikit-learn",
         "opencv-python-headless",
         "eTaPR @ https://github.com/saurf4ng/eTaPR/blob/main/eTaPR-22.6.1-py3-none-any.whl?raw=true",
         "pandas",
         "matplotlib",
-        "affiliation @ git+https://github.com/ahstat/affiliation-metrics-py.git",
         "ray[tune]",
     ],
-    tests_require=["pre-commit", "black", "flake8", "pytest", "pytest-cov", "isort"],
+    tests_require=[
+        "pre-commit",
+        "black",
+        "flake8",
+        "pytest",
+        "pytest-cov",
+        "isort",
+        "affiliation @ git+https://github.com/ahstat/affiliation-metrics-py.git",
+    ],
     url="https://github.com/fkie-cad/ipal_evaluate",
     author="Konrad Wolsing",
     author_email="wolsing@comsys.rwth-aachen.de",
@@ -0,0 +1,155 @@
+import math
+
+import numpy as np
+import pytest
+from pytest import approx
+
+import evaluate.settings as settings
+from evaluate.dataset import Dataset
+from metrics.affiliation import AffiliationMetric, affiliation_zones, pr_from_events
+
+# https://github.com/ahstat/affiliation-metrics-py#usage
+events_pred = [(1, 3), (6, 18), (25, 26)]
+events_gt = [(1, 8), (16, 17), (25, 28), (29, 31)]
+Trange = (-1, 32)
+
+
+def as_arrays(events):
+    return np.array(events, dtype=np.float64).reshape(-1, 2).T
+
+
+def test_zones():
+    start, stop = affiliation_zones(*as_arrays(events_gt), Trange)
+
+    assert start.tolist() == [-1, 12, 21, 28.5]
+    assert stop.tolist() == [12, 21, 28.5, 32]
+
+
+def test_single_event():
+    # Predictions at distance [1, 2] of [1, 3], surpassed by a random point
+    # within (0, 10) with probability (7 - d) / 10
+    precision, recall = pr_from_events(
+        *as_arrays([(4, 5)]), *as_arrays([(1, 3)]), (0, 10)
+    )
+
+    assert precision.tolist() == approx([0.55])
+    assert recall.tolist() == approx([(0.6 + 0.7) / 2])
+
+
+def test_pr_from_events():
+    precision, recall = pr_from_events(
+        *as_arrays(events_pred), *as_arrays(events_gt), Trange
+    )
+
+    assert precision[:3].tolist() == approx([31 / 52, 16 / 27, 1])
+    assert math.isnan(precision[3])
+    assert recall.tolist() == approx([173 / 182, 1, 61 / 72, 0])
+
+    with pytest.raises(ValueError):
+        pr_from_events(*as_arrays(events_pred), *as_arrays([]), Trange)
+
+
+def test_reference():
+    affiliation = pytest.importorskip("affiliation.metrics")
+
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        truth = np.repeat(rng.random(20) < 0.3, rng.integers(1, 5, 20))
+        predicted = rng.random(len(truth)) < 0.2
+        if not truth.any():
+            continue
+
+        ergs = AffiliationMetric.calculate(truth.tolist(), predicted.tolist())
+        result = affiliation.pr_from_events(
+            [(int(s), int(e)) for s, e in zip(*_events(predicted))],
+            [(int(s), int(e)) for s, e in zip(*_events(truth))],
+            (0, len(truth)),
+        )
+
+        assert ergs["Affiliation-Precision"] == approx(result["precision"], nan_ok=True)
+        assert ergs["Affiliation-Recall"] == approx(result["recall"])
+
+
+# Computed once with affiliation-metrics-py, i.e., test_reference without it
+reference = [
+    (
+        "0000000001111000111000000000011111111",
+        "0011011000000111010101000000100000100",
+        0.5509521902443862,
+        0.8581648362728217,
+    ),
+    (
+        "11110000000000000000100110000",
+        "01000011001000001100000101100",
+        0.5441468253968255,
+        0.8217757936507937,
+    ),
+    (
+        "00000011110000000000000000011110000",
+        "10000110100000000000000000100000000",
+        0.7133497133497133,
+        0.8686527436527436,
+    ),
+    (
+        "00111001111111000000100000000",
+        "11000010000011101101010100000",
+        0.46439393939393936,
+        0.7838504088504089,
+    ),
+]
+
+
+@pytest.mark.parametrize("truth,predicted,precision,recall", reference)
+def test_reference_values(truth, predicted, precision, recall):
+    ergs = AffiliationMetric.calculate(
+        [c == "1" for c in truth], [c == "1" for c in predicted]
+    )
+
+    assert ergs["Affiliation-Precision"] == approx(precision, rel=1e-9)
+    assert ergs["Affiliation-Recall"] == approx(recall, rel=1e-9)
+
+
+def _events(mask):
+    change = np.diff(mask.astype(np.int8), prepend=0, append=0)
+    return np.flatnonzero(change == 1), np.flatnonzero(change == -1)
+
+
+def test_calculate():
+    truth = [False, True, True, False, False, False, True, False]
+    predicted = [False, False, True, True, False, False, False, False]
+    ergs = AffiliationMetric.calculate(truth, predicted)
+
+    # Events [1, 3) and [6, 7) with zones [0, 4.5) and [4.5, 8)
+    expected, _ = pr_from_events(*as_arrays([(2, 4)]), *as_arrays([(1, 3)]), (0, 4.5))
+    assert ergs["Affiliation-Precision"] == approx(expected[0])
+    assert 0 < ergs["Affiliation-Recall"] < 0.5
+    assert set(ergs) == set(AffiliationMetric.defines())
+
+    ergs = AffiliationMetric.calculate(truth, [False] * len(truth))
+    assert math.isnan(ergs["Affiliation-Precision"])
+    assert ergs["Affiliation-Recall"] == 0
+
+
+def test_timestamps():
+    truth = [False, True, True, False, False, False, True, False]
+    predicted = [False, False, True, True, False, False, False, False]
+    dataset = Dataset.from_messages(
+        [
+            {"timestamp": 5 + 2 * i, "malicious": m, "ids": p}
+            for i, (m, p) in enumerate(zip(truth, predicted))
+        ]
+    )
+    indices = AffiliationMetric.calculate(truth, predicted, dataset)
+    bak = settings.affiliation_timestamps
+    settings.affiliation_timestamps = True
+
+    try:
+        # Affiliation is invariant to scaling and shifting the time
+        ergs = AffiliationMetric.calculate(truth, predicted, dataset)
+        assert ergs == approx(indices)
+
+        # The third message is shorter now
+        dataset.timestamp[3] = 10
+        assert AffiliationMetric.calculate(truth, predicted, dataset) != approx(ergs)
+    finally:
+        settings.affiliation_timestamps = bak
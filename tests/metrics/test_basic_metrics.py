@@ -15,11 +15,11 @@ from metrics.basic_metrics import (
     Precision,
     Recall,
 )
-from tests.metrics.test_data import test_data
+from tests.metrics.test_data import test_dataset
 
 
 def test_confusion():
-    truth, predicted = parse_ipal_input(test_data)
+    truth, predicted = parse_ipal_input(test_dataset)
     ergs = Confusion.calculate(truth, predicted)
 
     expected = {"tn": 2, "fp": 2, "fn": 2, "tp": 2}
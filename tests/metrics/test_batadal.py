@@ -0,0 +1,32 @@
+from pytest import approx
+
+from evaluate.dataset import Dataset
+from metrics.batadal import BatadalTTD
+from tests.metrics.test_data import test_attacks, test_dataset
+
+
+def test_batadal_ttd():
+    ergs = BatadalTTD.calculate(dataset=test_dataset, attacks=test_attacks)
+
+    # both attacks are detected by their last entry
+    assert ergs == {"BATADAL-TTD": 0.0}
+
+
+def test_batadal_ttd_single_and_final():
+    test_data = [
+        {"timestamp": 1, "malicious": False, "ids": True},
+        # single timestep attack, detected
+        {"timestamp": 2, "malicious": "a", "ids": True},
+        {"timestamp": 3, "malicious": False, "ids": False},
+        # undetected attack, maximum TTD
+        {"timestamp": 4, "malicious": "b", "ids": False},
+        {"timestamp": 6, "malicious": "b", "ids": False},
+        {"timestamp": 7, "malicious": False, "ids": True},
+        # attack until the end of the dataset, consecutive scenarios
+        {"timestamp": 8, "malicious": "c", "ids": False},
+        {"timestamp": 9, "malicious": "a", "ids": True},
+        {"timestamp": 12, "malicious": "a", "ids": False},
+    ]
+    ergs = BatadalTTD.calculate(dataset=Dataset.from_messages(test_data), attacks=[])
+
+    assert ergs["BATADAL-TTD"] == approx(1 - (0 + 1 + 1 / 4) / 3)
@@ -0,0 +1,50 @@
+import numpy as np
+
+from metrics.confusion import (
+    batch_confusion,
+    confusion_counts,
+    count_at_least,
+    threshold_confusion,
+)
+
+
+def reference(truth, predicted):
+    pairs = list(zip(truth, predicted))
+    return [pairs.count((t, p)) for t, p in [(0, 0), (0, 1), (1, 0), (1, 1)]]
+
+
+def test_confusion_counts():
+    truth = np.array([0, 0, 1, 1, 1, 0], dtype=np.int8)
+    predicted = np.array([0, 1, 1, 0, 1, 0], dtype=np.int8)
+
+    assert confusion_counts(truth, predicted).tolist() == [2, 1, 1, 2]
+    assert confusion_counts([], []).tolist() == [0, 0, 0, 0]
+
+
+def test_batch_confusion():
+    rng = np.random.default_rng(0)
+    truth = rng.integers(0, 2, 100)
+    predicted = rng.integers(0, 2, (5, 100))
+
+    counts = batch_confusion(truth, predicted)
+
+    assert counts.shape == (5, 4)
+    for row, classification in zip(counts, predicted):
+        assert row.tolist() == reference(truth.tolist(), classification.tolist())
+
+
+def test_threshold_confusion():
+    rng = np.random.default_rng(1)
+    truth = rng.integers(0, 2, 100)
+    score = rng.random(100)
+    thresholds = np.array([1.5, 0.9, 0.5, 0.1, 0])
+
+    counts = threshold_confusion(truth, score, thresholds)
+
+    assert (
+        count_at_least(score, thresholds).tolist()
+        == (counts[:, [1, 3]]).sum(axis=1).tolist()
+    )
+    for row, threshold in zip(counts, thresholds):
+        predicted = (score >= threshold).astype(int)
+        assert row.tolist() == reference(truth.tolist(), predicted.tolist())
@@ -1,6 +1,7 @@
 import numpy as np
 
-from evaluate.utils import parse_ipal_input
+from evaluate.dataset import Dataset
+from evaluate.utils import LABEL_DTYPE, labels_from_booleans, parse_ipal_input
 
 test_data = [
     {"timestamp": 1, "state": {}, "malicious": False, "metrics": {}, "ids": False},
@@ -54,9 +55,19 @@ test_attacks = [
     {"id": "b", "attack_point": [], "description": "", "start": 7, "end": 8},
 ]
 
+test_dataset = Dataset.from_messages(test_data)
+
 
 def test_parse_ipal_input():
-    truth, predicted = parse_ipal_input(test_data)
+    truth, predicted = parse_ipal_input(test_dataset)
 
     assert np.array_equal(truth, np.array([0, 0, 1, 1, 0, 0, 1, 1]))
     assert np.array_equal(predicted, np.array([0, 1, 0, 1, 0, 1, 0, 1]))
+    assert truth.dtype == LABEL_DTYPE and predicted.dtype == LABEL_DTYPE
+
+
+def test_labels_from_booleans():
+    labels = labels_from_booleans([bool(d["ids"]) for d in test_data])
+
+    assert labels.dtype == LABEL_DTYPE
+    assert np.array_equal(labels, np.array([0, 1, 0, 1, 0, 1, 0, 1]))
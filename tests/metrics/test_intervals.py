@@ -0,0 +1,95 @@
+import numpy as np
+
+from evaluate.dataset import Dataset
+from metrics.intervals import AttackIndex, Runs, uncovered
+from metrics.metric import get_alarms
+
+# unsorted and overlapping attacks, the last one is not timed
+attacks = [
+    {"id": "b", "start": 10, "end": 12},
+    {"id": "a", "start": 2, "end": 8},
+    {"id": "c", "start": 4, "end": 5},
+    {"id": "d", "ipalid": 42},
+]
+
+
+def test_index_order():
+    index = AttackIndex(attacks)
+
+    assert len(index) == 3
+    assert index.ids == ["a", "c", "b"]
+    assert index.position.tolist() == [1, 2, 0]
+    assert AttackIndex.of(attacks) is AttackIndex.of(attacks)
+
+
+def test_covered():
+    index = AttackIndex(attacks)
+    timestamps = np.array([1, 2, 6, 9, 10, 13, 7])
+
+    assert index.covered(timestamps).tolist() == [0, 1, 1, 0, 1, 0, 1]
+    assert index.covered(timestamps, gracetime=1).tolist() == [1, 1, 1, 1, 1, 1, 1]
+
+
+def test_rows_and_hits():
+    index = AttackIndex(attacks)
+    timestamps = np.array([1, 3, 4, 6, 9, 11])
+
+    first, stop = index.rows(timestamps)
+    assert first.tolist() == [1, 2, 5]
+    assert stop.tolist() == [4, 3, 6]
+
+    assert index.hits([9, 1]).tolist() == [False, False, False]
+    assert index.hits([9, 1], gracetime=1).tolist() == [True, False, True]
+
+
+def test_alarm_intervals():
+    ids = [True, True, False, False, True, True, True, False, True]
+    dataset = Dataset.from_messages(
+        {"timestamp": t, "malicious": False, "ids": v} for t, v in enumerate(ids)
+    )
+    alarms = get_alarms(dataset)
+
+    assert alarms is get_alarms(dataset)  # computed once
+    assert alarms.first.tolist() == [0, 4, 8]
+    assert alarms.last.tolist() == [1, 6, 8]
+    assert list(alarms) == [(0, 1), (4, 6), (8, 8)]
+    assert alarms.rows.tolist() == [0, 1, 4, 5, 6, 8]
+    assert alarms.first_from(np.array([0, 2, 5, 7, 9])).tolist() == [0, 4, 5, 8, 9]
+
+
+def test_runs():
+    labels = [False, "a", "a", "b", False, False, "a"]
+    dataset = Dataset.from_messages(
+        {"timestamp": 2 * t, "malicious": v, "ids": False} for t, v in enumerate(labels)
+    )
+    runs = Runs.of(dataset, "malicious")
+
+    assert runs is Runs.of(dataset, "malicious")  # computed once
+    assert runs.first.tolist() == [0, 1, 3, 4, 6]
+    assert runs.last.tolist() == [0, 2, 3, 5, 6]
+    assert runs.length.tolist() == [1, 2, 1, 2, 1]
+    assert [dataset.scenarios[v] for v in runs.value] == [False, "a", "b", False, "a"]
+    assert runs.start.tolist() == [0, 2, 6, 8, 12]
+    assert runs.end.tolist() == [0, 4, 6, 10, 12]
+
+    # consecutive malicious runs form a single attack
+    first, last = runs.select(runs.value != 0)
+    assert (first.tolist(), last.tolist()) == ([1, 6], [3, 6])
+
+    assert len(Runs([])) == 0 and len(Runs([]).last) == 0
+
+
+def test_uncovered():
+    first, last = np.array([0, 4, 8]), np.array([1, 6, 12])
+    cover_first, cover_stop = np.array([1, 5, 5]), np.array([2, 6, 10])
+
+    first, last = uncovered(first, last, cover_first, cover_stop)
+    assert first.tolist() == [0, 4, 10]
+    assert last.tolist() == [0, 4, 12]
+
+
+def test_overlaps_gracetime():
+    index = AttackIndex([{"id": 1, "start": 10, "end": 20}])
+
+    assert index.overlaps([0, 21, 15], [9, 30, 15]).tolist() == [False, False, True]
+    assert index.overlaps([0, 21], [9, 30], gracetime=1).tolist() == [True, True]
@@ -1,9 +1,11 @@
 from typing import Any, Dict
 from unittest import TestCase
 
+import numpy as np
 import pytest
 from pytest import approx
 
+from evaluate.dataset import Dataset
 from evaluate.settings import nab_profiles as profiles
 from metrics.nab_score import Nab
 
@@ -37,19 +39,17 @@ def _init_scores() -> Dict[str, Dict[str, float]]:
 
 
 @pytest.mark.parametrize(
-    "entry,attack,result",
+    "timestamp,attack,result",
     [
-        ({"timestamp": 5}, {"start": 1, "end": 5}, -1 / 5),
-        ({"timestamp": 1}, {"start": 1, "end": 3}, -1.0),
-        ({"timestamp": 1}, {"start": 1, "end": 1}, -1.0),
-        ({"timestamp": 2}, {"start": 1, "end": 1}, 1.0),
-        ({"timestamp": 9}, {"start": 1, "end": 5}, 1.0),
+        (5, {"start": 1, "end": 5}, -1 / 5),
+        (1, {"start": 1, "end": 3}, -1.0),
+        (1, {"start": 1, "end": 1}, -1.0),
+        (2, {"start": 1, "end": 1}, 1.0),
+        (9, {"start": 1, "end": 5}, 1.0),
     ],
 )
-def test_relative_pos(
-    entry: Dict[str, Any], attack: Dict[str, Any], result: float
-) -> None:
-    assert Nab._relative_pos(entry, attack) == approx(result)
+def test_relative_pos(timestamp: int, attack: Dict[str, Any], result: float) -> None:
+    assert Nab._relative_pos(timestamp, attack) == approx(result)
 
 
 def test_calculate_format() -> None:
@@ -63,9 +63,16 @@ def test_calculate_format() -> None:
         {"id": "a", "attack_point": [], "description": "", "start": 1, "end": 5},
     ]
     scores = Nab._compute_scores(
-        _init_scores(), test_data, test_attacks, profiles, len(test_attacks), 0
+        _init_scores(),
+        Dataset.from_messages(test_data),
+        test_attacks,
+        profiles,
+        len(test_attacks),
+        0,
+    )
+    final_res = Nab.calculate(
+        dataset=Dataset.from_messages(test_data), attacks=test_attacks, ergs=ergs
     )
-    final_res = Nab.calculate(dataset=test_data, attacks=test_attacks, ergs=ergs)
 
     # verify that the normalized scores are being returned by the calculate function
     expected = {
@@ -93,7 +100,12 @@ def test_latest_tp_only() -> None:
 
     # compare results with logical expected values
     scores = Nab._compute_scores(
-        _init_scores(), test_data, test_attacks, profiles, len(test_attacks), 0
+        _init_scores(),
+        Dataset.from_messages(test_data),
+        test_attacks,
+        profiles,
+        len(test_attacks),
+        0,
     )
     for name, profile in profiles.items():
         assert scores[name]["null"] == profile["nab_afn"] * len(test_attacks)
@@ -108,7 +120,7 @@ def test_latest_tp_only() -> None:
     # compare results with values obtained from running the official implementation
     scores = Nab._compute_scores(
         _init_scores(),
-        test_data,
+        Dataset.from_messages(test_data),
         test_attacks,
         _validation_profiles,
         len(test_attacks),
@@ -139,7 +151,12 @@ def test_fp_before_any_attack() -> None:
 
     # compare results with logical expected values
     scores = Nab._compute_scores(
-        _init_scores(), test_data, test_attacks, profiles, len(test_attacks), 1
+        _init_scores(),
+        Dataset.from_messages(test_data),
+        test_attacks,
+        profiles,
+        len(test_attacks),
+        1,
     )
     for name, profile in profiles.items():
         assert scores[name]["null"] == profile["nab_afn"] * len(test_attacks)
@@ -164,7 +181,12 @@ def test_multiple_tp() -> None:
 
     # compare results with logical expected values
     scores = Nab._compute_scores(
-        _init_scores(), test_data, test_attacks, profiles, len(test_attacks), 0
+        _init_scores(),
+        Dataset.from_messages(test_data),
+        test_attacks,
+        profiles,
+        len(test_attacks),
+        0,
     )
     for name, profile in profiles.items():
         assert scores[name]["null"] == profile["nab_afn"] * len(test_attacks)
@@ -173,7 +195,9 @@ def test_multiple_tp() -> None:
         # at timestamp 3 should count
         assert scores[name]["raw"] == approx(
             (
-                Nab._sigma(Nab._relative_pos(test_data[2], test_attacks[0]))
+                Nab._sigma(
+                    Nab._relative_pos(test_data[2]["timestamp"], test_attacks[0])
+                )
                 / Nab._sigma(-1.0)
             )
             * profile["nab_atp"]
@@ -182,7 +206,7 @@ def test_multiple_tp() -> None:
     # compare results with values obtained from running the official implementation
     scores = Nab._compute_scores(
         _init_scores(),
-        test_data,
+        Dataset.from_messages(test_data),
         test_attacks,
         _validation_profiles,
         len(test_attacks),
@@ -225,7 +249,12 @@ def test_overlapping_attacks() -> None:
 
     # compare results with logical expected values
     scores = Nab._compute_scores(
-        _init_scores(), test_data, test_attacks, profiles, len(test_attacks), 0
+        _init_scores(),
+        Dataset.from_messages(test_data),
+        test_attacks,
+        profiles,
+        len(test_attacks),
+        0,
     )
     for name, profile in profiles.items():
         assert scores[name]["null"] == profile["nab_afn"] * len(test_attacks)
@@ -258,7 +287,7 @@ def test_combined_short() -> None:
     # compare results with values obtained from running the official implementation
     scores = Nab._compute_scores(
         _init_scores(),
-        test_data,
+        Dataset.from_messages(test_data),
         test_attacks,
         _validation_profiles,
         len(test_attacks),
@@ -314,7 +343,7 @@ def test_combined() -> None:
     # compare results with values obtained from running the official implementation
     scores = Nab._compute_scores(
         _init_scores(),
-        test_data,
+        Dataset.from_messages(test_data),
         test_attacks,
         _validation_profiles,
         len(test_attacks),
@@ -328,3 +357,87 @@ def test_combined() -> None:
 
     for profile, score in scores.items():
         assert score["raw"] == approx(raw_scores[profile])
+
+
+def _score_sequentially(dataset, attacks):
+    # Reference: score every alarm with the per-alarm (streaming) implementation
+    scores = _init_scores()
+    state = {"ignore_until": 0, "a_index": 0, "max_end": 0}
+    for timestamp in dataset.timestamp[dataset.ids].tolist():
+        Nab._score_alarm(state, scores, timestamp, attacks, profiles)
+    return scores
+
+
+@pytest.mark.parametrize("blocksize", [1, 3, 1024])
+def test_vectorized_kernel(monkeypatch, blocksize) -> None:
+    monkeypatch.setattr("metrics.nab_score.BLOCKSIZE", blocksize)
+    rng = np.random.default_rng(0)
+
+    for _ in range(200):
+        step = rng.choice([0, 0.5, 1, 2.5], size=rng.integers(0, 40))
+        timestamps = np.cumsum(step).tolist()
+        starts = np.cumsum(rng.choice([0, 0.6, 1, 4], size=rng.integers(1, 5)))
+        lengths = rng.choice([0, 0.4, 2, 9], size=len(starts))
+        test_attacks = [
+            {"id": str(i), "start": s, "end": s + length}
+            for i, (s, length) in enumerate(zip(starts.tolist(), lengths.tolist()))
+        ]
+        dataset = Dataset.from_messages(
+            {"timestamp": t, "malicious": False, "ids": bool(rng.random() < 0.6)}
+            for t in timestamps
+        )
+
+        scores = Nab._compute_scores(
+            _init_scores(), dataset, test_attacks, profiles, len(test_attacks), 0
+        )
+        expected = _score_sequentially(dataset, test_attacks)
+        for name in profiles:
+            assert scores[name]["raw"] == approx(expected[name]["raw"], abs=1e-12)
+
+
+def test_overlapping_float_timestamps() -> None:
+    # The alarm at 4.5 lies after ignore_until = 5 - 1, yet before the start of
+    # the overlapping attack 'b', and detects 'a' once more
+    test_data = [
+        {"timestamp": 2, "malicious": True, "ids": True},
+        {"timestamp": 4.5, "malicious": True, "ids": True},
+        {"timestamp": 5, "malicious": True, "ids": True},
+    ]
+    test_attacks = [
+        {"id": "a", "start": 1, "end": 8},
+        {"id": "b", "start": 5, "end": 6},
+    ]
+    dataset = Dataset.from_messages(test_data)
+
+    scores = Nab._compute_scores(
+        _init_scores(), dataset, test_attacks, profiles, len(test_attacks), 0
+    )
+    expected = _score_sequentially(dataset, test_attacks)
+    for name in profiles:
+        assert scores[name]["raw"] == approx(expected[name]["raw"])
+
+
+def test_custom_profiles(monkeypatch) -> None:
+    custom = {**profiles, "strict": {"nab_atp": 1, "nab_afp": -1, "nab_afn": -1}}
+    monkeypatch.setattr("evaluate.settings.nab_profiles", custom)
+
+    test_data = [
+        {"timestamp": 1, "malicious": False, "ids": True},
+        {"timestamp": 5, "malicious": True, "ids": True},
+    ]
+    test_attacks = [{"id": "a", "start": 4, "end": 8}]
+    ergs = Nab.calculate(
+        dataset=Dataset.from_messages(test_data),
+        attacks=test_attacks,
+        ergs={"Detected-Scenarios": ["a"]},
+    )
+
+    assert list(ergs) == Nab.defines()
+    assert list(ergs) == [
+        "NAB-score-default",
+        "NAB-score-low-fp",
+        "NAB-score-low-fn",
+        "NAB-score-strict",
+    ]
+    # a false positive before any attack costs the whole nab_afp
+    assert ergs["NAB-score-strict"] < ergs["NAB-score-default"]
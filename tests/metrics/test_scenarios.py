@@ -1,25 +1,44 @@
 from unittest import TestCase
 
+from evaluate.dataset import Dataset
 from metrics.scenarios import (
     DetectedScenarios,
     DetectedScenariosPercent,
     DetectionDelay,
+    PenaltyScore,
     ScenarioRecall,
 )
-from tests.metrics.test_data import test_attacks, test_data
+from tests.metrics.test_data import test_attacks, test_dataset
 
 
 def test_det_scenarios():
-    ergs = DetectedScenarios.calculate(dataset=test_data, attacks=test_attacks)
+    ergs = DetectedScenarios.calculate(dataset=test_dataset, attacks=test_attacks)
 
     expected = {"Detected-Scenarios": ["a", "b"]}
     TestCase().assertDictEqual(expected, ergs)
 
 
+def test_det_scenarios_ipalid():
+    # IPAL messages carry no 'ipalid', so attacks are not matched by their id
+    dataset = Dataset.from_messages(
+        [{"id": 7, "timestamp": 1, "malicious": "a", "ids": True}]
+    )
+    attacks = [{"id": "a", "ipalid": 7}]
+    ergs = DetectedScenarios.calculate(dataset=dataset, attacks=attacks)
+
+    assert ergs == {"Detected-Scenarios": []}
+
+    state = DetectedScenarios.init_state(attacks)
+    DetectedScenarios.update(
+        state, {"id": 7, "timestamp": 1, "malicious": "a", "ids": True}, attacks
+    )
+    assert DetectedScenarios.finalize(state, attacks) == ergs
+
+
 def test_det_scenarios_perc():
     ergs = {"Detected-Scenarios": ["b"]}
     ergs = DetectedScenariosPercent.calculate(
-        dataset=test_data, attacks=test_attacks, ergs=ergs
+        dataset=test_dataset, attacks=test_attacks, ergs=ergs
     )
 
     expected = {"Detected-Scenarios-Percent": 0.5}
@@ -27,12 +46,50 @@ def test_det_scenarios_perc():
 
 
 def test_scenario_recall():
-    ergs = ScenarioRecall.calculate(dataset=test_data, attacks=test_attacks)
+    ergs = ScenarioRecall.calculate(dataset=test_dataset, attacks=test_attacks)
 
-    expected = {"Scenario-Recall": {"a": 0.0, "b": 1.0}}
+    expected = {
+        "Scenario-Recall": {"a": 0.0, "b": 1.0},
+        "Scenario-Statistics": {
+            "a": {"messages": 1, "alerts": 0, "first-alert": None, "last-alert": None},
+            "b": {"messages": 1, "alerts": 1, "first-alert": 8, "last-alert": 8},
+        },
+    }
     TestCase().assertDictEqual(expected, ergs)
 
 
+def test_scenario_statistics_stream():
+    test_data = [
+        {"timestamp": 4, "malicious": "a", "ids": True},
+        {"timestamp": 1, "malicious": "a", "ids": True},
+        {"timestamp": 2, "malicious": "b", "ids": False},
+        {"timestamp": 3, "malicious": "c", "ids": True},  # unknown scenario
+        {"timestamp": 5, "malicious": "a", "ids": False},
+        {"timestamp": 9, "malicious": "a", "ids": True},
+    ]
+    test_attacks = [
+        {"id": "a", "start": 1, "end": 9},
+        {"id": "b", "start": 2, "end": 2},
+    ]
+
+    ergs = ScenarioRecall.calculate(
+        dataset=Dataset.from_messages(test_data), attacks=test_attacks
+    )
+
+    state = ScenarioRecall.init_state(test_attacks)
+    for js in test_data:
+        ScenarioRecall.update(state, js, test_attacks)
+    assert ScenarioRecall.finalize(state, test_attacks) == ergs
+
+    assert ergs["Scenario-Recall"] == {"a": 0.75, "b": 0.0}
+    assert ergs["Scenario-Statistics"]["a"] == {
+        "messages": 4,
+        "alerts": 3,
+        "first-alert": 1,
+        "last-alert": 9,
+    }
+
+
 def test_det_delay():
     ergs = {"Detected-Scenarios": ["a", "b"]}
     test_data = [
@@ -48,7 +105,38 @@ def test_det_delay():
         {"id": "b", "attack_point": [], "description": "", "start": 9, "end": 13},
     ]
 
-    ergs = DetectionDelay.calculate(dataset=test_data, attacks=test_attacks, ergs=ergs)
+    ergs = DetectionDelay.calculate(
+        dataset=Dataset.from_messages(test_data), attacks=test_attacks, ergs=ergs
+    )
 
     expected = {"Detection-Delay": 8}
     TestCase().assertDictEqual(expected, ergs)
+
+
+def test_det_delay_overlapping():
+    ergs = {"Detected-Scenarios": ["a", "b"]}
+    test_data = [
+        {"timestamp": 1, "malicious": True, "ids": False},
+        {"timestamp": 3, "malicious": True, "ids": False},
+        {"timestamp": 4, "malicious": True, "ids": True},
+        {"timestamp": 6, "malicious": True, "ids": False},
+    ]
+    test_attacks = [
+        {"id": "a", "attack_point": [], "description": "", "start": 1, "end": 6},
+        {"id": "b", "attack_point": [], "description": "", "start": 2, "end": 6},
+    ]
+
+    ergs = DetectionDelay.calculate(
+        dataset=Dataset.from_messages(test_data), attacks=test_attacks, ergs=ergs
+    )
+
+    expected = {"Detection-Delay": 5}
+    TestCase().assertDictEqual(expected, ergs)
+
+
+def test_penalty_score():
+    ergs = PenaltyScore.calculate(dataset=test_dataset, attacks=test_attacks)
+
+    # alarms at timestamps 2 and 6 are outside of the attacks
+    expected = {"Penalty-Score": 2}
+    TestCase().assertDictEqual(expected, ergs)
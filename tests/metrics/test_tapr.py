@@ -1,12 +1,17 @@
 from unittest import TestCase
 
+import numpy as np
+import pytest
+
+import evaluate.settings as settings
 from evaluate.utils import parse_ipal_input
+from metrics.basic_metrics import FScore
 from metrics.tapr import eTaPR
-from tests.metrics.test_data import test_data
+from tests.metrics.test_data import test_dataset
 
 
 def test_eTaPR():
-    truth, predicted = parse_ipal_input(test_data)
+    truth, predicted = parse_ipal_input(test_dataset)
     ergs = eTaPR.calculate(truth, predicted)
 
     expected = {
@@ -19,3 +24,67 @@ def test_eTaPR():
         "eTaF10": 0.7463054187192119,
     }
     TestCase().assertDictEqual(expected, ergs)
+
+
+def test_eTaPR_ranges():
+    ranges = eTaPR._list_to_eTaPr_list(np.array([1, 1, 0, 0, 1, 0, 1], np.int8))
+
+    assert [r.get_time() for r in ranges] == [(0, 1), (4, 4), (6, 6)]
+    assert [r.get_name() for r in ranges] == ["1", "2", "3"]
+
+
+def _file_calculate(path, truth, predicted):
+    # eTaPR.calculate reading the ranges from a file with File_IO.load_file
+    from eTaPR_pkg import etapr
+    from eTaPR_pkg.DataManage import File_IO
+
+    if all([x == 0 for x in predicted]) or all([x == 0 for x in truth]):
+        return {x: 0 for x in eTaPR.defines()}
+
+    ranges = []
+    for labels in [truth, predicted]:
+        path.write_text("\n".join([str(-1 if x == 1 else 1) for x in labels]) + "\n")
+        ranges.append(File_IO.load_file(str(path), "stream"))
+
+    result = etapr.evaluate_w_ranges(
+        *ranges, settings.eTaPR_theta_p, settings.eTaPR_theta_r, settings.eTaPR_delta
+    )
+    output = {"eTaR": result["eTaR"], "eTaP": result["eTaP"]}
+    fscores = FScore.calculate(
+        ergs={"Precision": result["eTaP"], "Recall": result["eTaR"]}
+    )
+    output.update({"eTa{}".format(name): value for name, value in fscores.items()})
+    return output
+
+
+rng = np.random.default_rng(0)
+labels = [
+    [0] * 6,
+    [1] * 6,
+    [0],
+    [1],
+    [0, 0, 1, 0, 1],
+    [1, 0, 0, 1, 1],
+] + [
+    (rng.random(int(rng.integers(1, 50))) < 0.3).astype(int).tolist() for _ in range(20)
+]
+
+
+@pytest.mark.parametrize("truth", labels)
+def test_eTaPR_file_io(tmp_path, truth):
+    pytest.importorskip("eTaPR_pkg")
+    from eTaPR_pkg.DataManage import File_IO
+
+    path = tmp_path / "labels"
+    path.write_text("\n".join([str(-1 if x == 1 else 1) for x in truth]) + "\n")
+    expected = File_IO.load_file(str(path), "stream")
+    ranges = eTaPR._list_to_eTaPr_list(np.array(truth, np.int8))
+
+    assert [r.get_time() for r in ranges] == [r.get_time() for r in expected]
+    assert [r.get_name() for r in ranges] == [r.get_name() for r in expected]
+
+    # Bit-identical results for predictions of the same length
+    for predicted in [truth[::-1], np.roll(truth, 1).tolist(), [1] * len(truth)]:
+        assert eTaPR.calculate(truth, predicted) == _file_calculate(
+            path, truth, predicted
+        )
@@ -0,0 +1,42 @@
+import pytest
+
+from metrics.basic_metrics import Confusion, FScore, Precision, Recall
+from metrics.registry import load_metric
+from metrics.scenarios import DetectedScenarios, DetectionDelay
+from metrics.utils import metrics, resolve_metrics
+
+
+def test_resolve_all():
+    ordered, pruned = resolve_metrics()
+
+    assert ordered == [load_metric(entry) for entry in metrics]
+    assert pruned == []
+
+
+def test_resolve_selection():
+    ordered, pruned = resolve_metrics(["F1", "Detection-Delay"])
+
+    assert ordered == [
+        Confusion,
+        Precision,
+        Recall,
+        FScore,
+        DetectedScenarios,
+        DetectionDelay,
+    ]
+    assert "Accuracy" in pruned and "F-Score" not in pruned
+    assert len(ordered) + len(pruned) == len(metrics)
+
+
+def test_resolve_unknown():
+    with pytest.raises(ValueError):
+        resolve_metrics(["F42"])
+
+
+def test_resolve_cycle(monkeypatch):
+    A = {"name": "A", "metric": "A", "requires": ["B"], "outputs": ["A"]}
+    B = {"name": "B", "metric": "B", "requires": ["A"], "outputs": ["B"]}
+
+    monkeypatch.setattr("metrics.utils.metrics", [A, B])
+    with pytest.raises(ValueError):
+        resolve_metrics(["A"])
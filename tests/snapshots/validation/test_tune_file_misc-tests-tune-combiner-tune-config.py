@@ -53,8 +53,15 @@ Number of trials: 4/4 (3 PENDING, 1 RUNNING)
   Recall: 0.0
   Scenario-Recall:
     '1': 0.0
+  Scenario-Statistics:
+    '1':
+      alerts: 0
+      first-alert: null
+      last-alert: null
+      messages: 802
   TPA: 0
   _evaluation-config:
+    affiliation_timestamps: false
     alarm_gracetime: 0
 ###IGNORE-LINE###
     batadal_gamma: 0.5
@@ -222,8 +229,15 @@ Number of trials: 4/4 (3 PENDING, 1 RUNNING)
   Recall: 0.899002493765586
   Scenario-Recall:
     '1': 0.899002493765586
+  Scenario-Statistics:
+    '1':
+      alerts: 721
+###IGNORE-LINE###
+###IGNORE-LINE###
+      messages: 802
   TPA: 19
   _evaluation-config:
+    affiliation_timestamps: false
     alarm_gracetime: 0
 ###IGNORE-LINE###
     batadal_gamma: 0.5
@@ -391,8 +405,15 @@ Number of trials: 4/4 (3 PENDING, 1 RUNNING)
   Recall: 0.899002493765586
   Scenario-Recall:
     '1': 0.899002493765586
+  Scenario-Statistics:
+    '1':
+      alerts: 721
+###IGNORE-LINE###
+###IGNORE-LINE###
+      messages: 802
   TPA: 19
   _evaluation-config:
+    affiliation_timestamps: false
     alarm_gracetime: 0
 ###IGNORE-LINE###
     batadal_gamma: 0.5
@@ -560,8 +581,15 @@ Number of trials: 4/4 (3 PENDING, 1 RUNNING)
   Recall: 0.899002493765586
   Scenario-Recall:
     '1': 0.899002493765586
+  Scenario-Statistics:
+    '1':
+      alerts: 721
+###IGNORE-LINE###
+###IGNORE-LINE###
+      messages: 802
   TPA: 19
   _evaluation-config:
+    affiliation_timestamps: false
     alarm_gracetime: 0
 ###IGNORE-LINE###
     batadal_gamma: 0.5
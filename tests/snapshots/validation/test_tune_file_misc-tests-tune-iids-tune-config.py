@@ -54,8 +54,15 @@ Number of trials: 4/4 (3 PENDING, 1 RUNNING)
   Recall: 0.899002493765586
   Scenario-Recall:
     '1': 0.899002493765586
+  Scenario-Statistics:
+    '1':
+      alerts: 721
+###IGNORE-LINE###
+###IGNORE-LINE###
+      messages: 802
   TPA: 19
   _evaluation-config:
+    affiliation_timestamps: false
     alarm_gracetime: 0
 ###IGNORE-LINE###
     batadal_gamma: 0.5
@@ -185,8 +192,15 @@ Number of trials: 4/4 (3 PENDING, 1 RUNNING)
   Recall: 0.899002493765586
   Scenario-Recall:
     '1': 0.899002493765586
+  Scenario-Statistics:
+    '1':
+      alerts: 721
+###IGNORE-LINE###
+###IGNORE-LINE###
+      messages: 802
   TPA: 19
   _evaluation-config:
+    affiliation_timestamps: false
     alarm_gracetime: 0
 ###IGNORE-LINE###
     batadal_gamma: 0.5
@@ -316,8 +330,15 @@ Number of trials: 4/4 (3 PENDING, 1 RUNNING)
   Recall: 0.899002493765586
   Scenario-Recall:
     '1': 0.899002493765586
+  Scenario-Statistics:
+    '1':
+      alerts: 721
+###IGNORE-LINE###
+###IGNORE-LINE###
+      messages: 802
   TPA: 19
   _evaluation-config:
+    affiliation_timestamps: false
     alarm_gracetime: 0
 ###IGNORE-LINE###
     batadal_gamma: 0.5
@@ -447,8 +468,15 @@ Number of trials: 4/4 (3 PENDING, 1 RUNNING)
   Recall: 0.899002493765586
   Scenario-Recall:
     '1': 0.899002493765586
+  Scenario-Statistics:
+    '1':
+      alerts: 721
+###IGNORE-LINE###
+###IGNORE-LINE###
+      messages: 802
   TPA: 19
   _evaluation-config:
+    affiliation_timestamps: false
     alarm_gracetime: 0
 ###IGNORE-LINE###
     batadal_gamma: 0.5
@@ -1,9 +1,13 @@
+import json
 from typing import Any, Dict, List
 
 import pytest
 
+from evaluate.attacks import fix_attacks, validate_attacks
 from evaluate.evaluate import check_timed_attacks_keys, check_timed_attacks_order
 
+from .conftest import evaluate
+
 
 @pytest.mark.parametrize(
     "attacks,result",
@@ -45,3 +49,106 @@ def test_attack_file_order(attacks: List[Dict[str, Any]], result: bool) -> None:
 )
 def test_attack_file_keys(attacks: List[Dict[str, Any]], result: bool) -> None:
     assert check_timed_attacks_keys(attacks) == result
+
+
+def test_validation_report():
+    attacks = [
+        {"id": 1, "start": 4, "end": 10},
+        {"id": 2, "start": 15, "end": 25},
+        {"id": 1, "start": 2, "end": 3},
+        {"id": 3, "start": 5, "end": 6},
+    ]
+    report = validate_attacks(attacks)
+
+    assert report["missing_keys"] == []
+    assert report["duplicate_ids"] == [1]
+    assert [
+        (u["index"], u["other_index"], u["relation"]) for u in report["unsorted"]
+    ] == [
+        (0, 2, "after"),
+        (1, 0, "after"),
+        (2, 3, "before"),
+        (3, 1, "before"),
+    ]
+    assert report["overlaps"] == [{"id": 3, "start": 5, "other_id": 1, "end": 10}]
+
+    report = validate_attacks([{"id": 1, "start": 1}, {"start": 1, "end": 2}])
+    assert report["missing_keys"] == [
+        {"index": 0, "id": 1, "keys": ["end"]},
+        {"index": 1, "id": None, "keys": ["id"]},
+    ]
+
+
+def test_validation_many_attacks():
+    attacks = [{"id": i, "start": -2 * i, "end": -2 * i + 1} for i in range(50000)]
+
+    report = validate_attacks(attacks)
+
+    assert len(report["unsorted"]) == 50000  # reversed order
+    assert report["overlaps"] == []
+
+
+def test_fix_attacks():
+    attacks = [
+        {"id": 2, "start": 15, "end": 25},
+        {"id": 1, "start": 4, "end": 10},
+        {"id": 1, "start": 8, "end": 12},
+        {"id": 1, "start": 4, "end": 10},
+        {"id": 3, "start": 5, "end": 6},
+    ]
+    fixed = fix_attacks(attacks)
+
+    assert fixed == [
+        {"id": 1, "start": 4, "end": 12},
+        {"id": 3, "start": 5, "end": 6},
+        {"id": 2, "start": 15, "end": 25},
+    ]
+    report = validate_attacks(fixed)
+    assert report["unsorted"] == [] and report["duplicate_ids"] == []
+
+
+def test_fix_attacks_option(tmp_path):
+    attacks = tmp_path / "attacks.json"
+    attacks.write_text(
+        json.dumps([{"id": 2, "start": 3, "end": 4}, {"id": 1, "start": 1, "end": 2}])
+    )
+    path = tmp_path / "input.ipal"
+    path.write_text(json.dumps({"timestamp": 1, "malicious": 1, "ids": True}) + "\n")
+
+    errno, _, stderr = evaluate(
+        ["--attacks", str(attacks), "--metrics", "F1", str(path)]
+    )
+    assert errno == 1
+    assert b"Attacks must be sorted chronologically" in stderr
+
+    fixed = tmp_path / "fixed.json"
+    errno, stdout, _ = evaluate(
+        ["--attacks", str(attacks), "--fix-attacks", str(fixed), "--metrics", "F1"]
+        + [str(path)]
+    )
+    assert errno == 0
+    assert json.loads(stdout)["F1"] == 1
+    assert [a["id"] for a in json.loads(fixed.read_text())] == [1, 2]
+
+    # Attacks of untimed datasets are not validated, hence cannot be fixed
+    errno, _, stderr = evaluate(
+        ["--attacks", str(attacks), "--fix-attacks", str(fixed)]
+        + ["--timed-dataset", "false", str(path)]
+    )
+    assert errno == 1
+    assert b"'--fix-attacks' cannot be combined" in stderr
+
+
+def test_missing_keys_logged_once(tmp_path):
+    attacks = tmp_path / "attacks.json"
+    attacks.write_text(json.dumps([{"id": 1, "start": 1}]))
+    path = tmp_path / "input.ipal"
+    path.write_text(json.dumps({"timestamp": 1, "malicious": 1, "ids": True}) + "\n")
+
+    fixed = tmp_path / "fixed.json"
+    errno, _, stderr = evaluate(
+        ["--attacks", str(attacks), "--fix-attacks", str(fixed), str(path)]
+    )
+    assert errno == 1
+    assert stderr.count(b"missing key 'end'") == 1
+    assert not fixed.exists()
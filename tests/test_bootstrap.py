@@ -0,0 +1,113 @@
+import numpy as np
+
+import evaluate.settings as settings
+from evaluate.bootstrap import Blocks, bootstrap
+from evaluate.dataset import Dataset
+from evaluate.evaluate import evaluate
+from evaluate.utils import parse_ipal_input
+from metrics.confusion import confusion_counts
+
+alarms = [False, True, True, False, False, True, False, True, True, False, True, False]
+malicious = [False, "a", "a", "a", False, "b", "b", False, False, False, False, False]
+messages = [
+    {"id": i, "timestamp": 2 * i, "malicious": m, "ids": a}
+    for i, (a, m) in enumerate(zip(alarms, malicious))
+]
+attacks = [
+    {"id": "a", "start": 2, "end": 6, "ipalid": 1},
+    {"id": "b", "start": 10, "end": 12},
+]
+
+
+def test_blocks():
+    blocks = Blocks(Dataset.from_messages(messages), attacks)
+
+    assert blocks.first.tolist() == [0, 1, 4, 5, 7]
+    assert blocks.last.tolist() == [0, 3, 4, 6, 11]
+    assert blocks.attack.tolist() == [False, True, False, True, False]
+    assert blocks.duration.tolist() == [2, 6, 2, 4, 10]
+    assert blocks.attacks == [[], [0], [], [1], []]
+
+
+def test_weights():
+    blocks = Blocks(Dataset.from_messages(messages), attacks)
+    weights = blocks.weights(100, np.random.default_rng(0))
+
+    assert weights.shape == (100, 5)
+    assert (weights[:, blocks.attack].sum(axis=1) == 2).all()
+    assert (weights[:, ~blocks.attack].sum(axis=1) == 3).all()
+
+    order = blocks.order(weights[0], np.random.default_rng(0))
+    assert np.bincount(order, minlength=5).tolist() == weights[0].tolist()
+    assert blocks.attack[order].tolist() == blocks.attack.tolist()
+
+
+def test_resample_identity():
+    dataset = Dataset.from_messages(messages)
+    blocks = Blocks(dataset, attacks)
+    replicate, replicate_attacks = blocks.resample(dataset, attacks, np.arange(5))
+
+    assert replicate.timestamp.tolist() == dataset.timestamp.tolist()
+    assert replicate.ids.tolist() == dataset.ids.tolist()
+    assert replicate.malicious.tolist() == dataset.malicious.tolist()
+    assert replicate.id.tolist() == dataset.id.tolist()
+    assert replicate_attacks == attacks
+
+
+def test_resample_copies():
+    dataset = Dataset.from_messages(messages)
+    blocks = Blocks(dataset, attacks)
+    replicate, replicate_attacks = blocks.resample(
+        dataset, attacks, np.array([4, 1, 0, 1, 0])
+    )
+
+    assert replicate.timestamp.tolist() == [
+        *[0, 2, 4, 6, 8],
+        *[10, 12, 14],
+        16,
+        *[18, 20, 22],
+        24,
+    ]
+    assert [replicate.scenarios[code] for code in replicate.malicious] == [
+        *[False] * 5,
+        *["a"] * 3,
+        False,
+        *["a#2"] * 3,
+        False,
+    ]
+    assert replicate_attacks == [
+        {"id": "a", "start": 10, "end": 14, "ipalid": 1},
+        {"id": "a#2", "start": 18, "end": 22},
+    ]
+
+
+def test_counts():
+    dataset = Dataset.from_messages(messages)
+    truth, predicted = parse_ipal_input(dataset)
+    blocks = Blocks(dataset, attacks)
+    counts = blocks.counts(truth, predicted)
+
+    # Replicates count what the materialized replicate does
+    rng = np.random.default_rng(0)
+    for weights in blocks.weights(10, rng):
+        replicate, _ = blocks.resample(dataset, attacks, blocks.order(weights, rng))
+        assert (weights @ counts).tolist() == confusion_counts(
+            *parse_ipal_input(replicate)
+        ).tolist()
+
+
+def test_bootstrap(monkeypatch):
+    monkeypatch.setattr(settings, "metrics", ["F1", "TPA", "Detected-Scenarios"])
+    dataset = Dataset.from_messages(messages)
+    truth, predicted = parse_ipal_input(dataset)
+    ergs = evaluate(attacks, truth, predicted, dataset)
+
+    result = bootstrap(dataset, truth, predicted, attacks, ergs, 50)
+    assert result["replicates"] == 50
+    assert result["confidence"] == 0.95
+    assert set(result["intervals"]) == set(ergs) - {"Detected-Scenarios"}
+    for low, high in result["intervals"].values():
+        assert low <= high
+
+    # Replicates are independent of the number of processes
+    assert bootstrap(dataset, truth, predicted, attacks, ergs, 50, jobs=2) == result
@@ -0,0 +1,96 @@
+import json
+import os
+
+import numpy as np
+
+from evaluate.cache import cache_path, load_cached, read_cache
+from evaluate.dataset import Dataset
+
+messages = [
+    {"id": 1, "timestamp": 1, "malicious": False, "ids": False, "_config": "x"},
+    {"id": 2, "timestamp": 2, "malicious": 1, "ids": True, "scores": {"a": 0.5}},
+    {"id": 3, "timestamp": 3, "malicious": "b", "ids": True, "scores": {"a": 0.7}},
+]
+
+
+def write(path, messages):
+    path.write_text("".join(json.dumps(js) + "\n" for js in messages))
+    return str(path)
+
+
+def assert_equal(dataset, other):
+    for key in ["timestamp", "ids", "malicious", "id"]:
+        assert np.array_equal(getattr(dataset, key), getattr(other, key))
+    assert [(type(s), s) for s in dataset.scenarios] == [
+        (type(s), s) for s in other.scenarios
+    ]
+    assert dataset.configs == other.configs
+
+
+def test_cache_roundtrip(tmp_path):
+    filename = write(tmp_path / "input.ipal", messages)
+
+    assert read_cache(filename) is None
+    dataset = load_cached(filename)
+    cached = read_cache(filename)
+
+    assert os.path.isdir(cache_path(filename))
+    assert isinstance(cached.ids, np.memmap)
+    assert_equal(cached, dataset)
+    assert cached.scores == {}
+
+
+def test_cache_scores(tmp_path):
+    filename = write(tmp_path / "input.ipal", messages)
+    load_cached(filename)
+
+    assert read_cache(filename, scores=True) is None  # not cached yet
+    dataset = load_cached(filename, scores=True)
+    cached = read_cache(filename, scores=True)
+
+    assert list(cached.scores) == ["a"]
+    assert np.array_equal(cached.scores["a"], dataset.scores["a"], equal_nan=True)
+
+
+def test_cache_invalidation(tmp_path):
+    filename = write(tmp_path / "input.ipal", messages)
+    load_cached(filename)
+
+    # Touched, yet unchanged
+    os.utime(filename, ns=(0, 0))
+    assert read_cache(filename) is not None
+
+    # Changed content
+    write(tmp_path / "input.ipal", messages[:2])
+    assert read_cache(filename) is None
+
+    dataset = load_cached(filename)
+    assert len(dataset) == 2
+    assert_equal(read_cache(filename), dataset)
+    assert np.array_equal(dataset.ids, Dataset.from_messages(messages[:2]).ids)
+
+
+def test_cache_replaced(tmp_path):
+    filename = write(tmp_path / "input.ipal", messages)
+    load_cached(filename)
+    write(tmp_path / "input.ipal", messages[:2])
+
+    assert len(load_cached(filename)) == 2
+    assert len(read_cache(filename)) == 2
+
+    # No temporary or stale directories remain next to the input
+    assert sorted(os.listdir(tmp_path)) == ["input.ipal", "input.ipal.cache"]
+
+
+def test_cache_foreign_directory(tmp_path):
+    filename = write(tmp_path / "input.ipal", messages)
+    os.makedirs(cache_path(filename))
+    (tmp_path / "input.ipal.cache" / "notes.txt").write_text("not a cache")
+
+    dataset = load_cached(filename)
+
+    # The input is parsed, yet the directory is kept and no cache is written
+    assert len(dataset) == 3
+    assert os.listdir(cache_path(filename)) == ["notes.txt"]
+    assert read_cache(filename) is None
+    assert sorted(os.listdir(tmp_path)) == ["input.ipal", "input.ipal.cache"]
@@ -0,0 +1,129 @@
+import io
+import json
+
+import numpy as np
+
+from evaluate.dataset import Dataset
+from tests.metrics.test_data import test_data
+
+
+def _to_file(messages):
+    return io.StringIO("".join(json.dumps(js) + "\n" for js in messages))
+
+
+def test_load_columns():
+    dataset = Dataset.load(_to_file(test_data), chunksize=3)
+
+    assert len(dataset) == len(test_data)
+    assert dataset.timestamp.dtype == np.int64
+    assert np.array_equal(dataset.timestamp, np.arange(1, 9))
+    assert dataset.ids.dtype == np.bool_
+    assert dataset.ids.tolist() == [d["ids"] for d in test_data]
+    assert dataset.is_malicious().tolist() == [bool(d["malicious"]) for d in test_data]
+    assert [dataset.scenarios[c] for c in dataset.malicious] == [
+        d["malicious"] for d in test_data
+    ]
+    assert dataset.id is None
+    assert dataset.configs == {}
+
+
+def test_load_configs_and_ids():
+    messages = [
+        {"id": 4, "timestamp": 1.5, "malicious": 1, "ids": 0, "_iids-config": {}},
+        {"id": 5, "timestamp": 2, "malicious": True, "ids": 1},
+    ]
+    dataset = Dataset.load(_to_file(messages))
+
+    assert dataset.configs == {"_iids-config": {}}
+    assert dataset.timestamp.dtype == np.float64
+    assert dataset.id.tolist() == [4, 5]
+    # True and 1 are distinct scenario labels
+    assert dataset.malicious.tolist() == [1, 2]
+    assert dataset.scenarios == [False, 1, True]
+
+
+def test_load_untimed():
+    messages = [{"malicious": False, "ids": True}, {"malicious": "a", "ids": False}]
+    dataset = Dataset.load(_to_file(messages))
+
+    assert dataset.timestamp is None
+    assert dataset.ids.tolist() == [True, False]
+
+
+def test_load_empty():
+    dataset = Dataset.load(io.StringIO(""))
+
+    assert len(dataset) == 0
+    assert dataset.configs == {}
+
+
+def test_share_columns():
+    dataset = Dataset.from_messages(test_data)
+    other = Dataset.from_messages({**d, "ids": not d["ids"]} for d in test_data)
+
+    assert other.share_columns(dataset)
+    assert other.timestamp is dataset.timestamp
+    assert other.malicious is dataset.malicious
+    assert other.ids.tolist() != dataset.ids.tolist()
+
+    shifted = Dataset.from_messages(
+        {**d, "timestamp": d["timestamp"] + 1} for d in test_data
+    )
+    assert not shifted.share_columns(dataset)
+
+
+def test_load_alerts():
+    messages = [
+        {"timestamp": 1, "malicious": False, "ids": False, "alerts": {"a": False}},
+        {"timestamp": 2, "malicious": 1, "ids": True, "alerts": {"a": True}},
+        {"timestamp": 3, "malicious": 1, "ids": True, "alerts": {"a": 1, "b": 1}},
+        {"timestamp": 4, "malicious": False, "ids": False},
+    ]
+    dataset = Dataset.load(_to_file(messages), chunksize=2, alerts=True)
+
+    assert list(dataset.alerts) == ["a", "b"]
+    assert dataset.alerts["a"].tolist() == [False, True, True, False]
+    assert dataset.alerts["b"].tolist() == [False, False, True, False]
+
+    view = dataset.with_ids(dataset.alerts["b"])
+    assert view.timestamp is dataset.timestamp
+    assert view.ids.tolist() == [False, False, True, False]
+
+    assert Dataset.load(_to_file(messages)).alerts == {}
+
+
+def test_first_unordered():
+    assert Dataset.from_messages(test_data).first_unordered() is None
+
+    messages = [
+        {"timestamp": t, "malicious": False, "ids": False} for t in [1, 2, 2, 1]
+    ]
+    assert Dataset.from_messages(messages).first_unordered() == 3
+
+    untimed = [{"malicious": False, "ids": False}]
+    assert Dataset.from_messages(untimed).first_unordered() is None
+
+
+def test_sort():
+    messages = [
+        {"id": 0, "timestamp": 3, "malicious": "a", "ids": True, "alerts": {"x": 1}},
+        {"id": 1, "timestamp": 1, "malicious": False, "ids": False},
+        {"id": 2, "timestamp": 3, "malicious": False, "ids": True},
+        {"id": 3, "timestamp": 2, "malicious": "b", "ids": False, "alerts": {"x": 0}},
+    ]
+    dataset = Dataset.from_messages(messages, alerts=True)
+    dataset.cached("view", lambda d: d.ids.copy())
+
+    assert dataset.sort().tolist() == [1, 3, 0, 2]
+    assert dataset.first_unordered() is None
+    assert dataset.timestamp.tolist() == [1, 2, 3, 3]
+    assert dataset.id.tolist() == [1, 3, 0, 2]  # stable
+    assert dataset.ids.tolist() == [False, False, True, True]
+    assert [dataset.scenarios[c] for c in dataset.malicious] == [False, "b", "a", False]
+    assert dataset.alerts["x"].tolist() == [False, False, True, False]
+    assert dataset.cached("view", lambda d: d.ids.copy()).tolist() == [
+        False,
+        False,
+        True,
+        True,
+    ]
@@ -0,0 +1,54 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from evaluate.dataset import Dataset
+from evaluate.decoder import available_backends, get_decoder, get_projection
+
+messages = [
+    {"_config": {"a": 1}, "id": 1, "timestamp": 1.5, "malicious": False, "ids": False},
+    {"id": 2, "timestamp": 2, "malicious": 7, "ids": True, "state": {"x": [1, 2]}},
+    {"id": 3, "timestamp": 3, "malicious": "b", "ids": True, "scores": {"a": 0.5}},
+]
+lines = "".join(json.dumps(js) + "\n" for js in messages)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_decoder(backend):
+    name, decode = get_decoder(backend)
+
+    assert name == backend
+    for line in lines.splitlines():
+        assert decode(line) == json.loads(line)
+        assert decode(line.encode()) == json.loads(line)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_projection(backend):
+    _, project = get_projection(["id", "malicious"], backend)
+
+    for js, line in zip(messages, lines.splitlines()):
+        projected = project(line)
+        assert projected["id"] == js["id"]
+        assert projected["malicious"] == js["malicious"]
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_load(backend):
+    expected = Dataset.load(io.StringIO(lines), backend="json")
+    dataset = Dataset.load(io.StringIO(lines), chunksize=2, backend=backend)
+
+    for key in ["timestamp", "ids", "malicious", "id"]:
+        assert np.array_equal(getattr(dataset, key), getattr(expected, key))
+    assert dataset.scenarios == [False, 7, "b"]
+    assert dataset.configs == {"_config": {"a": 1}}
+
+
+def test_unknown_backend():
+    assert available_backends()[-1] == "json"
+    assert get_decoder("auto")[0] == available_backends()[0]
+
+    with pytest.raises(ValueError):
+        get_decoder("yaml")
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from .conftest import check_with_validation_file, evaluate
@@ -34,3 +36,271 @@ def test_test_file(file):
     assert errno == 0
     assert stderr == "" or b"ERROR" not in stderr
     check_with_validation_file(file[0], stdout.decode("utf-8"), test_test_file.__name__)
+
+
+def test_metric_selection():
+    errno, stdout, stderr = evaluate(
+        [
+            "--attacks",
+            "misc/tests/attacks-1.json",
+            "--metrics",
+            "F1,Detection-Delay",
+            "misc/tests/testfile-1.ipal.gz",
+        ]
+    )
+
+    assert errno == 0
+    ergs = json.loads(stdout)
+    assert "F1" in ergs and "Detection-Delay" in ergs
+    assert "Detected-Scenarios" in ergs  # required by the detection delay
+    assert "Accuracy" not in ergs and "TaPR" not in ergs
+
+
+def test_metric_selection_unknown():
+    errno, stdout, stderr = evaluate(
+        ["--metrics", "F42", "misc/tests/testfile-1.ipal.gz"]
+    )
+
+    assert errno == 1
+    assert b"Unknown metric(s) 'F42'" in stderr
+
+
+def test_batch():
+    errno, stdout, stderr = evaluate(
+        [
+            "--attacks",
+            "misc/tests/attacks-1.json",
+            "--metrics",
+            "F1,TPA",
+            "misc/tests/testfile-[14].ipal.gz",
+        ]
+    )
+
+    assert errno == 0
+    ergs = json.loads(stdout)
+    assert list(ergs) == [
+        "misc/tests/testfile-1.ipal.gz",
+        "misc/tests/testfile-4.ipal.gz",
+    ]
+    assert ergs["misc/tests/testfile-1.ipal.gz"]["TPA"] == 26
+    assert ergs["misc/tests/testfile-4.ipal.gz"]["TPA"] == 0
+
+
+def test_batch_table():
+    errno, stdout, stderr = evaluate(
+        [
+            "--metrics",
+            "F1",
+            "--table",
+            "misc/tests/testfile-1.ipal.gz",
+            "misc/tests/testfile-4.ipal.gz",
+        ]
+    )
+
+    assert errno == 0
+    lines = stdout.decode("utf-8").splitlines()
+    assert lines[0] == "input,tn,fp,fn,tp,Precision,Recall,F0.1,F0.5,F1,F2,F10"
+    assert lines[2].startswith("misc/tests/testfile-4.ipal.gz,395379,0,54621,0,")
+
+
+def test_batch_shared_truth(monkeypatch):
+    import io
+
+    import evaluate.settings as settings
+    from evaluate.dataset import Dataset
+    from evaluate.evaluate import evaluate_input
+
+    monkeypatch.setattr(settings, "metrics", ["F1"])
+
+    def load(alarms):
+        lines = [
+            {"timestamp": i, "malicious": i in [2, 3], "ids": alarm}
+            for i, alarm in enumerate(alarms)
+        ]
+        text = "".join(json.dumps(line) + "\n" for line in lines)
+        monkeypatch.setattr(settings, "inputfd", io.StringIO(text))
+
+    load([False, False, True, False, True])
+    first = evaluate_input(None)
+
+    # The ground truth of the second input is not parsed again
+    calls = []
+    is_malicious = Dataset.is_malicious
+    monkeypatch.setattr(
+        Dataset, "is_malicious", lambda self: calls.append(self) or is_malicious(self)
+    )
+    load([False, True, True, True, False])
+    ergs, dataset, truth = evaluate_input(None, first[1:])
+
+    assert calls == []
+    assert truth is first[2] and dataset.malicious is first[1].malicious
+    assert (ergs["tp"], ergs["fp"], ergs["fn"]) == (2, 1, 0)
+
+
+def test_alerts(tmp_path):
+    messages = [
+        {
+            "timestamp": 1,
+            "malicious": False,
+            "ids": False,
+            "alerts": {"a": False, "b": True},
+        },
+        {
+            "timestamp": 2,
+            "malicious": 1,
+            "ids": True,
+            "alerts": {"a": True, "b": False},
+        },
+    ]
+    path = tmp_path / "combined.ipal"
+    path.write_text("".join(json.dumps(js) + "\n" for js in messages))
+
+    errno, stdout, stderr = evaluate(["--alerts", "--metrics", "Recall", str(path)])
+
+    assert errno == 0
+    ergs = json.loads(stdout)
+    assert ergs["Recall"] == 1.0
+    assert ergs["_alerts"]["a"]["Recall"] == 1.0
+    assert ergs["_alerts"]["b"]["Recall"] == 0.0
+
+
+def test_sweep(tmp_path):
+    messages = [
+        {"timestamp": 1, "malicious": False, "ids": False, "scores": {"a": 0.2}},
+        {"timestamp": 2, "malicious": 1, "ids": True, "scores": {"a": 0.9}},
+        {"timestamp": 3, "malicious": False, "ids": True, "scores": {"a": 0.5}},
+    ]
+    path = tmp_path / "scored.ipal"
+    path.write_text("".join(json.dumps(js) + "\n" for js in messages))
+
+    errno, stdout, stderr = evaluate(["--sweep", "default", str(path)])
+
+    assert errno == 0
+    curves = json.loads(stdout)
+    assert curves["score"] == "default"
+    assert curves["thresholds"] == [0.9, 0.5, 0.2]
+    assert curves["tp"] == [1, 1, 1]
+    assert curves["fp"] == [0, 1, 2]
+
+
+def test_window(tmp_path):
+    messages = [
+        {"timestamp": 1, "malicious": False, "ids": False},
+        {"timestamp": 2, "malicious": 1, "ids": True},
+        {"timestamp": 5, "malicious": False, "ids": True},
+    ]
+    path = tmp_path / "timed.ipal"
+    path.write_text("".join(json.dumps(js) + "\n" for js in messages))
+
+    errno, stdout, stderr = evaluate(
+        ["--timed-dataset", "True", "--window", "3", "--stride", "2", str(path)]
+    )
+
+    assert errno == 0
+    ergs = json.loads(stdout)
+    assert (ergs["window"], ergs["stride"]) == (3, 2)
+    assert [(w["start"], w["end"]) for w in ergs["windows"]] == [
+        (1, 4),
+        (3, 6),
+        (5, 8),
+    ]
+    assert [w["tp"] for w in ergs["windows"]] == [1, 0, 0]
+    assert [w["fp"] for w in ergs["windows"]] == [0, 1, 1]
+
+
+@pytest.mark.parametrize("option,value", [("cache", True), ("jobs", 2)])
+def test_input_not_opened(tmp_path, monkeypatch, option, value):
+    import evaluate.settings as settings
+    from evaluate.evaluate import evaluate_input
+
+    path = tmp_path / "input.ipal"
+    path.write_text(
+        "".join(
+            json.dumps({"timestamp": i, "malicious": i > 1, "ids": i > 0}) + "\n"
+            for i in range(4)
+        )
+    )
+    monkeypatch.setattr(settings, "input", str(path))
+    monkeypatch.setattr(settings, "inputfd", None)
+    monkeypatch.setattr(settings, "metrics", ["F1"])
+    monkeypatch.setattr(settings, option, value)
+
+    # Cached or chunked inputs are not read through settings.inputfd
+    opened = []
+    monkeypatch.setattr(
+        "evaluate.evaluate.open_file", lambda *args: opened.append(args)
+    )
+    ergs, _, _ = evaluate_input(None)
+
+    assert opened == [] and settings.inputfd is None
+    assert (ergs["tp"], ergs["fp"], ergs["fn"]) == (2, 1, 0)
+
+
+def test_unordered(tmp_path):
+    messages = [
+        {"timestamp": 1, "malicious": False, "ids": False},
+        {"timestamp": 4, "malicious": 1, "ids": True},
+        {"timestamp": 2, "malicious": False, "ids": True},
+    ]
+    path = tmp_path / "unordered.ipal"
+    path.write_text("".join(json.dumps(js) + "\n" for js in messages))
+
+    errno, stdout, stderr = evaluate(["--metrics", "Precision,Recall", str(path)])
+
+    assert errno == 1
+    assert b"message 2 at 2 is earlier than message 1 at 4" in stderr
+
+    errno, stdout, stderr = evaluate(
+        ["--metrics", "Precision,Recall", "--sort", str(path)]
+    )
+
+    assert errno == 0
+    ergs = json.loads(stdout)
+    assert (ergs["Precision"], ergs["Recall"]) == (0.5, 1)
+
+
+def test_bootstrap(tmp_path):
+    messages = [
+        {"timestamp": 1, "malicious": False, "ids": False},
+        {"timestamp": 2, "malicious": 1, "ids": True},
+        {"timestamp": 3, "malicious": False, "ids": True},
+        {"timestamp": 4, "malicious": 2, "ids": False},
+        {"timestamp": 5, "malicious": False, "ids": False},
+    ]
+    path = tmp_path / "timed.ipal"
+    path.write_text("".join(json.dumps(js) + "\n" for js in messages))
+
+    errno, stdout, stderr = evaluate(
+        ["--metrics", "Precision,Recall", "--bootstrap", "20", str(path)]
+    )
+
+    assert errno == 0
+    ergs = json.loads(stdout)
+    assert ergs["_bootstrap"]["replicates"] == 20
+    for name in ["Precision", "Recall"]:
+        low, high = ergs["_bootstrap"]["intervals"][name]
+        assert 0 <= low <= ergs[name] <= high <= 1
+
+    errno, stdout, stderr = evaluate(["--bootstrap", "20", "--window", "3", str(path)])
+    assert errno == 1
+
+
+def test_segments(tmp_path):
+    messages = [
+        {"timestamp": t, "malicious": m, "ids": a}
+        for t, (m, a) in enumerate(
+            [(False, True), (False, False), (1, True), (False, False)] * 5
+        )
+    ]
+    path = tmp_path / "timed.ipal"
+    path.write_text("".join(json.dumps(js) + "\n" for js in messages))
+
+    errno, stdout, stderr = evaluate([str(path)])
+    assert errno == 0
+    for option in [["--segments", "3"], ["--segments", "3", "--jobs", "2"]]:
+        errno, segmented, stderr = evaluate(option + [str(path)])
+        assert errno == 0
+        assert json.loads(segmented) == json.loads(stdout)
+
+    errno, stdout, stderr = evaluate(["--segments", "0", str(path)])
+    assert errno == 1
@@ -0,0 +1,77 @@
+import gzip
+import io
+import json
+
+import numpy as np
+import pytest
+
+import evaluate.ingest as ingest
+from evaluate.dataset import Dataset
+from evaluate.ingest import load_file, prefetch, read_chunks
+
+messages = [
+    {"_config": 1, "id": 0, "timestamp": 0, "malicious": False, "ids": False},
+    {"id": 1, "timestamp": 1, "malicious": "b", "ids": True, "scores": {"x": 0.1}},
+    {"id": 2, "timestamp": 2, "malicious": 1, "ids": False, "alerts": {"y": True}},
+    {"id": 3, "timestamp": 3.5, "malicious": "a", "ids": True, "scores": {"y": 2}},
+    {"id": 4, "timestamp": 4, "malicious": "b", "ids": False, "alerts": {"x": 1}},
+    {"id": 5, "timestamp": 5, "malicious": True, "ids": True},
+]
+lines = "".join(json.dumps(js) + "\n" for js in messages).encode()
+
+
+def assert_equal(dataset, expected):
+    for key in ["timestamp", "ids", "malicious", "id"]:
+        assert getattr(dataset, key).dtype == getattr(expected, key).dtype
+        assert np.array_equal(getattr(dataset, key), getattr(expected, key))
+    assert [(type(s), s) for s in dataset.scenarios] == [
+        (type(s), s) for s in expected.scenarios
+    ]
+    for field in ["alerts", "scores"]:
+        columns, expected_columns = getattr(dataset, field), getattr(expected, field)
+        assert list(columns) == list(expected_columns)
+        for name in columns:
+            assert np.array_equal(
+                columns[name], expected_columns[name], equal_nan=field == "scores"
+            )
+    assert dataset.configs == expected.configs
+
+
+def test_read_chunks():
+    chunks = list(read_chunks(io.BytesIO(lines + b'{"id": 6}'), chunkbytes=50))
+
+    assert b"".join(chunks) == lines + b'{"id": 6}'
+    assert all(chunk.endswith(b"\n") for chunk in chunks[:-1])
+
+
+def test_prefetch():
+    assert list(prefetch(range(10), depth=2)) == list(range(10))
+
+    def failing():
+        yield 1
+        raise OSError("broken")
+
+    with pytest.raises(OSError):
+        list(prefetch(failing()))
+
+
+def test_concatenate():
+    expected = Dataset.from_messages(messages, alerts=True, scores=True)
+    parts = [
+        Dataset.from_messages(messages[i : i + 2], alerts=True, scores=True)
+        for i in range(0, len(messages), 2)
+    ]
+
+    assert_equal(Dataset.concatenate(parts), expected)
+    assert len(Dataset.concatenate([])) == 0
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_load_file(tmp_path, monkeypatch, compressed):
+    monkeypatch.setattr(ingest, "CHUNKBYTES", 64)
+    path = tmp_path / ("input.ipal.gz" if compressed else "input.ipal")
+    path.write_bytes(gzip.compress(lines) if compressed else lines)
+
+    expected = Dataset.load(io.BytesIO(lines), alerts=True, scores=True)
+    assert_equal(load_file(str(path), True, True, jobs=2), expected)
+    assert_equal(load_file(str(path), True, True, jobs=1), expected)
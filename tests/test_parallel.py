@@ -0,0 +1,33 @@
+import numpy as np
+
+import evaluate.settings as settings
+from evaluate.evaluate import evaluate
+from evaluate.parallel import SharedArrays
+from evaluate.utils import parse_ipal_input
+from tests.metrics.test_data import test_attacks, test_dataset
+
+
+def test_shared_arrays():
+    shared = SharedArrays({"a": np.arange(5), "b": np.array([1, "x"], dtype=object)})
+    try:
+        arrays, blocks = SharedArrays.attach(shared.spec)
+
+        assert arrays["a"].tolist() == [0, 1, 2, 3, 4]
+        assert not arrays["a"].flags.writeable
+        assert arrays["b"].tolist() == [1, "x"]
+
+        for shm in blocks:
+            shm.close()
+    finally:
+        shared.close()
+
+
+def test_evaluate_parallel(monkeypatch):
+    monkeypatch.setattr(settings, "metrics", ["F1", "MCC", "Detection-Delay", "TPA"])
+    truth, predicted = parse_ipal_input(test_dataset)
+
+    serial = evaluate(test_attacks, truth, predicted, test_dataset)
+    monkeypatch.setattr(settings, "jobs", 3)
+    parallel = evaluate(test_attacks, truth, predicted, test_dataset)
+
+    assert list(parallel.items()) == list(serial.items())
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from pytest import approx
+
+import evaluate.settings as settings
+from evaluate.dataset import Dataset
+from evaluate.evaluate import evaluate
+from evaluate.segments import segment_bounds
+from evaluate.utils import parse_ipal_input
+from metrics.nab_score import Nab
+
+alarms = [False, True, False, False, True, True, False, False, True, False]
+malicious = [False, False, False, "a", "a", False, False, False, False, False]
+messages = [
+    {"id": i, "timestamp": t, "malicious": m, "ids": a}
+    for i, (t, a, m) in enumerate(
+        zip([0, 1, 2, 3, 4, 5, 6, 6, 8, 9], alarms, malicious)
+    )
+]
+attacks = [{"id": "a", "start": 3, "end": 4.5}]
+
+
+def random_dataset(seed):
+    # Benign and attack blocks with random alarms, scenarios attacked repeatedly
+    rng = np.random.default_rng(seed)
+    messages, attacks, timestamp = [], [], 0.0
+
+    for _ in range(40):
+        length = int(rng.integers(1, 10))
+        timestamps = timestamp + np.cumsum(rng.random(length))
+        label = False
+        if rng.random() < 0.4:
+            label = "s{}".format(rng.integers(5))
+            attacks.append({"id": label, "start": timestamps[0], "end": timestamps[-1]})
+
+        for t, alarm in zip(timestamps.tolist(), rng.random(length) < 0.4):
+            messages.append({"timestamp": t, "malicious": label, "ids": bool(alarm)})
+        timestamp = timestamps[-1]
+
+    return Dataset.from_messages(messages), attacks
+
+
+def assert_same(segmented, serial):
+    assert list(segmented) == list(serial)
+    for name, value in serial.items():
+        if isinstance(value, float):
+            assert segmented[name] == approx(value, nan_ok=True), name
+        else:
+            assert segmented[name] == value, name
+
+
+def test_segment_bounds():
+    dataset = Dataset.from_messages(messages)
+
+    # Gaps after alarms, next to the attack, without time advancing, or before the
+    # last message are skipped
+    assert segment_bounds(dataset, attacks, 10).tolist() == [0, 1, 8, 10]
+    assert segment_bounds(dataset, attacks, 2).tolist() == [0, 8, 10]
+    assert segment_bounds(dataset, attacks, 1).tolist() == [0, 10]
+
+    # Attacks extended by the gracetime cover the gaps next to them
+    bak = settings.alarm_gracetime
+    settings.alarm_gracetime = 1.5
+    try:
+        assert segment_bounds(dataset, attacks, 10).tolist() == [0, 1, 10]
+    finally:
+        settings.alarm_gracetime = bak
+
+
+def test_dataset_segment():
+    segment = Dataset.from_messages(messages).segment(3, 6)
+
+    assert segment.timestamp.tolist() == [3, 4, 5]
+    assert segment.ids.tolist() == [False, True, True]
+    assert segment.id.tolist() == [3, 4, 5]
+    assert [segment.scenarios[code] for code in segment.malicious] == ["a", "a", 0]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("option", [None, "alarm_gracetime", "affiliation_timestamps"])
+def test_evaluate_segments(monkeypatch, seed, option):
+    if option is not None:
+        monkeypatch.setattr(settings, option, 0.5 if option == "alarm_gracetime" else 1)
+
+    dataset, attacks = random_dataset(seed)
+    truth, predicted = parse_ipal_input(dataset)
+    serial = evaluate(attacks, truth, predicted, dataset)
+
+    for segments in [2, 7, len(dataset)]:
+        monkeypatch.setattr(settings, "segments", segments)
+        assert_same(evaluate(attacks, truth, predicted, dataset), serial)
+
+
+def test_evaluate_segments_parallel(monkeypatch):
+    dataset, attacks = random_dataset(0)
+    truth, predicted = parse_ipal_input(dataset)
+    serial = evaluate(attacks, truth, predicted, dataset)
+
+    monkeypatch.setattr(settings, "segments", 4)
+    monkeypatch.setattr(settings, "jobs", 2)
+    assert_same(evaluate(attacks, truth, predicted, dataset), serial)
+
+
+def test_whole_dataset_fallback(monkeypatch):
+    monkeypatch.setattr(settings, "metrics", ["nab-score"])
+    dataset, attacks = random_dataset(1)
+    attacks = attacks[::-1]  # NAB segments require sorted attacks
+    truth, predicted = parse_ipal_input(dataset)
+
+    with pytest.raises(ValueError):
+        Nab.partial(truth, predicted, dataset, attacks)
+
+    serial = evaluate(attacks, truth, predicted, dataset)
+    monkeypatch.setattr(settings, "segments", 4)
+    assert evaluate(attacks, truth, predicted, dataset) == serial
+
+
+def test_untimed_dataset(monkeypatch):
+    monkeypatch.setattr(settings, "timed_dataset", False)
+    dataset, _ = random_dataset(2)
+    dataset.timestamp = None
+    truth, predicted = parse_ipal_input(dataset)
+    serial = evaluate(None, truth, predicted, dataset)
+
+    monkeypatch.setattr(settings, "segments", 5)
+    assert_same(evaluate(None, truth, predicted, dataset), serial)
@@ -0,0 +1,67 @@
+import json
+import sys
+from subprocess import PIPE, Popen
+
+import pytest
+
+from metrics.registry import REGISTRY, all_outputs, load_metric, outputs
+from metrics.utils import resolve_metrics
+
+from .conftest import EVALUATE
+
+# Prints the modules imported by a run when it exits. python -X importtime misses
+# modules imported with importlib.import_module (cf. metrics.registry.load_metric)
+RUN = """import atexit, runpy, sys
+atexit.register(lambda: sys.stderr.write("\\n".join(sys.modules)))
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def imported_modules(args):
+    # Modules imported by an ipal-evaluate run
+    p = Popen([sys.executable, "-c", RUN, EVALUATE] + args, stdout=PIPE, stderr=PIPE)
+    _, stderr = p.communicate()
+    assert p.returncode == 0
+
+    return set(stderr.decode().splitlines())
+
+
+def test_version_imports():
+    modules = imported_modules(["--version"])
+
+    assert "numpy" not in modules
+    assert not any(module.startswith("metrics") for module in modules)
+
+
+def test_basic_metrics_imports(tmp_path):
+    path = tmp_path / "input.ipal"
+    path.write_text(json.dumps({"timestamp": 1, "malicious": 1, "ids": True}) + "\n")
+
+    modules = imported_modules(["--metrics", "F1", "--log", "error", str(path)])
+
+    assert "metrics.basic_metrics" in modules
+    for package in ["eTaPR_pkg", "affiliation", "sklearn", "evaluate.parallel"]:
+        assert package not in modules
+    for package in ["metrics.scenarios", "metrics.tapr", "metrics.nab_score"]:
+        assert package not in modules
+
+
+@pytest.mark.parametrize("entry", REGISTRY, ids=[e["name"] for e in REGISTRY])
+def test_registry(entry):
+    metric = load_metric(entry)
+
+    assert entry["name"] == metric._name
+    assert entry["requires"] == metric._requires
+    assert entry["requires_attacks"] == metric._requires_attacks
+    assert entry["requires_timed_dataset"] == metric._requires_timed_dataset
+    assert entry["description"] == metric._description
+    assert entry["higher_is_better"] == metric._higher_is_better
+    assert outputs(entry) == metric.defines()
+
+
+def test_registry_order():
+    ordered, _ = resolve_metrics()
+
+    assert [metric._name for metric in ordered] == [e["name"] for e in REGISTRY]
+    assert all_outputs() == [name for metric in ordered for name in metric.defines()]
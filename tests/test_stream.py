@@ -0,0 +1,42 @@
+import io
+import json
+
+from evaluate.evaluate import evaluate
+from evaluate.stream import evaluate_stream, streaming_metrics
+from evaluate.utils import parse_ipal_input
+from tests.metrics.test_data import test_attacks, test_data, test_dataset
+
+
+def _to_file(messages):
+    return io.StringIO("".join(json.dumps(js) + "\n" for js in messages))
+
+
+def test_streaming_metrics():
+    names = [metric._name for metric in streaming_metrics(test_attacks)]
+
+    assert "F-Score" in names and "nab-score" in names and "TPA" in names
+    assert "TaPR" not in names and "Affiliation" not in names
+
+
+def test_stream_matches_evaluation():
+    output = io.StringIO()
+    evaluate_stream(_to_file(test_data), output, test_attacks, every=3)
+    snapshots = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert [s["_messages"] for s in snapshots] == [3, 6, 8]
+    assert "_evaluation-config" in snapshots[-1]
+
+    ergs = evaluate(test_attacks, *parse_ipal_input(test_dataset), test_dataset)
+    for metric in streaming_metrics(test_attacks):
+        for name in metric.defines():
+            assert snapshots[-1][name] == ergs[name], name
+
+
+def test_stream_partial():
+    output = io.StringIO()
+    evaluate_stream(_to_file(test_data[:4]), output, test_attacks)
+    snapshot = json.loads(output.getvalue())
+
+    ergs_tp = sum(bool(d["ids"] and d["malicious"]) for d in test_data[:4])
+    assert snapshot["_messages"] == 4
+    assert snapshot["tp"] == ergs_tp
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+import evaluate.settings as settings
+from evaluate.dataset import Dataset
+from evaluate.evaluate import evaluate
+from evaluate.sweep import select_score, select_thresholds, sweep
+from evaluate.utils import parse_ipal_input
+
+scores = [0.1, 0.9, 0.8, 0.2, None, 0.7, 0.3, 0.9, 0.1, 0.5]
+malicious = [False, "a", "a", False, False, "b", "b", False, False, False]
+messages = [
+    {
+        "id": i,
+        "timestamp": i,
+        "malicious": m,
+        "ids": False,
+        "scores": {"iids": s} if s is not None else {},
+    }
+    for i, (s, m) in enumerate(zip(scores, malicious))
+]
+attacks = [
+    {"id": "a", "start": 1, "end": 2},
+    {"id": "b", "start": 5, "end": 6},
+    {"id": "c", "ipalid": 9},
+]
+
+
+def test_select():
+    dataset = Dataset.from_messages(messages, scores=True)
+    score = select_score(dataset, "default")
+
+    assert np.isnan(score[4])
+    assert select_thresholds(score).tolist() == [0.9, 0.8, 0.7, 0.5, 0.3, 0.2, 0.1]
+    assert select_thresholds(score, 3).tolist() == [0.9, 0.5, 0.1]
+
+    with pytest.raises(ValueError):
+        select_score(dataset, "other")
+
+
+def assert_sweep_matches(dataset, attacks):
+    truth, _ = parse_ipal_input(dataset)
+    score = select_score(dataset, "iids")
+    thresholds = select_thresholds(score)
+
+    curves = sweep(dataset, truth, score, attacks, thresholds)
+
+    for i, threshold in enumerate(thresholds):
+        view = dataset.with_ids(np.nan_to_num(score, nan=-np.inf) >= threshold)
+        ergs = evaluate(attacks, *parse_ipal_input(view), view)
+        ergs["Detected-Scenarios-Count"] = len(ergs["Detected-Scenarios"])
+
+        for name, values in curves.items():
+            if name != "thresholds":
+                assert values[i] == ergs[name], (name, threshold)
+
+
+def test_sweep_matches_evaluation(monkeypatch):
+    monkeypatch.setattr(settings, "metrics", None)
+    assert_sweep_matches(Dataset.from_messages(messages, scores=True), attacks)
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("gracetime", [0, 1])
+def test_sweep_identical_alarms(monkeypatch, seed, gracetime):
+    # Alarms at repeated timestamps, e.g., several alarms within one timestamp,
+    # count as a single false positive alarm
+    monkeypatch.setattr(settings, "metrics", None)
+    monkeypatch.setattr(settings, "alarm_gracetime", gracetime)
+    rng = np.random.default_rng(seed)
+
+    timestamps = np.sort(rng.integers(0, 12, 40)).tolist()
+    repeated = [
+        {
+            "timestamp": t,
+            "malicious": "a" if 4 <= t <= 5 else False,
+            "ids": False,
+            "scores": {"iids": s},
+        }
+        for t, s in zip(timestamps, rng.integers(0, 5, 40).tolist())
+    ]
+    dataset = Dataset.from_messages(repeated, scores=True)
+    assert_sweep_matches(dataset, [{"id": "a", "start": 4, "end": 5}])
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_sweep_time_aware(monkeypatch, seed):
+    # Detection-Delay and BATADAL-TTD depend on the first alarm within each attack
+    monkeypatch.setattr(settings, "metrics", None)
+    rng = np.random.default_rng(seed)
+
+    attacks = [
+        {"id": "a", "start": 3.0, "end": 7.0},
+        {"id": "b", "start": 9.0, "end": 12.0},
+        {"id": "a", "start": 13.0, "end": 14.0},
+    ]
+    timed = [
+        {
+            "timestamp": t,
+            "malicious": next(
+                (a["id"] for a in attacks if a["start"] <= t <= a["end"]), False
+            ),
+            "ids": False,
+            "scores": {"iids": s},
+        }
+        for t, s in zip(
+            np.sort(rng.random(40) * 15).tolist(), rng.integers(0, 6, 40).tolist()
+        )
+    ]
+    assert_sweep_matches(Dataset.from_messages(timed, scores=True), attacks)
@@ -0,0 +1,57 @@
+import numpy as np
+
+import evaluate.settings as settings
+from evaluate.dataset import Dataset
+from evaluate.evaluate import evaluate
+from evaluate.utils import parse_ipal_input
+from evaluate.window import evaluate_windows, window_bounds
+
+alarms = [False, True, True, False, False, True, False, True, True, False, True, False]
+malicious = [False, "a", "a", "a", False, "b", "b", False, False, False, False, False]
+messages = [
+    {"id": i, "timestamp": 2 * i, "malicious": m, "ids": a}
+    for i, (a, m) in enumerate(zip(alarms, malicious))
+]
+attacks = [
+    {"id": "a", "start": 2, "end": 6},
+    {"id": "b", "start": 10, "end": 12},
+]
+
+
+def test_window_bounds():
+    start, end = window_bounds(np.array([0, 1, 7, 10]), 4, 3)
+
+    assert start.tolist() == [0, 3, 6, 9]
+    assert end.tolist() == [4, 7, 10, 13]
+
+
+def test_windows_match_evaluation(monkeypatch):
+    monkeypatch.setattr(settings, "metrics", None)
+    dataset = Dataset.from_messages(messages)
+    truth, predicted = parse_ipal_input(dataset)
+
+    windows = evaluate_windows(dataset, truth, predicted, attacks, 6, 4)
+    assert len(windows) == 6
+
+    for window in windows:
+        rows = (dataset.timestamp >= window["start"]) & (
+            dataset.timestamp < window["end"]
+        )
+        view = [m for m, row in zip(messages, rows) if row]
+        ergs = evaluate(None, *parse_ipal_input(Dataset.from_messages(view)), None)
+
+        for name in ["tp", "fp", "tn", "fn", "Accuracy", "Precision", "Recall"]:
+            assert window[name] == ergs[name], (name, window["start"])
+
+
+def test_window_alarms(monkeypatch):
+    monkeypatch.setattr(settings, "metrics", None)
+    dataset = Dataset.from_messages(messages)
+    truth, predicted = parse_ipal_input(dataset)
+
+    # alarms start at 2, 10, 14, and 20
+    windows = evaluate_windows(dataset, truth, predicted, attacks, 8)
+
+    assert [w["start"] for w in windows] == [0, 8, 16]
+    assert [w["TPA"] for w in windows] == [1, 1, 0]
+    assert [w["FPA"] for w in windows] == [0, 1, 1]